@@ -0,0 +1,257 @@
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.types import is_integer_dtype, is_numeric_dtype
+from pyarrow import csv as pa_csv
+
+# Grain of the aggregation cube: one row per user and week
+CUBE_DIMENSIONS = ['country', 'division', 'fullName', 'fromDate', 'toDate']
+
+# Columns of an activity export the dashboard cannot do without, and text columns it shows when present
+REQUIRED_COLUMNS = ['country', 'division', 'fullName', 'fromDate', 'toDate', 'logins']
+TEXT_COLUMNS = ['country', 'division', 'fullName', 'salesRepEmail']
+DATE_COLUMNS = ['fromDate', 'toDate']
+DATE_FORMAT = '%Y%m%d'
+
+# Head count per country, which MAU rates are measured against
+TOTAL_USERS_BY_COUNTRY = {
+    'Singapore': 32,
+    'Malaysia': 34,
+    'Vietnam': 22,
+    'Philippines': 18
+}
+
+# Bytes of CSV parsed per chunk, and so the granularity of progress reports
+CSV_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def activity_csv_columns(header):
+    """Columns of an activity export header that the dashboard reads, in file order."""
+    wanted = set(REQUIRED_COLUMNS + TEXT_COLUMNS)
+    return [col for col in header if col in wanted or 'view' in col.lower() or 'create' in col.lower()]
+
+
+def _read_csv_header(source):
+    position = source.tell()
+    header = next(csv.reader([source.readline().decode('utf-8-sig')]), [])
+    source.seek(position)
+    return header
+
+
+def load_activity_csv(source, progress=None, block_size=CSV_BLOCK_SIZE):
+    """Read an activity export (path or binary file object) into a typed DataFrame.
+
+    Only the columns the dashboard uses are parsed, by the pyarrow CSV reader: text columns as
+    Arrow-backed strings, and activity counts as int64, or float64 when a count is fractional.
+    A view/create column that is not numeric (e.g. ``createdAt``) is dropped, as the dashboard
+    skips it anyway. Dates repeat once per user and week, so they are read dictionary-encoded
+    and only the distinct values are parsed; blank or malformed dates become NaT. The file is
+    parsed in ``block_size`` chunks; ``progress``, if given, is called after each chunk with the
+    fraction of the file parsed so far.
+    """
+    if not hasattr(source, 'read'):
+        with open(source, 'rb') as f:
+            return load_activity_csv(f, progress, block_size)
+
+    header = _read_csv_header(source)
+    columns = activity_csv_columns(header)
+    # Counts are typed once the whole column is read: the reader infers types from the first block only
+    column_types = {col: pa.string() for col in columns}
+    column_types.update({col: pa.dictionary(pa.int32(), pa.string()) for col in DATE_COLUMNS})
+
+    start = source.tell()
+    total_bytes = max(source.seek(0, os.SEEK_END) - start, 1)
+    source.seek(start)
+
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(include_columns=columns, column_types=column_types),
+    )
+    batches = []
+    for batch in reader:
+        # The reader yields one record batch per block
+        batches.append(batch)
+        if progress:
+            progress(min(len(batches) * block_size / total_bytes, 1.0))
+    table = pa.Table.from_batches(batches, schema=reader.schema)
+    for col in columns:
+        if col not in TEXT_COLUMNS and col not in DATE_COLUMNS:
+            table = _to_count_column(table, col)
+    df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            codes = df[col].cat.codes.to_numpy()
+            dates = pd.to_datetime(df[col].cat.categories, format=DATE_FORMAT, errors='coerce')
+            # Code -1 (a null cell) picks the trailing NaT
+            dates = np.append(dates.to_numpy('datetime64[ns]'), np.datetime64('NaT', 'ns'))
+            df[col] = dates[codes]
+    if progress:
+        progress(1.0)
+    return df
+
+
+def _to_count_column(table, col):
+    """Cast the string column ``col`` to int64, else float64; drop it when it is not numeric, unless required."""
+    values = table[col]
+    values = pc.if_else(pc.equal(values, ''), pa.scalar(None, pa.string()), values)
+    for count_type in (pa.int64(), pa.float64()):
+        try:
+            return table.set_column(table.schema.get_field_index(col), col, pc.cast(values, count_type))
+        except pa.ArrowInvalid:
+            continue
+    return table if col in REQUIRED_COLUMNS else table.drop_columns([col])
+
+
+def week_periods(from_dates, to_dates):
+    """Label each week as 'YYYY-MM-DD to YYYY-MM-DD', as a categorical built from a week index.
+
+    Every distinct (fromDate, toDate) pair is formatted once; rows only carry the code of their week.
+    """
+    from_codes, from_uniques = pd.factorize(from_dates, sort=True)
+    to_codes, to_uniques = pd.factorize(to_dates, sort=True)
+    # Number the (fromDate, toDate) pairs that occur, in date order; -1 marks a missing date
+    pair_index = from_codes.astype(np.int64) * len(to_uniques) + to_codes
+    pair_index[(from_codes < 0) | (to_codes < 0)] = -1
+    pairs, week_codes = np.unique(pair_index, return_inverse=True)
+    if len(pairs) and pairs[0] < 0:
+        pairs, week_codes = pairs[1:], week_codes - 1
+    labels = (from_uniques[pairs // max(len(to_uniques), 1)].strftime('%Y-%m-%d') + ' to '
+              + to_uniques[pairs % max(len(to_uniques), 1)].strftime('%Y-%m-%d'))
+    return pd.Categorical.from_codes(week_codes, categories=labels)
+
+
+def compact_activity_frame(df):
+    """Return ``df`` with categorical dimensions, a categorical ``week_period`` and downcast counts.
+
+    Text dimensions get sorted categories, so groupbys run on their integer codes and still
+    order groups the way plain strings did. Integer counts are downcast to the smallest integer
+    type that holds them; sums over them are still computed in int64.
+    """
+    df = df.copy(deep=False)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            values = df[col].astype('category')
+            df[col] = values.cat.reorder_categories(values.cat.categories.sort_values())
+    if set(DATE_COLUMNS) <= set(df.columns):
+        df['week_period'] = week_periods(df['fromDate'], df['toDate'])
+    for col in df.columns:
+        if is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def build_activity_cube(df):
+    """Aggregate every numeric activity column at the (country, division, user, week) grain.
+
+    This is the only pass over the raw activity rows; every chart, table and insight of the
+    dashboard is derived from the much smaller cube. ``records`` counts the raw rows behind
+    each cube row that have a week, i.e. both dates; rows with a blank or malformed date still
+    add their activity but, as in the original dashboard, not an active week. ``week_period``
+    labels the week as the dashboard displays it.
+    Categorical dimensions (see compact_activity_frame) are grouped on their codes and stay
+    categorical in the cube.
+    """
+    metric_columns = [col for col in df.columns if col not in CUBE_DIMENSIONS and is_numeric_dtype(df[col])]
+    grouped = df.groupby(CUBE_DIMENSIONS, dropna=False, sort=False, observed=True)
+    cube = grouped[metric_columns].sum()
+    cube['records'] = grouped.size()
+    cube = cube.reset_index()
+    # Dates are group keys, so a cube row either has its week or stands for rows without one
+    cube.loc[cube['fromDate'].isna() | cube['toDate'].isna(), 'records'] = 0
+    cube['week_period'] = week_periods(cube['fromDate'], cube['toDate'])
+    return cube
+
+
+def user_totals(cube):
+    """Total logins, active weeks and created events of each user across all weeks."""
+    return cube.groupby(['fullName', 'country', 'division'], observed=True).agg(
+        total_logins=('logins', 'sum'),
+        weeks_active=('records', 'sum'),
+        total_createEvents=('createEvents', 'sum'),
+    ).reset_index()
+
+
+def weekly_summary(cube, by=None):
+    """Total logins, active users and created events per week, optionally split by ``by`` (e.g. 'country')."""
+    keys = ([by] if by else []) + ['fromDate', 'week_period']
+    return cube.groupby(keys, observed=True).agg(
+        total_logins=('logins', 'sum'),
+        active_users=('fullName', 'nunique'),
+        total_createEvents=('createEvents', 'sum'),
+    ).reset_index()
+
+
+def activity_columns(cube):
+    """Map the display name of each view/create count column (e.g. 'Home' for viewHomeCounts) to the column."""
+    return {
+        col.replace('Counts', '').replace('view', '').replace('create', ''): col
+        for col in cube.columns
+        if ('view' in col.lower() or 'create' in col.lower()) and is_numeric_dtype(cube[col])
+    }
+
+
+def activity_totals(cube):
+    """Total of each activity over all weeks, largest first, leaving out activities nobody used."""
+    columns = activity_columns(cube)
+    totals = cube[list(columns.values())].sum().set_axis(list(columns))
+    return totals[totals > 0].sort_values(ascending=False, kind='stable')
+
+
+def activity_by_country(cube, activities):
+    """Totals of the given activities (display names) per country, one column per activity."""
+    columns = activity_columns(cube)
+    return cube.groupby('country', observed=True)[[columns[activity] for activity in activities]].sum().set_axis(
+        activities, axis=1)
+
+
+def filter_active_users(user_totals_df, metric='total_logins'):
+    """Users with a positive ``metric``, ordered by country and then by ``metric``, largest first."""
+    active = user_totals_df[user_totals_df[metric] > 0]
+    return active.sort_values(['country', metric], ascending=[True, False])
+
+
+def top_users_by(users_df, metric, n):
+    """The ``n`` users with the largest ``metric`` across all countries."""
+    return users_df.sort_values(metric, ascending=False).head(n)
+
+
+def totals_by_country(users_df, metric):
+    """Total of ``metric`` per country, smallest first (the order of a horizontal bar chart)."""
+    return users_df.groupby('country', observed=True)[metric].sum().sort_values(ascending=True)
+
+
+def monthly_active_users(active_users_df, total_users_by_country=TOTAL_USERS_BY_COUNTRY):
+    """Active users, head count and MAU rate of each country in ``total_users_by_country`` with active users."""
+    counts = active_users_df['country'].value_counts()
+    countries = [country for country in total_users_by_country if counts.get(country, 0) > 0]
+    mau = pd.DataFrame({
+        'active_users': [int(counts[country]) for country in countries],
+        'total_users': [total_users_by_country[country] for country in countries],
+    }, index=pd.Index(countries, name='country'))
+    mau['mau_rate'] = mau['active_users'] / mau['total_users']
+    return mau
+
+
+def country_summary_table(user_totals_df):
+    """Per-country user counts and login/event statistics, as shown in the summary table."""
+    summary = user_totals_df.groupby('country', observed=True).agg({
+        'total_logins': ['count', 'sum', 'mean', 'max'],
+        'weeks_active': 'mean',
+        'total_createEvents': ['sum', 'mean', 'max']
+    }).round(2)
+    summary.columns = ['Total Number of Users', 'Total Logins', 'Avg Logins per User', 'Max Weekly Logins',
+                       'Avg Weekly Active', 'Total Events Created', 'Avg Events per User', 'Max Weekly Events']
+    return summary
+
+
+def activity_summary_table(activity_by_country_df):
+    """Activity totals per country with an overall total, busiest country first."""
+    summary = activity_by_country_df.astype(int).rename_axis('Country').reset_index()
+    summary['Total Activities'] = summary[list(activity_by_country_df.columns)].sum(axis=1)
+    return summary.sort_values('Total Activities', ascending=False)
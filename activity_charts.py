@@ -0,0 +1,283 @@
+import io
+
+import matplotlib
+import numpy as np
+from matplotlib.figure import Figure
+
+# =============================================================================
+# STYLING CONSTANTS
+# =============================================================================
+# Color palettes for consistent styling
+COLOR_PRIMARY = '#1f77b4'      # Blue
+COLOR_SECONDARY = '#ff7f0e'    # Orange
+COLOR_SUCCESS = '#2ca02c'      # Green
+COLOR_DANGER = '#d62728'       # Red
+COLOR_INFO = '#9467bd'         # Purple
+COLOR_BACKGROUND = '#f8f9fa'   # Light gray for chart backgrounds
+
+# Chart color schemes
+COLORS_QUALITATIVE = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+                      '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+COLORS_SEQUENTIAL_BLUE = matplotlib.colormaps['Blues']
+COLORS_SEQUENTIAL_ORANGE = matplotlib.colormaps['Oranges']
+COLORS_SEQUENTIAL_GREEN = matplotlib.colormaps['Greens']
+COLORS_DIVERGING = matplotlib.colormaps['RdYlGn']
+
+
+# =============================================================================
+# CHART BUILDERS
+# =============================================================================
+# Each builder takes only the aggregate it draws and returns a matplotlib Figure created
+# without pyplot, so figures never enter pyplot's global registry.
+
+def weekly_trends_chart(weekly_by_country, countries):
+    """Total logins and active users per week, one line per country."""
+    fig = Figure(figsize=(12, 8))
+    ax1, ax2 = fig.subplots(2, 1)
+
+    # Total logins per week - by country
+    for i, country in enumerate(countries):
+        country_data = weekly_by_country[weekly_by_country['country'] == country]
+        color = COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)]
+        ax1.plot(country_data['fromDate'], country_data['total_logins'],
+                 marker='o', linewidth=2.5, markersize=6, color=color, label=country)
+
+    ax1.set_title('Total Logins per Week by Country', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Total Logins', fontsize=10)
+    ax1.grid(True, alpha=0.3, linestyle='--')
+    ax1.tick_params(axis='x', rotation=45)
+    ax1.set_facecolor(COLOR_BACKGROUND)
+    ax1.legend(loc='best', fontsize=9)
+
+    # Active users per week - by country
+    for i, country in enumerate(countries):
+        country_data = weekly_by_country[weekly_by_country['country'] == country]
+        color = COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)]
+        ax2.plot(country_data['fromDate'], country_data['active_users'],
+                 marker='s', linewidth=2.5, markersize=6, color=color, label=country)
+
+    ax2.set_title('Active Users per Week by Country', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Number of Active Users', fontsize=10)
+    ax2.set_xlabel('Week', fontsize=10)
+    ax2.grid(True, alpha=0.3, linestyle='--')
+    ax2.tick_params(axis='x', rotation=45)
+    ax2.set_facecolor(COLOR_BACKGROUND)
+    ax2.legend(loc='best', fontsize=9)
+
+    fig.tight_layout()
+    return fig
+
+
+def mau_chart(mau):
+    """Active vs inactive users of each country as a row of pie charts.
+
+    ``mau`` is indexed by country with active_users and total_users columns (see
+    activity_analysis.monthly_active_users).
+    """
+    # Create a single figure with subplots for consistent sizing
+    fig = Figure(figsize=(15, 5))
+    axes = fig.subplots(1, len(mau), squeeze=False)[0]
+
+    for ax, (country, active_users_count, total_users) in zip(axes, mau[['active_users', 'total_users']].itertuples()):
+        inactive_users_count = total_users - active_users_count
+
+        # Create pie chart data with consistent colors
+        sizes = [active_users_count, inactive_users_count]
+        labels = ['Active Users', 'Inactive Users']
+        colors = [COLOR_SUCCESS, COLOR_DANGER]  # Green for active, red for inactive
+
+        # Create pie chart
+        wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
+                                          startangle=90, textprops={'fontsize': 10})
+        ax.set_title(f'{country}\nMAU: {active_users_count}/{total_users}', fontsize=12, fontweight='bold')
+        ax.axis('equal')  # Ensure circular pie chart
+
+        # Make percentage text bold
+        for autotext in autotexts:
+            autotext.set_fontweight('bold')
+            autotext.set_color('white')
+
+    fig.tight_layout()
+    return fig
+
+
+def top_users_chart(top_users, value_column, colormap, ylabel, title):
+    """Bar chart of the given users' ``value_column``, labelled with name and country.
+
+    ``colormap`` is the name of a sequential matplotlib colormap (e.g. 'Blues').
+    """
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+
+    user_labels = [f"{name}\n({country})" for name, country in
+                   zip(top_users['fullName'], top_users['country'])]
+
+    # Use consistent color scheme
+    ax.bar(range(len(top_users)), top_users[value_column],
+           color=matplotlib.colormaps[colormap](np.linspace(0.4, 0.9, len(top_users))),
+           edgecolor='white', linewidth=0.5)
+    ax.set_xlabel('Users', fontsize=10)
+    ax.set_ylabel(ylabel, fontsize=10)
+    ax.set_title(title, fontsize=12, fontweight='bold')
+    ax.set_xticks(range(len(top_users)))
+    ax.set_xticklabels(user_labels, rotation=45, ha='right', fontsize=8)
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    ax.set_facecolor(COLOR_BACKGROUND)
+
+    # Add value labels on bars
+    for i, value in enumerate(top_users[value_column]):
+        ax.text(i, value + 0.1, str(int(value)), ha='center', va='bottom', fontweight='bold')
+
+    fig.tight_layout()
+    return fig
+
+
+def country_totals_chart(country_totals, xlabel, title):
+    """Horizontal bar chart of a per-country total, in the order of ``country_totals``."""
+    fig = Figure(figsize=(15, 6))
+    ax = fig.subplots()
+
+    colors = [COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)] for i in range(len(country_totals))]
+    ax.barh(country_totals.index, country_totals.values, color=colors,
+            edgecolor='white', linewidth=1)
+    ax.set_xlabel(xlabel, fontsize=10)
+    ax.set_title(title, fontsize=12, fontweight='bold')
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    ax.set_facecolor(COLOR_BACKGROUND)
+
+    # Add value labels on bars
+    for i, (country, value) in enumerate(country_totals.items()):
+        ax.text(value + 0.5, i, str(int(value)), va='center', fontweight='bold')
+
+    fig.tight_layout()
+    return fig
+
+
+def weekly_events_chart(weekly_events_summary):
+    """Total created events per week."""
+    fig = Figure(figsize=(12, 5))
+    ax = fig.subplots()
+
+    # Total createEvents per week with consistent styling
+    ax.plot(weekly_events_summary['fromDate'], weekly_events_summary['total_createEvents'],
+            marker='o', linewidth=2.5, markersize=6, color=COLOR_SUCCESS)
+    ax.set_title('Total Create Events per Week', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Total Create Events', fontsize=10)
+    ax.set_xlabel('Week', fontsize=10)
+    ax.grid(True, alpha=0.3, linestyle='--')
+    ax.tick_params(axis='x', rotation=45)
+    ax.set_facecolor(COLOR_BACKGROUND)
+
+    fig.tight_layout()
+    return fig
+
+
+def activity_distribution_chart(sorted_activities):
+    """Bar chart of each activity's total over all weeks."""
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    activities = sorted_activities.index.tolist()
+    values = sorted_activities.tolist()
+
+    # Use consistent color palette
+    colors = [COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)] for i in range(len(activities))]
+    bars = ax.bar(activities, values, color=colors, edgecolor='white', linewidth=0.5)
+    ax.set_title('Total Activity Breakdown (All Weeks)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Total Count', fontsize=10)
+    ax.set_xlabel('Activity Type', fontsize=10)
+    ax.tick_params(axis='x', rotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    ax.set_facecolor(COLOR_BACKGROUND)
+
+    # Add value labels
+    for bar, value in zip(bars, values):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                f'{int(value)}', ha='center', va='bottom')
+
+    fig.tight_layout()
+    return fig
+
+
+def activity_by_country_stacked_chart(activity_by_country_df):
+    """Stacked horizontal bars of each country's activity totals."""
+    fig = Figure(figsize=(14, max(8, len(activity_by_country_df) * 0.5)))
+    ax = fig.subplots()
+
+    # Plot stacked bars
+    activity_by_country_df.plot(
+        kind='barh',
+        stacked=True,
+        ax=ax,
+        colormap='tab20',
+        width=0.7,
+        edgecolor='white',
+        linewidth=0.5
+    )
+
+    ax.set_xlabel('Total Activity Count', fontsize=10)
+    ax.set_ylabel('Country', fontsize=10)
+    ax.set_title(f'Top {activity_by_country_df.shape[1]} Activities by Country (Stacked)',
+                 fontsize=12, fontweight='bold')
+    ax.legend(title='Activity Type', bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=8)
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    ax.set_facecolor(COLOR_BACKGROUND)
+
+    fig.tight_layout()
+    return fig
+
+
+def activity_by_country_grouped_chart(activity_by_country_df):
+    """Grouped horizontal bars comparing the countries on each activity."""
+    fig = Figure(figsize=(14, max(6, len(activity_by_country_df) * 0.4)))
+    ax = fig.subplots()
+
+    activity_by_country_df.plot(
+        kind='barh',
+        ax=ax,
+        color=[COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)] for i in range(activity_by_country_df.shape[1])],
+        width=0.7,
+        edgecolor='white',
+        linewidth=0.5
+    )
+
+    ax.set_xlabel('Total Activity Count', fontsize=10)
+    ax.set_ylabel('Country', fontsize=10)
+    ax.set_title(f'Top {activity_by_country_df.shape[1]} Activities by Country (Grouped Comparison)',
+                 fontsize=12, fontweight='bold')
+    ax.legend(title='Activity Type', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    ax.set_facecolor(COLOR_BACKGROUND)
+
+    fig.tight_layout()
+    return fig
+
+
+# Chart builders by name, so renderers can be keyed on (and dispatched by) a plain string
+CHARTS = {
+    'weekly_trends': weekly_trends_chart,
+    'mau': mau_chart,
+    'top_users': top_users_chart,
+    'country_totals': country_totals_chart,
+    'weekly_events': weekly_events_chart,
+    'activity_distribution': activity_distribution_chart,
+    'activity_by_country_stacked': activity_by_country_stacked_chart,
+    'activity_by_country_grouped': activity_by_country_grouped_chart,
+}
+
+
+def render_chart(chart_name, *args, image_format='png', **kwargs):
+    """Build the named chart and return it rendered as PNG (or SVG) bytes.
+
+    The figure is rasterized and cleared straight away, so nothing of it outlives the call.
+    """
+    fig = CHARTS[chart_name](*args, **kwargs)
+    try:
+        buffer = io.BytesIO()
+        # Same resolution and cropping as st.pyplot
+        fig.savefig(buffer, format=image_format, dpi=200, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        fig.clear()
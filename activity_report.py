@@ -0,0 +1,200 @@
+import argparse
+import base64
+import html
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from activity_analysis import (REQUIRED_COLUMNS, TOTAL_USERS_BY_COUNTRY, activity_by_country, activity_summary_table,
+                               activity_totals, build_activity_cube, compact_activity_frame, country_summary_table,
+                               filter_active_users, load_activity_csv, monthly_active_users, top_users_by,
+                               totals_by_country, user_totals, weekly_summary)
+from activity_charts import render_chart
+
+REPORT_STYLE = """
+body { font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; margin: 2rem auto; max-width: 1200px;
+       color: #212529; }
+h1 { margin-bottom: 0.25rem; }
+h2 { border-bottom: 1px solid #dee2e6; padding-bottom: 0.25rem; margin-top: 2.5rem; }
+.metrics { display: flex; gap: 2rem; flex-wrap: wrap; }
+.metric .label { font-size: 0.85rem; color: #6c757d; }
+.metric .value { font-size: 1.6rem; }
+img { max-width: 100%; }
+table.dataframe { border-collapse: collapse; font-size: 0.85rem; margin: 0.5rem 0 1.5rem; }
+table.dataframe th, table.dataframe td { border: 1px solid #dee2e6; padding: 0.25rem 0.6rem; text-align: right; }
+table.dataframe th { background: #f8f9fa; }
+"""
+
+
+def build_report_sections(df, top_n=5):
+    """Compute the dashboard's metrics, charts and tables for an activity frame, without rendering anything.
+
+    Returns ``(metrics, sections)``: ``metrics`` is a list of (label, value) pairs, and each section
+    is ``(heading, items)`` where an item is ``('chart', title, chart_name, args)`` for
+    activity_charts.render_chart or ``('table', title, frame, show_index)``.
+    """
+    cube = build_activity_cube(df)
+    user_totals_df = user_totals(cube)
+    active_users = filter_active_users(user_totals_df, 'total_logins')
+    active_users_events = filter_active_users(user_totals_df, 'total_createEvents')
+    weekly_summary_df = weekly_summary(cube)
+
+    metrics = [
+        ('Date Range', f"{cube['fromDate'].min():%Y-%m-%d} to {cube['toDate'].max():%Y-%m-%d}"),
+        ('Total Users', len(user_totals_df)),
+        ('Active Users', len(active_users)),
+        ('Countries', cube['country'].nunique()),
+        ('Total Events Created', int(cube['createEvents'].sum())),
+    ]
+
+    weekly_display = weekly_summary_df[['week_period', 'total_logins', 'active_users', 'total_createEvents']]
+    weekly_display.columns = ['Week Period', 'Total Logins', 'Active Users', 'Total Events Created']
+    overview = [
+        ('chart', 'Weekly Activity Trends', 'weekly_trends',
+         (weekly_summary(cube, by='country'), list(TOTAL_USERS_BY_COUNTRY))),
+        ('table', 'Weekly Summary', weekly_display, False),
+    ]
+    mau = monthly_active_users(active_users)
+    if not mau.empty:
+        overview.append(('chart', 'Monthly Active Users', 'mau', (mau,)))
+    overview.append(('table', 'Summary by Country', country_summary_table(user_totals_df), True))
+
+    top_by_country = active_users.groupby('country', observed=True).head(top_n)
+    top_by_country = top_by_country[['country', 'fullName', 'division', 'total_logins', 'weeks_active']]
+    top_by_country.columns = ['Country', 'Full Name', 'Division', 'Total Logins', 'Weeks Active']
+    top_users_overall = top_users_by(active_users, 'total_logins', top_n * 4)
+    logins = [
+        ('table', f'Top {top_n} Users per Country', top_by_country, False),
+        ('chart', 'Top Users by Logins', 'top_users',
+         (top_users_overall, 'total_logins', 'Blues', 'Total Login Count', f'Top {len(top_users_overall)} Users Overall')),
+        ('chart', 'Top Countries by Total Logins', 'country_totals',
+         (totals_by_country(active_users, 'total_logins'), 'Total Login Count (All Weeks)', 'Total Logins by Country')),
+    ]
+
+    events = []
+    if len(active_users_events) > 0:
+        events_by_country = active_users_events[['country', 'fullName', 'division', 'total_createEvents', 'weeks_active']]
+        events_by_country.columns = ['Country', 'Full Name', 'Division', 'Total Create Events', 'Weeks Active']
+        top_users_events_overall = top_users_by(active_users_events, 'total_createEvents', top_n * 3)
+        events = [
+            ('table', 'Users with Create Events', events_by_country, False),
+            ('chart', 'Top Users by Create Events', 'top_users',
+             (top_users_events_overall, 'total_createEvents', 'Greens', 'Total Create Events Count',
+              f'Top {len(top_users_events_overall)} Users Overall by Create Events')),
+            ('chart', 'Top Countries by Total Create Events', 'country_totals',
+             (totals_by_country(active_users_events, 'total_createEvents'), 'Total Create Events Count (All Weeks)',
+              'Total Create Events by Country')),
+        ]
+        weekly_events_summary = weekly_summary_df[weekly_summary_df['total_createEvents'] > 0]
+        if len(weekly_events_summary) > 0:
+            events.append(('chart', 'Weekly Create Events Trends', 'weekly_events', (weekly_events_summary,)))
+
+    activities = []
+    sorted_activities = activity_totals(cube)
+    if not sorted_activities.empty:
+        top_activities = sorted_activities.index[:10].tolist()
+        activity_by_country_df = activity_by_country(cube, top_activities)
+        activities = [
+            ('chart', 'Overall Activity Distribution', 'activity_distribution', (sorted_activities,)),
+            ('chart', 'Activity Breakdown by Country (Stacked)', 'activity_by_country_stacked',
+             (activity_by_country_df,)),
+            ('chart', 'Activity Comparison by Country (Grouped)', 'activity_by_country_grouped',
+             (activity_by_country_df[top_activities[:5]],)),
+            ('table', 'Activity Summary by Country', activity_summary_table(activity_by_country_df), False),
+        ]
+
+    sections = [('Overview', overview), ('Login Analysis', logins), ('Create Events Analysis', events),
+                ('Activity Breakdown Analysis', activities)]
+    return metrics, [(heading, items) for heading, items in sections if items]
+
+
+def render_report_html(title, metrics, sections):
+    """Assemble a self-contained HTML report, with each chart item's args replaced by its PNG bytes."""
+    parts = [f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{html.escape(title)}</title>",
+             f"<style>{REPORT_STYLE}</style>\n</head>\n<body>",
+             f"<h1>{html.escape(title)}</h1>",
+             f"<p>Generated {datetime.now():%Y-%m-%d %H:%M}</p>",
+             '<div class="metrics">']
+    for label, value in metrics:
+        parts.append(f'<div class="metric"><div class="label">{html.escape(label)}</div>'
+                     f'<div class="value">{html.escape(str(value))}</div></div>')
+    parts.append('</div>')
+
+    for heading, items in sections:
+        parts.append(f"<h2>{html.escape(heading)}</h2>")
+        for item in items:
+            parts.append(f"<h3>{html.escape(item[1])}</h3>")
+            if item[0] == 'chart':
+                encoded = base64.b64encode(item[3]).decode('ascii')
+                parts.append(f'<img src="data:image/png;base64,{encoded}" alt="{html.escape(item[1])}">')
+            else:
+                parts.append(item[2].to_html(index=item[3], border=0))
+    parts.append("</body>\n</html>\n")
+    return "\n".join(parts)
+
+
+def _render_chart_item(item):
+    _, _, chart_name, args = item
+    return render_chart(chart_name, *args)
+
+
+def generate_reports(csv_path, output_dir="output", top_n=5, by_country=False, max_workers=None):
+    """Write the activity report for ``csv_path``, plus one report per country with ``by_country``.
+
+    The charts of all reports are rendered together in a process pool. Returns the written paths.
+    """
+    df = load_activity_csv(csv_path)
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    df = compact_activity_frame(df)
+    reports = {'activity_report': ('User Activity Report', df)}
+    if by_country:
+        for country in sorted(df['country'].dropna().unique()):
+            slug = "".join(c if c.isalnum() else "_" for c in str(country)).strip("_").lower()
+            reports[f'activity_report_{slug}'] = (f'User Activity Report - {country}', df[df['country'] == country])
+
+    built = {name: (title, *build_report_sections(frame, top_n)) for name, (title, frame) in reports.items()}
+    chart_items = [item for _, _, sections in built.values() for _, items in sections for item in items
+                   if item[0] == 'chart']
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        images = iter(list(executor.map(_render_chart_item, chart_items)))
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, (title, metrics, sections) in built.items():
+        # Charts come back in the order they were collected above
+        sections = [(heading, [(*item[:3], next(images)) if item[0] == 'chart' else item for item in items])
+                    for heading, items in sections]
+        path = os.path.join(output_dir, f"{name}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_report_html(title, metrics, sections))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the user activity dashboard as a static HTML report')
+    parser.add_argument('file_path', type=str, help='Path to the weekly user activity CSV export')
+    parser.add_argument('--output-dir', type=str, default='output', help='Directory to write the report(s) to')
+    parser.add_argument('--top-n', type=int, default=5, help='Number of top users per country (default: 5)')
+    parser.add_argument('--by-country', action='store_true',
+                        help='Also write one report per country next to the overall report')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes rendering charts (default: number of CPUs)')
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.file_path):
+        parser.error(f"File not found: '{args.file_path}'")
+    try:
+        paths = generate_reports(args.file_path, args.output_dir, args.top_n, args.by_country, args.workers)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    for path in paths:
+        print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
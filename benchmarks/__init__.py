@@ -0,0 +1 @@
+"""Synthetic data generators and benchmark harnesses for the toolkit's pipelines."""
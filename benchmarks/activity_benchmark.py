@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from activity_analysis import (TOTAL_USERS_BY_COUNTRY, activity_by_country, activity_summary_table, activity_totals,
+                               build_activity_cube, compact_activity_frame, country_summary_table, filter_active_users,
+                               load_activity_csv, monthly_active_users, top_users_by, totals_by_country, user_totals,
+                               weekly_summary)
+from activity_charts import render_chart
+from benchmarks.activity_data import write_activity_csv
+from profiling import Profiler, peak_rss
+
+ROW_COUNTS = [10_000, 100_000, 1_000_000, 10_000_000]
+REPORT_VERSION = 1
+
+
+def run_stages(csv_path, rows, profiler):
+    """Run the dashboard pipeline on an activity export, timing ingest, each aggregation and each chart."""
+    def stage(name, func, *args, **counts):
+        with profiler.stage(name, **counts) as timing:
+            result = func(*args)
+        if hasattr(result, 'shape'):
+            timing.counts['output_rows'] = int(result.shape[0])
+        return result
+
+    df = stage('ingest', load_activity_csv, csv_path, input_rows=rows)
+    df = stage('compact_activity_frame', compact_activity_frame, df, input_rows=rows)
+    cube = stage('build_activity_cube', build_activity_cube, df, input_rows=rows)
+    cube_rows = len(cube)
+    totals = stage('user_totals', user_totals, cube, input_rows=cube_rows)
+    weekly = stage('weekly_summary', weekly_summary, cube, input_rows=cube_rows)
+    weekly_by_country = stage('weekly_summary_by_country', weekly_summary, cube, 'country', input_rows=cube_rows)
+    active = stage('filter_active_users', filter_active_users, totals, 'total_logins', input_rows=len(totals))
+    # The synthetic team outgrows TOTAL_USERS_BY_COUNTRY, so head counts come from the export itself
+    head_counts = {country: int(count) for country, count in totals['country'].value_counts().items()}
+    mau = stage('monthly_active_users', monthly_active_users, active, head_counts, input_rows=len(active))
+    top_users = stage('top_users_by', top_users_by, active, 'total_logins', 20, input_rows=len(active))
+    country_totals = stage('totals_by_country', totals_by_country, active, 'total_logins', input_rows=len(active))
+    stage('country_summary_table', country_summary_table, totals, input_rows=len(totals))
+    activities = stage('activity_totals', activity_totals, cube, input_rows=cube_rows)
+    top_activities = activities.index[:10].tolist()
+    by_country = stage('activity_by_country', activity_by_country, cube, top_activities, input_rows=cube_rows)
+    stage('activity_summary_table', activity_summary_table, by_country, input_rows=len(by_country))
+
+    charts = [
+        ('weekly_trends', weekly_by_country, list(TOTAL_USERS_BY_COUNTRY)),
+        ('mau', mau),
+        ('top_users', top_users, 'total_logins', 'Blues', 'Total Login Count', 'Top Users Overall'),
+        ('country_totals', country_totals, 'Total Login Count (All Weeks)', 'Total Logins by Country'),
+        ('weekly_events', weekly[weekly['total_createEvents'] > 0]),
+        ('activity_distribution', activities),
+        ('activity_by_country_stacked', by_country),
+        ('activity_by_country_grouped', by_country[top_activities[:5]]),
+    ]
+    for chart_name, *args in charts:
+        stage(f'chart:{chart_name}', render_chart, chart_name, *args)
+
+
+def benchmark_csv(csv_path, rows):
+    """Benchmark one activity export and return its entry of the report."""
+    profiler = Profiler()
+    run_stages(csv_path, rows, profiler)
+    stages = profiler.to_dict()
+    for timing in stages:
+        input_rows = timing['counts'].get('input_rows')
+        if input_rows and timing['wall_seconds'] > 0:
+            timing['rows_per_second'] = round(input_rows / timing['wall_seconds'])
+    return {
+        'rows': rows,
+        'csv_bytes': os.path.getsize(csv_path),
+        'wall_seconds': sum(timing['wall_seconds'] for timing in stages),
+        'peak_rss': peak_rss(),
+        'stages': stages,
+    }
+
+
+def run_benchmark(row_counts=ROW_COUNTS, views=8, data_dir=None):
+    """Benchmark the dashboard pipeline at each row count and return the report as a dict.
+
+    Each row count runs in a fresh worker process, so its peak memory is not inflated by the
+    row counts before it. Synthetic exports are written to ``data_dir`` (a temporary directory
+    by default) and reused from there when they already exist.
+    """
+    report = {
+        'version': REPORT_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'views': views,
+        'runs': [],
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = data_dir or tmp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        for rows in row_counts:
+            csv_path = os.path.join(data_dir, f'activity_{rows}rows_{views}views.csv')
+            if not os.path.exists(csv_path):
+                write_activity_csv(csv_path, rows, views)
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                run = executor.submit(benchmark_csv, csv_path, rows).result()
+            report['runs'].append(run)
+            print(f"{rows:>10} rows: {run['wall_seconds']:8.2f}s, peak RSS {run['peak_rss'] / 2**20:8.1f} MiB")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the user activity dashboard pipeline on synthetic exports')
+    parser.add_argument('--rows', type=int, nargs='+', default=ROW_COUNTS,
+                        help='Row counts to benchmark (default: 10k, 100k, 1M and 10M)')
+    parser.add_argument('--views', type=int, default=8, help='Number of view*Counts columns (default: 8)')
+    parser.add_argument('--data-dir', type=str, default=None,
+                        help='Directory to keep the synthetic exports in between runs (default: a temporary one)')
+    parser.add_argument('--output', type=str, default='output/activity_benchmark.json',
+                        help='Path of the JSON report')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.rows, args.views, args.data_dir)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+from activity_analysis import DATE_FORMAT, TOTAL_USERS_BY_COUNTRY
+
+DIVISIONS = ["Endo", "IC", "PI", "CRM", "Neuro", "Uro"]
+# Pages behind the view<Page>Counts columns; more columns than pages get numbered pages
+VIEW_PAGES = ["Home", "Calendar", "Account", "Contact", "Opportunity", "Report", "Product", "Order", "Quote",
+              "Task", "Case", "Campaign"]
+FIRST_WEEK = date(2025, 1, 6)  # a Monday
+CHUNK_ROWS = 1_000_000
+
+
+def view_columns(count):
+    """Names of ``count`` view count columns, e.g. ["viewHomeCounts", "viewCalendarCounts", ...]."""
+    pages = VIEW_PAGES[:count] + [f"Page{i}" for i in range(len(VIEW_PAGES) + 1, count + 1)]
+    return [f"view{page}Counts" for page in pages]
+
+
+def write_activity_csv(path, rows, views=8, weeks=52, seed=0):
+    """Write a synthetic weekly activity export of ``rows`` rows and return its path.
+
+    Rows are user-weeks, week by week, as the export lists them: the team has enough users
+    to fill ``rows`` over ``weeks`` weeks, spread over the countries of TOTAL_USERS_BY_COUNTRY
+    in proportion to their head count. About a third of users never log in, and view and
+    create counts only occur in weeks with logins. The file is written a chunk at a time,
+    so memory stays flat however many rows are asked for.
+    """
+    rng = np.random.default_rng(seed)
+    users = max(1, -(-rows // weeks))
+    countries = list(TOTAL_USERS_BY_COUNTRY)
+    weights = np.array(list(TOTAL_USERS_BY_COUNTRY.values()), dtype=float)
+    user_country = rng.choice(len(countries), users, p=weights / weights.sum())
+    names = pa.array([f"User {i:07d}" for i in range(users)])
+    emails = pa.array([f"rep{i % max(users // 20, 1):05d}@example.com" for i in range(users)])
+    country = pa.array(countries).take(pa.array(user_country))
+    division = pa.array(DIVISIONS).take(pa.array(rng.integers(0, len(DIVISIONS), users)))
+    activity = np.where(rng.random(users) < 0.35, 0.0, rng.gamma(2.0, 2.0, users))
+    mondays = [FIRST_WEEK + timedelta(weeks=week) for week in range(weeks)]
+    from_dates = pa.array([monday.strftime(DATE_FORMAT) for monday in mondays])
+    to_dates = pa.array([(monday + timedelta(days=6)).strftime(DATE_FORMAT) for monday in mondays])
+    columns = view_columns(views)
+    view_rates = rng.uniform(0.2, 3.0, len(columns))
+
+    writer = None
+    try:
+        for start in range(0, rows, CHUNK_ROWS):
+            index = np.arange(start, min(start + CHUNK_ROWS, rows))
+            user = pa.array(index % users)
+            week = pa.array((index // users) % weeks)
+            logins = rng.poisson(activity[index % users])
+            logged_in = logins > 0
+            chunk = {
+                "country": country.take(user),
+                "division": division.take(user),
+                "fullName": names.take(user),
+                "salesRepEmail": emails.take(user),
+                "fromDate": from_dates.take(week),
+                "toDate": to_dates.take(week),
+                "logins": logins,
+                "createEvents": rng.poisson(0.3, len(index)) * logged_in,
+            }
+            for column, rate in zip(columns, view_rates):
+                chunk[column] = rng.poisson(rate, len(index)) * logged_in
+            table = pa.table(chunk)
+            if writer is None:
+                writer = pa_csv.CSVWriter(path, table.schema,
+                                          write_options=pa_csv.WriteOptions(quoting_style="none"))
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic weekly user activity CSV export')
+    parser.add_argument('output', help='Path of the CSV file to write')
+    parser.add_argument('--rows', type=int, default=100_000, help='Number of user-week rows (default: 100000)')
+    parser.add_argument('--views', type=int, default=8, help='Number of view*Counts columns (default: 8)')
+    parser.add_argument('--weeks', type=int, default=52, help='Number of weeks the rows span (default: 52)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    write_activity_csv(args.output, args.rows, args.views, args.weeks, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import calendar
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.vertec_workbook import write_vertec_workbook
+from timesheet_review import (extract_date_col_mappings, extract_user_row_mappings, load_timesheet,
+                              read_timesheet_entries_by_users, summarise_time_distribution)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "timesheet_baseline.json")
+# (team size, year, month): small to large teams over 31-, 30- and 28-day months
+SCALES = [(10, 2025, 3), (500, 2025, 4), (5000, 2025, 2), (5000, 2025, 3)]
+# A stage regresses when it takes longer than tolerance x its baseline plus the slack, in seconds
+DEFAULT_TOLERANCE = 2.0
+DEFAULT_SLACK = 0.05
+
+
+def scale_name(users, year, month):
+    """Key of a scale in the baseline, e.g. "5000users-2025-02"."""
+    return f"{users}users-{year}-{month:02d}"
+
+
+def month_end(year, month):
+    """A date just after the month, from which every workday of the month is selectable."""
+    return datetime(year, month, calendar.monthrange(year, month)[1]) + timedelta(days=1)
+
+
+def _best_of(repeat, func, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def time_stages(path, today=None, repeat=3):
+    """Time each stage of the timesheet pipeline on a workbook; returns {stage: best seconds of ``repeat`` runs}.
+
+    The workbook is only loaded once, as loading dominates on large teams.
+    """
+    timings = {}
+    timings["load_timesheet"], (df, raw) = _best_of(1, load_timesheet, path)
+    timings["extract_user_row_mappings"], (user_row_mappings, category_row_indices) = _best_of(
+        repeat, extract_user_row_mappings, df)
+    timings["extract_date_col_mappings"], date_col_mappings = _best_of(repeat, extract_date_col_mappings, df, today)
+    timings["read_timesheet_entries_by_users"], _ = _best_of(
+        repeat, read_timesheet_entries_by_users, df, user_row_mappings, date_col_mappings)
+    timings["summarise_time_distribution"], _ = _best_of(
+        repeat, summarise_time_distribution, raw, category_row_indices, date_col_mappings)
+    return timings
+
+
+def benchmark_scale(users, year, month, workdir, repeat=3):
+    """Generate the workbook of a scale in ``workdir`` and time its stages."""
+    path = os.path.join(workdir, f"{scale_name(users, year, month)}.xlsx")
+    if not os.path.exists(path):
+        write_vertec_workbook(path, users, year, month)
+    return time_stages(path, month_end(year, month), repeat)
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Return the stored baseline, or an empty one."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"tolerance": DEFAULT_TOLERANCE, "slack": DEFAULT_SLACK, "timings": {}}
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    """Write a baseline, rounding timings to the microsecond."""
+    baseline["timings"] = {scale: {stage: round(seconds, 6) for stage, seconds in stages.items()}
+                           for scale, stages in baseline["timings"].items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def find_regressions(scale, timings, baseline):
+    """Return a message for each stage of ``scale`` that is slower than its baseline allows."""
+    tolerance = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    slack = baseline.get("slack", DEFAULT_SLACK)
+    regressions = []
+    for stage, seconds in timings.items():
+        expected = baseline["timings"].get(scale, {}).get(stage)
+        if expected is not None and seconds > expected * tolerance + slack:
+            regressions.append(f"{scale} {stage}: {seconds:.3f}s, baseline {expected:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the timesheet pipeline stages on synthetic Vertec workbooks')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help=f'Store the timings as the new baseline in {os.path.basename(BASELINE_PATH)}')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage, of which the fastest counts')
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    regressions = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for users, year, month in SCALES:
+            scale = scale_name(users, year, month)
+            timings = benchmark_scale(users, year, month, workdir, args.repeat)
+            print(scale + "".join(f"\n  {stage:<32} {seconds:8.4f}s" for stage, seconds in timings.items()))
+            regressions += find_regressions(scale, timings, baseline)
+            baseline["timings"][scale] = timings
+
+    if args.update_baseline:
+        save_baseline(baseline)
+        print(f"Baseline written to {BASELINE_PATH}")
+    elif regressions:
+        raise SystemExit("Regressions against the baseline:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
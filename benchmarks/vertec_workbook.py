@@ -0,0 +1,102 @@
+import argparse
+import calendar
+import random
+from datetime import date
+
+from openpyxl import Workbook
+
+from timesheet_review import CATEGORY_COL, FIRST_DAY_COL, NAME_COL, SUBMITTED_COL, SUMMARY_CATEGORIES
+
+# Two-letter weekday labels of the day headers, Monday first
+WEEKDAYS = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
+# Category rows a user may book on besides the summary categories, which the pipeline skips
+OTHER_CATEGORIES = ["Travel time", "Internal projects"]
+FIRST_NAMES = ["Alice", "Bob", "Chen", "Dewi", "Emil", "Farah", "Gopal", "Hana", "Ivan", "Jia", "Kofi", "Lena"]
+LAST_NAMES = ["Tan", "Lim", "Nguyen", "Santos", "Muller", "Rahman", "Wong", "Reyes", "Ong", "Silva"]
+
+
+def day_headers(year, month):
+    """Day header labels of a month in the Vertec layout, e.g. ["1, We", "2, Th", ...]."""
+    days = calendar.monthrange(year, month)[1]
+    return [f"{day}, {WEEKDAYS[date(year, month, day).weekday()]}" for day in range(1, days + 1)]
+
+
+def user_name(index):
+    """A unique, realistic-looking display name for the ``index``-th user."""
+    name = f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]}"
+    block = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    return f"{name} {block + 1}" if block else name
+
+
+def write_vertec_workbook(path, users=10, year=2025, month=3, seed=0):
+    """Write a Sheet2 workbook in the Vertec layout with ``users`` team members for one month.
+
+    Day headers like "3, Mo" start in Col P on sheet row 4, followed by a "Total" column; the
+    "User" marker sits in Col A below them. Each user has a name row (submitted flag in Col C),
+    target and actual hours two and three rows below it, then category rows labelled in Col L.
+    Hours are randomised but reproducible for a given ``seed``: weekends are empty, some days
+    are under-booked, and some users book extra categories or leave text in a cell.
+    """
+    rng = random.Random(seed)
+    headers = day_headers(year, month)
+    workdays = [not header.endswith(("Sa", "Su")) for header in headers]
+    width = FIRST_DAY_COL + len(headers) + 1
+
+    def row(cells=None, days=None):
+        values = [None] * width
+        for col, value in (cells or {}).items():
+            values[col] = value
+        if days is not None:
+            values[FIRST_DAY_COL:FIRST_DAY_COL + len(headers)] = days
+            values[-1] = sum(value for value in days if isinstance(value, (int, float)))
+        return values
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet2")
+    ws.append(row({NAME_COL: "Vertec Timesheet"}))
+    ws.append(row({NAME_COL: f"{calendar.month_name[month]} {year}"}))
+    ws.append(row())
+    ws.append(row({FIRST_DAY_COL + day: header for day, header in enumerate(headers + ["Total"])}))
+    ws.append(row({NAME_COL: "User", SUBMITTED_COL: "Submitted"}))
+
+    for index in range(users):
+        target = [8 if workday else None for workday in workdays]
+        absences = [8 if workday and rng.random() < 0.05 else 0 for workday in workdays]
+        admin = [rng.choice([0, 0, 1, 2]) if workday and not absent else 0
+                 for workday, absent in zip(workdays, absences)]
+        operational = [max(0, 8 - absent - other - (rng.random() < 0.1) * rng.randint(1, 8)) if workday else 0
+                       for workday, absent, other in zip(workdays, absences, admin)]
+        actual = [sum(hours) if workday else None
+                  for workday, *hours in zip(workdays, absences, admin, operational)]
+        if rng.random() < 0.02:
+            actual[rng.randrange(len(actual))] = "n/a"
+
+        ws.append(row({NAME_COL: user_name(index), SUBMITTED_COL: int(rng.random() < 0.8)}))
+        ws.append(row())
+        ws.append(row(days=target))
+        ws.append(row(days=actual))
+        categories = dict(zip(SUMMARY_CATEGORIES, [absences, admin, operational]))
+        if rng.random() < 0.2:
+            categories[rng.choice(OTHER_CATEGORIES)] = [0] * len(headers)
+        for category, hours in categories.items():
+            ws.append(row({CATEGORY_COL: category}, hours))
+
+    wb.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic Vertec timesheet workbook')
+    parser.add_argument('output', help='Path of the .xlsx file to write')
+    parser.add_argument('--users', type=int, default=10, help='Number of team members (default: 10)')
+    parser.add_argument('--month', type=str, default='2025-03', help='Month of the day headers, as YYYY-MM')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the hours')
+    args = parser.parse_args()
+
+    year, month = (int(part) for part in args.month.split('-'))
+    write_vertec_workbook(args.output, args.users, year, month, args.seed)
+    print(f"Wrote {args.users} users for {args.month} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,244 @@
+import argparse
 import csv
+import hashlib
+import io
+import json
 import os
+import tarfile
+import tempfile
+import time
+import warnings
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
 
+# Output modes besides one .txt file per row, by archive file extension
+ARCHIVE_FORMATS = {'.zip': 'zip', '.tar': 'tar', '.tar.gz': 'tar', '.tgz': 'tar', '.jsonl': 'jsonl'}
 
-def csv_to_articles(input_file, output_directory):
-    os.makedirs(output_directory, exist_ok=True)
+# Articles handed to a writer thread at a time
+WRITE_BATCH_SIZE = 256
+
+# Per-directory record of the content hash of every article written there
+MANIFEST_NAME = '.articles-manifest.json'
+MANIFEST_VERSION = 1
+
+
+def format_article(headers, row):
+    """Render one CSV row as the text of its article."""
+    parts = []
+    for header, value in zip(headers, row):
+        # Write the header and its corresponding value to the output file
+        if len(value) <= 80:
+            parts.append(f"{header}: {value}\n")
+        else:
+            # Append newline after each period and write the
+            # formatted text to the file
+            formatted_value = value.replace(". ", ".\n")
+            parts.append(f"{header}:\n{formatted_value}\n\n")
+    return "".join(parts)
 
+
+def iter_articles(input_file):
+    """Yield ``(filename, text)`` for each row of the CSV file, in file order."""
     with open(input_file, 'r') as f:
         reader = csv.reader(f)
         headers = next(reader)  # get the column headers
 
         for row in reader:
-            # Use the 1st column's value (e.g., name) as filename and replace spaces with underscores
+            # Use the 3rd column's value (e.g., name) as filename and replace spaces with underscores
             filename = row[2].replace(" ", "_") + ".txt"
-            output_file = os.path.join(output_directory, filename)
+            yield filename, format_article(headers, row)
+
+
+def _write_articles(articles, output_directory):
+    for filename, text in articles:
+        with open(os.path.join(output_directory, filename), 'w') as out_f:
+            out_f.write(text)
+
+
+def _write_in_batches(articles, output_directory, max_workers=None):
+    """Write ``(filename, text)`` pairs in batches spread over a thread pool, in order per filename."""
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    submitted = set()
+    pending = set()
+    articles = iter(articles)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while batch := list(islice(articles, WRITE_BATCH_SIZE)):
+            names = {filename for filename, _ in batch}
+            if not names.isdisjoint(submitted):
+                # Let earlier writes of a repeated filename land first, so the last row wins
+                for future in pending:
+                    future.result()
+                pending, submitted = set(), set()
+            elif len(pending) >= 2 * max_workers:
+                # Bound the rendered articles held in memory
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            submitted |= names
+            pending.add(executor.submit(_write_articles, batch, output_directory))
+        for future in pending:
+            future.result()
+
+
+def load_manifest(output_directory):
+    """Return the {filename: content hash} manifest of the articles in ``output_directory``, or {}."""
+    try:
+        with open(os.path.join(output_directory, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get('articles', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+
+def save_manifest(output_directory, articles):
+    """Atomically replace the manifest of ``output_directory`` with ``articles``."""
+    fd, tmp_path = tempfile.mkstemp(dir=output_directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'articles': articles}, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, os.path.join(output_directory, MANIFEST_NAME))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+@dataclass
+class ConversionSummary:
+    """Article counts of a csv_to_articles run."""
+    written: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+
+def csv_to_articles(input_file, output_directory, max_workers=None, incremental=False, delete_removed=False):
+    """Write each CSV row as a .txt article in ``output_directory`` and return a ConversionSummary.
+
+    Articles are rendered in memory and written with a single call each, in batches spread over
+    a thread pool, so the open/close syscalls overlap with parsing the CSV. A row whose filename
+    repeats an earlier one still overwrites it, as the rows are in the file.
+
+    With ``incremental`` or ``delete_removed``, the content hash of each article is recorded in
+    a MANIFEST_NAME file next to them; a plain run only updates a manifest that is already
+    there, so it never goes stale. With ``incremental``, articles whose hash matches the
+    manifest (and whose file still exists) are not rewritten. With ``delete_removed``, articles
+    of the manifest whose row is gone from the CSV are deleted; otherwise they stay, and stay
+    in the manifest.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    tracked = incremental or delete_removed or os.path.exists(os.path.join(output_directory, MANIFEST_NAME))
+    previous = load_manifest(output_directory)
+    summary = ConversionSummary()
+    hashes = {}
+
+    if incremental:
+        # Only the changed articles are held until the end, where the last row of each filename wins
+        changed = {}
+        for filename, text in iter_articles(input_file):
+            hashes[filename] = digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            if previous.get(filename) == digest and os.path.exists(os.path.join(output_directory, filename)):
+                changed.pop(filename, None)
+            else:
+                changed[filename] = text
+        _write_in_batches(changed.items(), output_directory, max_workers)
+        summary.written = len(changed)
+        summary.unchanged = len(hashes) - len(changed)
+    else:
+        def record(articles):
+            for filename, text in articles:
+                hashes[filename] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                summary.written += 1
+                yield filename, text
+
+        _write_in_batches(record(iter_articles(input_file)), output_directory, max_workers)
+
+    for filename in previous.keys() - hashes.keys():
+        if delete_removed:
+            try:
+                os.remove(os.path.join(output_directory, filename))
+            except FileNotFoundError:
+                pass
+            summary.removed += 1
+        else:
+            hashes[filename] = previous[filename]
+    if tracked:
+        save_manifest(output_directory, hashes)
+    return summary
+
+
+def archive_format(output_path):
+    """Return the archive format for ``output_path`` from its extension, or None for a directory."""
+    for extension, fmt in ARCHIVE_FORMATS.items():
+        if str(output_path).lower().endswith(extension):
+            return fmt
+    return None
+
+
+def csv_to_archive(input_file, output_path, output_format=None):
+    """Stream all articles into a single zip or tar archive, or a JSONL file; returns the number of rows.
+
+    ``output_format`` ('zip', 'tar' or 'jsonl') defaults to the one of the file extension; a
+    '.tar.gz' or '.tgz' tar is gzip-compressed. JSONL lines hold ``{"filename": ..., "text": ...}``.
+    """
+    output_format = output_format or archive_format(output_path)
+    if output_format not in ('zip', 'tar', 'jsonl'):
+        raise ValueError(f"Unknown archive format for '{output_path}'")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    count = 0
+    mtime = int(time.time())  # a fractional mtime would cost every tar member an extra pax header
+    if output_format == 'zip':
+        with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive, \
+                warnings.catch_warnings():
+            # A repeated filename is kept as another member; extracting it overwrites the earlier one
+            warnings.filterwarnings('ignore', 'Duplicate name', UserWarning)
+            for filename, text in iter_articles(input_file):
+                archive.writestr(filename, text)
+                count += 1
+    elif output_format == 'tar':
+        mode = 'w:gz' if str(output_path).lower().endswith(('.gz', '.tgz')) else 'w'
+        with tarfile.open(output_path, mode) as archive:
+            for filename, text in iter_articles(input_file):
+                data = text.encode('utf-8')
+                info = tarfile.TarInfo(filename)
+                info.size, info.mtime = len(data), mtime
+                archive.addfile(info, io.BytesIO(data))
+                count += 1
+    else:
+        with open(output_path, 'w', encoding='utf-8') as out_f:
+            for filename, text in iter_articles(input_file):
+                out_f.write(json.dumps({'filename': filename, 'text': text}, ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert each row of a CSV file into a text article')
+    parser.add_argument('input_file', nargs='?', default='input/mirko-feedback-2024.csv', help='Path to the input CSV file')
+    parser.add_argument('output', nargs='?', default='output/mirko-feedback-2024/',
+                        help='Output directory, or an archive file (.zip, .tar, .tar.gz or .jsonl) to write all articles to')
+    parser.add_argument('--format', dest='output_format', choices=['files', 'zip', 'tar', 'jsonl'], default=None,
+                        help='Output mode (default: from the output extension, otherwise one .txt file per row)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of writer threads in files mode (default: number of CPUs + 4, at most 32)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Files mode: only rewrite articles whose content changed since the last run')
+    parser.add_argument('--delete-removed', action='store_true',
+                        help='Files mode: delete articles written by earlier runs whose row is no longer in the CSV')
+    args = parser.parse_args()
 
-            with open(output_file, 'w') as out_f:
-                for header, value in zip(headers, row):
-                    # Write the header and its corresponding value to the output file
-                    if len(value) <= 80:
-                        out_f.write(f"{header}: {value}\n")
-                    else:
-                        # Append newline after each period and write the
-                        # formatted text to the file
-                        formatted_value = value.replace(". ", ".\n")
-                        out_f.write(f"{header}:\n{formatted_value}\n\n")
+    output_format = args.output_format or archive_format(args.output) or 'files'
+    if output_format != 'files' and (args.incremental or args.delete_removed):
+        parser.error(f"--incremental and --delete-removed only apply to files mode, not to {output_format} output")
+    if output_format == 'files':
+        summary = csv_to_articles(args.input_file, args.output, args.workers, args.incremental, args.delete_removed)
+        print(f"Wrote {summary.written} articles to {args.output} "
+              f"({summary.unchanged} unchanged, {summary.removed} removed)")
+    else:
+        count = csv_to_archive(args.input_file, args.output, output_format)
+        print(f"Wrote {count} articles to {args.output}")
 
 
 if __name__ == "__main__":
-    csv_to_articles('input/mirko-feedback-2024.csv', 'output/mirko-feedback-2024/')
+    main()
@@ -0,0 +1,104 @@
+import functools
+import os
+import threading
+from collections import Counter
+
+import pandas as pd
+import streamlit as st
+
+from profiling import Profiler, current_rss, peak_rss, profiled
+
+# Set to 1 to show the diagnostics panel by default
+DIAGNOSTICS_ENV = "PL_TOOLKIT_DIAGNOSTICS"
+
+# The Diagnostics of the script run on this thread; Streamlit runs each session's script on its own thread
+_current = threading.local()
+
+
+class Diagnostics:
+    """Section timings and cache hits/misses of one run of a dashboard script.
+
+    When disabled, sections are not measured and nothing is recorded, so instrumented pages
+    cost the same as uninstrumented ones.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.profiler = Profiler() if enabled else None
+        self.cache_calls = Counter()
+        self.cache_misses = Counter()
+
+    def section(self, name, **counts):
+        """Time the block as section ``name`` (see profiling.Profiler.stage)."""
+        return profiled(self.profiler, name, **counts)
+
+    def cached(self, name, func, *args, **kwargs):
+        """Call the st.cache_data function ``func`` as section ``name``, counting the call for its cache.
+
+        ``func`` must be decorated with counts_cache_misses, so calls that miss its cache are told apart.
+        """
+        if self.enabled:
+            self.cache_calls[func.__name__] += 1
+        with self.section(name):
+            return func(*args, **kwargs)
+
+    def sections_frame(self):
+        """The recorded sections, slowest first, as shown in the panel."""
+        stages = self.profiler.stages if self.profiler else []
+        frame = pd.DataFrame({
+            'Section': [stage.name for stage in stages],
+            'Wall ms': [stage.wall_seconds * 1000 for stage in stages],
+            'CPU ms': [stage.cpu_seconds * 1000 for stage in stages],
+            'Peak MiB': [stage.peak_rss / 2**20 for stage in stages],
+            '+MiB': [stage.peak_rss_delta / 2**20 for stage in stages],
+        })
+        return frame.sort_values('Wall ms', ascending=False, kind='stable').round(1)
+
+    def cache_frame(self):
+        """Calls, hits and misses of each cached function called through ``cached``."""
+        names = list(self.cache_calls)
+        misses = [self.cache_misses[name] for name in names]
+        return pd.DataFrame({
+            'Cache': names,
+            'Calls': [self.cache_calls[name] for name in names],
+            'Hits': [self.cache_calls[name] - miss for name, miss in zip(names, misses)],
+            'Misses': misses,
+        })
+
+    def render(self):
+        """Show the panel in the sidebar, if enabled. Call once, at the end of the script."""
+        if not self.enabled:
+            return
+        sections = self.sections_frame()
+        with st.sidebar:
+            st.subheader("Diagnostics")
+            st.caption(f"{len(sections)} sections, {sections['Wall ms'].sum():.0f} ms in total")
+            st.dataframe(sections, hide_index=True, use_container_width=True)
+            if self.cache_calls:
+                st.dataframe(self.cache_frame(), hide_index=True, use_container_width=True)
+            col1, col2 = st.columns(2)
+            col1.metric("Memory (RSS)", f"{current_rss() / 2**20:.0f} MiB")
+            col2.metric("Peak RSS", f"{peak_rss() / 2**20:.0f} MiB")
+
+
+def start_diagnostics():
+    """Add the opt-in diagnostics toggle to the sidebar and return this run's Diagnostics."""
+    default = os.environ.get(DIAGNOSTICS_ENV, '') not in ('', '0')
+    enabled = st.sidebar.toggle("Show diagnostics", value=default, key="show_diagnostics",
+                                help="Time each section of this page and show cache hits and memory use")
+    _current.diagnostics = Diagnostics(enabled)
+    return _current.diagnostics
+
+
+def counts_cache_misses(func):
+    """Count the calls that reach ``func``, which under st.cache_data are its cache misses.
+
+    Apply it below ``@st.cache_data``; misses are recorded in the Diagnostics of the current run.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        diagnostics = getattr(_current, 'diagnostics', None)
+        if diagnostics is not None and diagnostics.enabled:
+            diagnostics.cache_misses[func.__name__] += 1
+        return func(*args, **kwargs)
+    return wrapper
@@ -1,8 +1,12 @@
+from datetime import date
+
 import matplotlib.pyplot as plt
 import pandas as pd
 import streamlit as st
 
-from timesheet_review import extract_user_row_mappings, extract_date_col_mappings, read_timesheet_entries_by_users
+from dashboard_diagnostics import counts_cache_misses, start_diagnostics
+from parse_cache import content_hash
+from timesheet_review import load_parsed_timesheet
 
 
 # Define color conditions
@@ -14,21 +18,40 @@ def color_negative_red_positive_yellow(val):
     return ''
 
 
+@st.cache_data(ttl=3600, max_entries=32, show_spinner="Analysing timesheet...")
+@counts_cache_misses
+def analyse_timesheet(file_hash, today, _uploaded_file):
+    """Parse an uploaded workbook into its timesheet entries and their cell styles.
+
+    Memoized on the workbook's content hash and on today's date (which decides the valid
+    workdays); the file object itself is left out of the cache key.
+    """
+    # Served from the shared on-disk parse cache when this workbook was analysed before
+    parsed = load_parsed_timesheet(_uploaded_file)
+    df_timesheet = parsed.timesheet_matrix(parsed.date_col_mappings()).to_frame()
+    # Evaluate the colour rule once here so reruns only re-render
+    cell_styles = df_timesheet.map(color_negative_red_positive_yellow)
+    return df_timesheet, cell_styles
+
+
 # Streamlit Code
 st.set_page_config(page_title="PL Toolkit", layout="wide", initial_sidebar_state="collapsed")
 
 st.title("Vertec Timesheet Analyzer")
+diagnostics = start_diagnostics()
 
 uploaded_file = st.file_uploader("Upload Vertec Timesheet")
 if uploaded_file is not None:
-    df = pd.read_excel(uploaded_file, sheet_name="Sheet2", skiprows=0)
-
-    user_row_mappings, category_row_indices = extract_user_row_mappings(df)
-    date_col_mappings = extract_date_col_mappings(df)
-    df_timesheet = read_timesheet_entries_by_users(df, user_row_mappings, date_col_mappings)
+    with diagnostics.section("ingest: content_hash"):
+        file_hash = content_hash(uploaded_file)
+    df_timesheet, cell_styles = diagnostics.cached("ingest: analyse_timesheet", analyse_timesheet,
+                                                   file_hash, date.today(), uploaded_file)
 
     # Apply styling to the DataFrame
-    styled_timesheet = df_timesheet.style.map(color_negative_red_positive_yellow)
+    styled_timesheet = df_timesheet.style.apply(lambda _: cell_styles, axis=None)
 
     # Display the styled DataFrame
-    st.dataframe(styled_timesheet)
+    with diagnostics.section("dataframe: timesheet entries", rows=len(df_timesheet)):
+        st.dataframe(styled_timesheet)
+
+diagnostics.render()
@@ -1,67 +1,95 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+import io
+
 import streamlit as st
+from matplotlib.figure import Figure
+
+from dashboard_diagnostics import Diagnostics, counts_cache_misses, start_diagnostics
+from timesheet_review import read_frame
 
 
-def plot_pie_chart_multi_col(summary_df, charts_per_row=3):
+@st.cache_data(max_entries=64, show_spinner=False)
+@counts_cache_misses
+def render_pie_chart_row(row_df, charts_per_row):
     """
-    Display each user's time distribution in a multi-column layout.
-    Only includes users who have at least one positive value.
+    Render one row of users' time distributions onto a single figure and return it as PNG bytes.
+    The figure is built without pyplot, so it never enters pyplot's global figure registry
+    and is released as soon as it has been rasterized. Cached on the row's summary data.
     """
-    filtered_users = [
-        user for user in summary_df.index
-        if (summary_df.loc[user] > 0).any()
-    ]
+    fig = Figure(figsize=(4 * charts_per_row, 5))
+    axes = fig.subplots(1, charts_per_row, squeeze=False)[0]
 
-    # Now display only the filtered users in multi-column format
-    for i in range(0, len(filtered_users), charts_per_row):
-        row_users = filtered_users[i: i + charts_per_row]
-        cols = st.columns(len(row_users))
+    for ax, (user, user_data) in zip(axes, row_df.iterrows()):
+        user_data = user_data[user_data > 0]
+
+        # Draw a pie with no slice labels, only percentages
+        wedges, _, autotexts = ax.pie(
+            user_data,
+            labels=None,  # Omit labels on slices
+            autopct="%1.1f%%",  # Show only percentages
+            startangle=90
+        )
+
+        # Add a legend on the side for actual slice labels
+        ax.legend(
+            wedges,
+            user_data.index,
+            title="Categories",
+            loc="upper center",
+            bbox_to_anchor=(0.5, -0.05),  # Shift legend below the chart
+            ncol=1  # Number of columns for legend items
+        )
 
-        for idx, user in enumerate(row_users):
-            with cols[idx]:
-                user_data = summary_df.loc[user]
-                user_data = user_data[user_data > 0]
+        # Force aspect ratio to be equal so it's always a circle
+        ax.set_aspect("equal")
 
-                # Create the figure
-                fig, ax = plt.subplots(figsize=(4, 4))
+        ax.set_title(f"{user}'s Time Distribution", pad=20)
 
-                # Draw a pie with no slice labels, only percentages
-                wedges, _, autotexts = ax.pie(
-                    user_data,
-                    labels=None,  # Omit labels on slices
-                    autopct="%1.1f%%",  # Show only percentages
-                    startangle=90
-                )
+    # Keep the chart size the same on a short last row
+    for ax in axes[len(row_df):]:
+        ax.axis("off")
 
-                # Add a legend on the side for actual slice labels
-                ax.legend(
-                    wedges,
-                    user_data.index,
-                    title="Categories",
-                    loc="upper center",
-                    bbox_to_anchor=(0.5, -0.05),  # Shift legend below the chart
-                    ncol=1  # Number of columns for legend items
-                )
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
 
-                # Force aspect ratio to be equal so it's always a circle
-                ax.set_aspect("equal")
 
-                ax.set_title(f"{user}'s Time Distribution", pad=20)
-                st.pyplot(fig)
+def plot_pie_chart_multi_col(summary_df, charts_per_row=3, diagnostics=None):
+    """
+    Display each user's time distribution in a multi-column layout.
+    Only includes users who have at least one positive value.
+    """
+    diagnostics = diagnostics or Diagnostics()
+    with diagnostics.section("filter: users with hours", rows=len(summary_df)):
+        filtered_users = [
+            user for user in summary_df.index
+            if (summary_df.loc[user] > 0).any()
+        ]
+
+    # Now display only the filtered users, one shared figure per row
+    for i in range(0, len(filtered_users), charts_per_row):
+        row_users = filtered_users[i: i + charts_per_row]
+        image = diagnostics.cached(f"chart: pie row {i // charts_per_row + 1}", render_pie_chart_row,
+                                   summary_df.loc[row_users], charts_per_row)
+        st.image(image, use_container_width=True)
 
 
 # UI Code
 st.title("Time Distribution Dashboard")
-st.write("Execute the python program below to generate the time distribution CSV file")
-st.markdown("""
+diagnostics = start_diagnostics()
+st.write("Execute the python program below to generate the time distribution file")
+st.markdown(r"""
     ```shell
-    python timesheet_review.py ./input/202502_ZE\ TimeSheet_OpHours.xlsx
+    python timesheet_review.py ./input/202502_ZE\ TimeSheet_OpHours.xlsx --format parquet
     ```""")
-st.write("Then upload the generated CSV file: `timesheet_entries.csv` below to view the time distribution")
+st.write("Then upload the generated file: `time_distribution.csv`, `.parquet` or `.arrow` below to view the "
+         "time distribution")
 
-distribution_csv = st.file_uploader("Upload Time Distribution CSV")
-if distribution_csv is not None:
+distribution_file = st.file_uploader("Upload Time Distribution File", type=["csv", "parquet", "arrow", "feather"])
+if distribution_file is not None:
     # Summarize the time distribution
-    df_summary = pd.read_csv(distribution_csv, index_col=0)
-    plot_pie_chart_multi_col(df_summary)
+    with diagnostics.section("ingest: read_frame") as section:
+        df_summary = read_frame(distribution_file)
+        section.counts["rows"] = len(df_summary)
+    plot_pie_chart_multi_col(df_summary, diagnostics=diagnostics)
+
+diagnostics.render()
@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import datetime
+
+from activity_analysis import (REQUIRED_COLUMNS, TOTAL_USERS_BY_COUNTRY, activity_by_country, activity_summary_table,
+                               activity_totals, build_activity_cube, compact_activity_frame, country_summary_table,
+                               filter_active_users, load_activity_csv, monthly_active_users, top_users_by,
+                               totals_by_country, user_totals, weekly_summary)
+from activity_charts import render_chart
+from dashboard_diagnostics import counts_cache_misses, start_diagnostics
 
 # =============================================================================
 # PAGE CONFIGURATION
@@ -10,29 +14,24 @@ from datetime import datetime
 st.set_page_config(page_title="User Activity Dashboard", layout="wide")
 
 # =============================================================================
-# STYLING CONSTANTS
+# CHART RENDERING
 # =============================================================================
-# Color palettes for consistent styling
-COLOR_PRIMARY = '#1f77b4'      # Blue
-COLOR_SECONDARY = '#ff7f0e'    # Orange
-COLOR_SUCCESS = '#2ca02c'      # Green
-COLOR_DANGER = '#d62728'       # Red
-COLOR_INFO = '#9467bd'         # Purple
-COLOR_BACKGROUND = '#f8f9fa'   # Light gray for chart backgrounds
-
-# Chart color schemes
-COLORS_QUALITATIVE = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', 
-                      '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
-COLORS_SEQUENTIAL_BLUE = plt.cm.Blues
-COLORS_SEQUENTIAL_ORANGE = plt.cm.Oranges
-COLORS_SEQUENTIAL_GREEN = plt.cm.Greens
-COLORS_DIVERGING = plt.cm.RdYlGn
+@st.cache_data(max_entries=64, show_spinner=False)
+@counts_cache_misses
+def render_chart_image(chart_name, *args):
+    """Render a chart of activity_charts to PNG bytes, cached on its name and input aggregate.
+
+    Figures are closed as soon as they are rasterized, and at most 64 images are kept
+    (least recently used first out), so memory stays flat however often the page reruns.
+    """
+    return render_chart(chart_name, *args)
 
 # =============================================================================
 # HEADER
 # =============================================================================
 st.title("User Activity Dashboard")
 st.markdown("### Weekly User Activity Analysis")
+diagnostics = start_diagnostics()
 
 # =============================================================================
 # FILE UPLOAD SECTION
@@ -53,21 +52,28 @@ if uploaded_file is not None:
         # ---------------------------------------------------------------------
         # Data Loading and Validation
         # ---------------------------------------------------------------------
-        df = pd.read_csv(uploaded_file)
+        # Typed, column-pruned read of the export, streamed in chunks behind a progress bar
+        progress_bar = st.progress(0.0, text="Loading activity data...")
+        with diagnostics.section("ingest: load_activity_csv") as section:
+            df = load_activity_csv(uploaded_file, progress=lambda fraction: progress_bar.progress(
+                fraction, text="Loading activity data..."))
+            section.counts["rows"] = len(df)
+        progress_bar.empty()
         
         # Validate required columns
-        required_columns = ['country', 'division', 'fullName', 'fromDate', 'toDate', 'logins']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
         
         if missing_columns:
             st.error(f"Missing required columns: {', '.join(missing_columns)}")
             st.info("Required columns: country, division, fullName, fromDate, toDate, logins")
             st.stop()
         
-        # Data preprocessing
-        df['fromDate'] = pd.to_datetime(df['fromDate'], format='%Y%m%d')
-        df['toDate'] = pd.to_datetime(df['toDate'], format='%Y%m%d')
-        df['week_period'] = df['fromDate'].dt.strftime('%Y-%m-%d') + ' to ' + df['toDate'].dt.strftime('%Y-%m-%d')
+        # Categorical dimensions, a categorical week_period and downcast counts, so several large
+        # uploads fit in one server process; the groupbys below run on the category codes
+        loaded_bytes = df.memory_usage(deep=True).sum()
+        with diagnostics.section("ingest: compact_activity_frame", rows=len(df)):
+            df = compact_activity_frame(df)
+        compact_bytes = df.memory_usage(deep=True).sum()
         
         # ---------------------------------------------------------------------
         # Data Preview
@@ -75,39 +81,31 @@ if uploaded_file is not None:
         st.markdown("---")
         st.header("📋 Data Preview")
         st.write(f"Loaded {len(df)} weekly records")
+        st.caption(f"In memory: {compact_bytes / 2**20:.1f} MiB, "
+                   f"{1 - compact_bytes / max(loaded_bytes, 1):.0%} less than as loaded ({loaded_bytes / 2**20:.1f} MiB)")
         preview_cols = ['fullName', 'country', 'division', 'week_period', 'logins']
         if 'salesRepEmail' in df.columns:
             preview_cols.insert(-1, 'salesRepEmail')
-        st.dataframe(df[preview_cols].head(10), use_container_width=True)
+        with diagnostics.section("dataframe: preview"):
+            st.dataframe(df[preview_cols].head(10), use_container_width=True)
         
         # ---------------------------------------------------------------------
         # Data Aggregation
         # ---------------------------------------------------------------------
+        # Aggregate all activity columns once at the (country, division, user, week) grain;
+        # every chart, table and insight below is derived from this cube
+        with diagnostics.section("groupby: build_activity_cube", rows=len(df)):
+            cube = build_activity_cube(df)
+
         # Aggregate user data across all weeks
-        agg_dict = {
-            'logins': 'sum',
-            'week_period': 'count',
-            'createEvents': 'sum'
-        }
-        
-        user_totals = df.groupby(['fullName', 'country', 'division']).agg(agg_dict).reset_index()
-        user_totals.columns = ['fullName', 'country', 'division', 'total_logins', 'weeks_active', 'total_createEvents']
+        with diagnostics.section("groupby: user_totals", rows=len(cube)):
+            user_totals_df = user_totals(cube)
         
         # Filter out users with zero logins
-        active_users = user_totals[user_totals['total_logins'] > 0].copy()
-        active_users = active_users.sort_values(['country', 'total_logins'], ascending=[True, False])
+        active_users = filter_active_users(user_totals_df, 'total_logins')
 
         # Filter users with createEvents
-        active_users_events = user_totals[user_totals['total_createEvents'] > 0].copy()
-        active_users_events = active_users_events.sort_values(['country', 'total_createEvents'], ascending=[True, False])
-        
-        # Total user counts per country (hardcoded as specified)
-        total_users_by_country = {
-            'Singapore': 32,
-            'Malaysia': 34,
-            'Vietnam': 22,
-            'Philippines': 18
-        }
+        active_users_events = filter_active_users(user_totals_df, 'total_createEvents')
 
         # =============================================================================
         # OVERVIEW SECTION
@@ -115,73 +113,35 @@ if uploaded_file is not None:
         st.markdown("---")
         st.header("📊 Overview")
 
-        date_range = f"{df['fromDate'].min().strftime('%Y-%m-%d')} to {df['toDate'].max().strftime('%Y-%m-%d')}"
+        date_range = f"{cube['fromDate'].min().strftime('%Y-%m-%d')} to {cube['toDate'].max().strftime('%Y-%m-%d')}"
         st.metric("Date Range", date_range)
 
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Users", len(user_totals))
+            st.metric("Total Users", len(user_totals_df))
         with col2:
             st.metric("Active Users", len(active_users))
         with col3:
-            st.metric("Countries", df['country'].nunique())
+            st.metric("Countries", cube['country'].nunique())
 
         st.subheader("📈 Weekly Activity Trends")
-        weekly_agg_dict = {
-            'logins': 'sum',
-            'fullName': 'nunique',
-            'createEvents': 'sum'
-        }
-        
-        weekly_summary = df.groupby(['fromDate', 'week_period']).agg(weekly_agg_dict).reset_index()
-        weekly_summary.columns = ['fromDate', 'week_period', 'total_logins', 'active_users', 'total_createEvents']
+        with diagnostics.section("groupby: weekly_summary", rows=len(cube)):
+            weekly_summary_df = weekly_summary(cube)
         
         # Aggregate by country and week for split charts
-        weekly_by_country = df.groupby(['country', 'fromDate', 'week_period']).agg(weekly_agg_dict).reset_index()
-        weekly_by_country.columns = ['country', 'fromDate', 'week_period', 'total_logins', 'active_users', 'total_createEvents']
-        
-        countries_for_chart = total_users_by_country.keys()
-        
-        # Create weekly trend chart with consistent styling - split by country
-        fig_weekly, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
-        
-        # Total logins per week - by country
-        for i, country in enumerate(countries_for_chart):
-            country_data = weekly_by_country[weekly_by_country['country'] == country]
-            color = COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)]
-            ax1.plot(country_data['fromDate'], country_data['total_logins'], 
-                    marker='o', linewidth=2.5, markersize=6, color=color, label=country)
-        
-        ax1.set_title('Total Logins per Week by Country', fontsize=12, fontweight='bold')
-        ax1.set_ylabel('Total Logins', fontsize=10)
-        ax1.grid(True, alpha=0.3, linestyle='--')
-        ax1.tick_params(axis='x', rotation=45)
-        ax1.set_facecolor(COLOR_BACKGROUND)
-        ax1.legend(loc='best', fontsize=9)
+        with diagnostics.section("groupby: weekly_summary by country", rows=len(cube)):
+            weekly_by_country = weekly_summary(cube, by='country')
         
-        # Active users per week - by country
-        for i, country in enumerate(countries_for_chart):
-            country_data = weekly_by_country[weekly_by_country['country'] == country]
-            color = COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)]
-            ax2.plot(country_data['fromDate'], country_data['active_users'], 
-                    marker='s', linewidth=2.5, markersize=6, color=color, label=country)
-        
-        ax2.set_title('Active Users per Week by Country', fontsize=12, fontweight='bold')
-        ax2.set_ylabel('Number of Active Users', fontsize=10)
-        ax2.set_xlabel('Week', fontsize=10)
-        ax2.grid(True, alpha=0.3, linestyle='--')
-        ax2.tick_params(axis='x', rotation=45)
-        ax2.set_facecolor(COLOR_BACKGROUND)
-        ax2.legend(loc='best', fontsize=9)
-        
-        plt.tight_layout()
-        st.pyplot(fig_weekly)
+        # Weekly trend charts split by country
+        st.image(diagnostics.cached('chart: weekly_trends', render_chart_image, 'weekly_trends', weekly_by_country,
+                                    list(TOTAL_USERS_BY_COUNTRY)),
+                 use_container_width=True)
 
         # Weekly summary table
         st.subheader("📅 Weekly Summary")
         display_columns = ['week_period', 'total_logins', 'active_users', 'total_createEvents']
         
-        weekly_display = weekly_summary[display_columns].copy()
+        weekly_display = weekly_summary_df[display_columns].copy()
         # Rename columns for better display
         column_rename = {
             'week_period': 'Week Period',
@@ -190,73 +150,35 @@ if uploaded_file is not None:
             'total_createEvents': 'Total Events Created'
         }
         weekly_display.columns = [column_rename.get(col, col) for col in weekly_display.columns]
-        st.dataframe(weekly_display, use_container_width=True, hide_index=True)
+        with diagnostics.section("dataframe: weekly summary"):
+            st.dataframe(weekly_display, use_container_width=True, hide_index=True)
 
         # Monthly Active Users section
         st.subheader("📊 Monthly Active Users")
         
         # Calculate MAU (users with total_logins > 0) per country
-        mau_by_country = active_users['country'].value_counts().to_dict()
+        with diagnostics.section("groupby: monthly_active_users", rows=len(active_users)):
+            mau = monthly_active_users(active_users)
         
-        # Create pie charts for each country
-        countries_in_data = [country for country in total_users_by_country.keys() if country in mau_by_country]
-        
-        if countries_in_data:
-            # Create a single figure with subplots for consistent sizing
-            fig_mau, axes = plt.subplots(1, len(countries_in_data), figsize=(15, 5))
-            if len(countries_in_data) == 1:
-                axes = [axes]  # Make it iterable for single country
-            
-            for i, country in enumerate(countries_in_data):
-                total_users = total_users_by_country[country]
-                active_users_count = mau_by_country.get(country, 0)
-                inactive_users_count = total_users - active_users_count
-                
-                # Create pie chart data with consistent colors
-                sizes = [active_users_count, inactive_users_count]
-                labels = ['Active Users', 'Inactive Users']
-                colors = [COLOR_SUCCESS, COLOR_DANGER]  # Green for active, red for inactive
-                
-                # Create pie chart
-                wedges, texts, autotexts = axes[i].pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', 
-                                                     startangle=90, textprops={'fontsize': 10})
-                axes[i].set_title(f'{country}\nMAU: {active_users_count}/{total_users}', fontsize=12, fontweight='bold')
-                axes[i].axis('equal')  # Ensure circular pie chart
-                
-                # Make percentage text bold
-                for autotext in autotexts:
-                    autotext.set_fontweight('bold')
-                    autotext.set_color('white')
-            
-            plt.tight_layout()
-            st.pyplot(fig_mau)
+        if not mau.empty:
+            # Create pie charts for each country
+            st.image(diagnostics.cached('chart: mau', render_chart_image, 'mau', mau), use_container_width=True)
             
             # Display MAU rate metrics below the charts
-            cols = st.columns(len(countries_in_data))
-            for i, country in enumerate(countries_in_data):
-                total_users = total_users_by_country[country]
-                active_users_count = mau_by_country.get(country, 0)
+            cols = st.columns(len(mau))
+            for i, (country, mau_rate) in enumerate(mau['mau_rate'].items()):
                 with cols[i]:
-                    st.metric(f"{country} MAU Rate", f"{(active_users_count/total_users*100):.1f}%")
+                    st.metric(f"{country} MAU Rate", f"{mau_rate * 100:.1f}%")
         else:
             st.info("No data available for the specified countries (Singapore, Malaysia, Vietnam, Philippines)")
 
         # Summary table by country
         st.subheader("📋 Summary by Country")
         
-        # Build aggregation dictionary
-        country_agg_dict = {
-            'total_logins': ['count', 'sum', 'mean', 'max'],
-            'weeks_active': 'mean',
-            'total_createEvents': ['sum', 'mean', 'max']
-        }
-        
-        country_summary = user_totals.groupby('country').agg(country_agg_dict).round(2)
-        
-        # Build column names
-        column_names = ['Total Number of Users', 'Total Logins', 'Avg Logins per User', 'Max Weekly Logins', 'Avg Weekly Active', 'Total Events Created', 'Avg Events per User', 'Max Weekly Events']
-        country_summary.columns = column_names
-        st.dataframe(country_summary, use_container_width=True)
+        with diagnostics.section("groupby: country_summary_table", rows=len(user_totals_df)):
+            country_summary = country_summary_table(user_totals_df)
+        with diagnostics.section("dataframe: summary by country"):
+            st.dataframe(country_summary, use_container_width=True)
 
         # =============================================================================
         # LOGIN ANALYSIS SECTION
@@ -268,12 +190,9 @@ if uploaded_file is not None:
         st.subheader("🎯 Filter Options")
         top_n = st.slider("Select top N users per country", min_value=3, max_value=10, value=5)
 
-        # Get top N users per country (by total logins)
-        top_users_by_country = active_users.groupby('country').head(top_n).reset_index(drop=True)
-
         # Display country-wise breakdown with tabs
         st.subheader("🌍 Country Breakdown - Top Users")
-        countries = sorted(df['country'].unique())
+        countries = sorted(cube['country'].unique())
         tabs = st.tabs(countries)
 
         for i, country in enumerate(countries):
@@ -290,63 +209,31 @@ if uploaded_file is not None:
 
         # Matplotlib bar chart for top users by logins
         st.subheader("📊 Top Users by Logins")
-        fig_top_users, ax = plt.subplots(figsize=(12, 6))
-
-        top_users_overall = active_users.sort_values('total_logins', ascending=False).head(top_n * 4)
-        user_labels = [f"{name}\n({country})" for name, country in 
-                       zip(top_users_overall['fullName'], top_users_overall['country'])]
-
-        # Use consistent color scheme
-        bars2 = ax.bar(range(len(top_users_overall)), top_users_overall['total_logins'], 
-                        color=COLORS_SEQUENTIAL_BLUE(np.linspace(0.4, 0.9, len(top_users_overall))),
-                        edgecolor='white', linewidth=0.5)
-        ax.set_xlabel('Users', fontsize=10)
-        ax.set_ylabel('Total Login Count', fontsize=10)
-        ax.set_title(f'Top {len(top_users_overall)} Users Overall', fontsize=12, fontweight='bold')
-        ax.set_xticks(range(len(top_users_overall)))
-        ax.set_xticklabels(user_labels, rotation=45, ha='right', fontsize=8)
-        ax.grid(axis='y', alpha=0.3, linestyle='--')
-        ax.set_facecolor(COLOR_BACKGROUND)
-
-        # Add value labels on bars
-        for i, value in enumerate(top_users_overall['total_logins']):
-            ax.text(i, value + 0.1, str(value), ha='center', va='bottom', fontweight='bold')
-
-        plt.tight_layout()
-        st.pyplot(fig_top_users)
+        top_users_overall = top_users_by(active_users, 'total_logins', top_n * 4)
+        st.image(diagnostics.cached('chart: top_users by logins', render_chart_image, 'top_users', top_users_overall,
+                                    'total_logins', 'Blues', 'Total Login Count',
+                                    f'Top {len(top_users_overall)} Users Overall'),
+                 use_container_width=True)
 
         # Create matplotlib bar chart for top countries by logins
         st.subheader("🌍 Top Countries by Total Logins")
-        fig_top_countries, ax = plt.subplots(figsize=(15, 6))
-
-        country_totals = active_users.groupby('country')['total_logins'].sum().sort_values(ascending=True)
-        colors = [COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)] for i in range(len(country_totals))]
-
-        bars1 = ax.barh(country_totals.index, country_totals.values, color=colors, 
-                       edgecolor='white', linewidth=1)
-        ax.set_xlabel('Total Login Count (All Weeks)', fontsize=10)
-        ax.set_title('Total Logins by Country', fontsize=12, fontweight='bold')
-        ax.grid(axis='x', alpha=0.3, linestyle='--')
-        ax.set_facecolor(COLOR_BACKGROUND)
-
-        # Add value labels on bars
-        for i, (country, value) in enumerate(country_totals.items()):
-            ax.text(value + 0.5, i, str(value), va='center', fontweight='bold')
-
-        plt.tight_layout()
-        st.pyplot(fig_top_countries)
+        with diagnostics.section("groupby: totals_by_country logins", rows=len(active_users)):
+            country_totals = totals_by_country(active_users, 'total_logins')
+        st.image(diagnostics.cached('chart: country_totals logins', render_chart_image, 'country_totals',
+                                    country_totals, 'Total Login Count (All Weeks)', 'Total Logins by Country'),
+                 use_container_width=True)
 
         # Key insights - login
         st.subheader("💡 Key Insights")
-        most_active_country = active_users.groupby('country')['total_logins'].sum().idxmax()
+        most_active_country = country_totals.idxmax()
         most_active_user = active_users.loc[active_users['total_logins'].idxmax()]
-        most_active_week = weekly_summary.loc[weekly_summary['total_logins'].idxmax()]
+        most_active_week = weekly_summary_df.loc[weekly_summary_df['total_logins'].idxmax()]
 
         st.write(f"• **Average Logins per Active User**: {active_users['total_logins'].mean():.1f}")
         st.write(f"• **Most Active User**: {most_active_user['fullName']} from {most_active_user['country']} with {most_active_user['total_logins']} total logins across {most_active_user['weeks_active']} weeks")
-        st.write(f"• **Average Weeks Active per User**: {user_totals['weeks_active'].mean():.1f}")
+        st.write(f"• **Average Weeks Active per User**: {user_totals_df['weeks_active'].mean():.1f}")
         st.write(f"• **Most Active Week**: {most_active_week['week_period']} with {most_active_week['total_logins']} total logins")
-        st.write(f"• **Most Active Country**: {most_active_country} with {active_users[active_users['country'] == most_active_country]['total_logins'].sum()} total logins")
+        st.write(f"• **Most Active Country**: {most_active_country} with {country_totals[most_active_country]} total logins")
 
         # =============================================================================
         # CREATE EVENTS ANALYSIS SECTION
@@ -357,7 +244,7 @@ if uploaded_file is not None:
         # Display basic statistics for createEvents
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Events Created", int(df['createEvents'].sum()))
+            st.metric("Total Events Created", int(cube['createEvents'].sum()))
         with col2:
             st.metric("Users with Events", len(active_users_events))
         with col3:
@@ -367,7 +254,7 @@ if uploaded_file is not None:
         if len(active_users_events) > 0:
             # Country-wise breakdown for createEvents - all users with tabs
             st.subheader("🌍 Country Breakdown -  Users with Create Events")
-            countries = sorted(df['country'].unique())
+            countries = sorted(cube['country'].unique())
             tabs = st.tabs(countries)
 
             for i, country in enumerate(countries):
@@ -384,88 +271,42 @@ if uploaded_file is not None:
 
             # Matplotlib bar chart for top users by createEvents
             st.subheader("📊 Top Users by Create Events")
-            fig_top_users_events, ax = plt.subplots(figsize=(12, 6))
-            
-            top_users_events_overall = active_users_events.sort_values('total_createEvents', ascending=False).head(top_n * 3)
-            user_labels_events = [f"{name}\n({country})" for name, country in 
-                                    zip(top_users_events_overall['fullName'], top_users_events_overall['country'])]
-            
+            top_users_events_overall = top_users_by(active_users_events, 'total_createEvents', top_n * 3)
             # Use consistent color scheme (green for events)
-            bars_events = ax.bar(range(len(top_users_events_overall)), top_users_events_overall['total_createEvents'], 
-                                    color=COLORS_SEQUENTIAL_GREEN(np.linspace(0.4, 0.9, len(top_users_events_overall))),
-                                    edgecolor='white', linewidth=0.5)
-            ax.set_xlabel('Users', fontsize=10)
-            ax.set_ylabel('Total Create Events Count', fontsize=10)
-            ax.set_title(f'Top {len(top_users_events_overall)} Users Overall by Create Events', fontsize=12, fontweight='bold')
-            ax.set_xticks(range(len(top_users_events_overall)))
-            ax.set_xticklabels(user_labels_events, rotation=45, ha='right', fontsize=8)
-            ax.grid(axis='y', alpha=0.3, linestyle='--')
-            ax.set_facecolor(COLOR_BACKGROUND)
-            
-            # Add value labels on bars
-            for i, value in enumerate(top_users_events_overall['total_createEvents']):
-                ax.text(i, value + 0.1, str(int(value)), ha='center', va='bottom', fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig_top_users_events)
+            st.image(diagnostics.cached('chart: top_users by events', render_chart_image, 'top_users',
+                                        top_users_events_overall, 'total_createEvents', 'Greens',
+                                        'Total Create Events Count',
+                                        f'Top {len(top_users_events_overall)} Users Overall by Create Events'),
+                     use_container_width=True)
             
             # Create matplotlib bar chart for top countries by createEvents
             st.subheader("🌍 Top Countries by Total Create Events")
-            fig_top_countries_events, ax = plt.subplots(figsize=(15, 6))
-            
-            country_totals_events = active_users_events.groupby('country')['total_createEvents'].sum().sort_values(ascending=True)
-            colors_events = [COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)] for i in range(len(country_totals_events))]
-            
-            bars_events_country = ax.barh(country_totals_events.index, country_totals_events.values, 
-                                            color=colors_events, edgecolor='white', linewidth=1)
-            ax.set_xlabel('Total Create Events Count (All Weeks)', fontsize=10)
-            ax.set_title('Total Create Events by Country', fontsize=12, fontweight='bold')
-            ax.grid(axis='x', alpha=0.3, linestyle='--')
-            ax.set_facecolor(COLOR_BACKGROUND)
-            
-            # Add value labels on bars
-            for i, (country, value) in enumerate(country_totals_events.items()):
-                ax.text(value + 0.5, i, str(int(value)), va='center', fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig_top_countries_events)
+            with diagnostics.section("groupby: totals_by_country events", rows=len(active_users_events)):
+                country_totals_events = totals_by_country(active_users_events, 'total_createEvents')
+            st.image(diagnostics.cached('chart: country_totals events', render_chart_image, 'country_totals',
+                                        country_totals_events, 'Total Create Events Count (All Weeks)',
+                                        'Total Create Events by Country'),
+                     use_container_width=True)
             
             # Weekly createEvents trends
             st.subheader("📈 Weekly Create Events Trends")
-            weekly_events_summary = df.groupby(['fromDate', 'week_period']).agg({
-                'createEvents': 'sum',
-                'fullName': 'nunique'
-            }).reset_index()
-            weekly_events_summary.columns = ['fromDate', 'week_period', 'total_createEvents', 'active_users']
-            
             # Filter weeks with at least some events
-            weekly_events_summary = weekly_events_summary[weekly_events_summary['total_createEvents'] > 0]
+            weekly_events_summary = weekly_summary_df[weekly_summary_df['total_createEvents'] > 0]
             
             if len(weekly_events_summary) > 0:
-                fig_weekly_events, ax = plt.subplots(figsize=(12, 5))
-                
-                # Total createEvents per week with consistent styling
-                ax.plot(weekly_events_summary['fromDate'], weekly_events_summary['total_createEvents'], 
-                        marker='o', linewidth=2.5, markersize=6, color=COLOR_SUCCESS)
-                ax.set_title('Total Create Events per Week', fontsize=12, fontweight='bold')
-                ax.set_ylabel('Total Create Events', fontsize=10)
-                ax.set_xlabel('Week', fontsize=10)
-                ax.grid(True, alpha=0.3, linestyle='--')
-                ax.tick_params(axis='x', rotation=45)
-                ax.set_facecolor(COLOR_BACKGROUND)
-                
-                plt.tight_layout()
-                st.pyplot(fig_weekly_events)
+                st.image(diagnostics.cached('chart: weekly_events', render_chart_image, 'weekly_events',
+                                            weekly_events_summary),
+                         use_container_width=True)
             
             # Add key insights for createEvents
             st.subheader("💡 Key Insights")
-            most_active_country_events = active_users_events.groupby('country')['total_createEvents'].sum().idxmax()
+            most_active_country_events = country_totals_events.idxmax()
             most_active_user_events = active_users_events.loc[active_users_events['total_createEvents'].idxmax()]
             
-            st.write(f"• **Users Creating Events**: {len(active_users_events)} out of {len(user_totals)} users ({len(active_users_events)/len(user_totals)*100:.1f}%)")
+            st.write(f"• **Users Creating Events**: {len(active_users_events)} out of {len(user_totals_df)} users ({len(active_users_events)/len(user_totals_df)*100:.1f}%)")
             st.write(f"• **Average Events per Active User**: {active_users_events['total_createEvents'].mean():.1f}")
             st.write(f"• **Most Active User**: {most_active_user_events['fullName']} from {most_active_user_events['country']} with {int(most_active_user_events['total_createEvents'])} total events")
-            st.write(f"• **Most Active Country**: {most_active_country_events} with {int(active_users_events[active_users_events['country'] == most_active_country_events]['total_createEvents'].sum())} total events created")
+            st.write(f"• **Most Active Country**: {most_active_country_events} with {int(country_totals_events[most_active_country_events])} total events created")
         else:
             st.info("No users have created events in this period.")
 
@@ -475,153 +316,51 @@ if uploaded_file is not None:
         st.markdown("---")
         st.header("🔍 Activity Breakdown Analysis")
         
-        # Calculate total activity across all view types
-        view_columns = [col for col in df.columns if 'view' in col.lower() or 'create' in col.lower()]
-        activity_totals = {}
-        for col in view_columns:
-            if df[col].dtype in ['int64', 'float64']:
-                total = df[col].sum()
-                if total > 0:
-                    activity_totals[col.replace('Counts', '').replace('view', '').replace('create', '')] = total
+        # Calculate total activity across all view types, sorted by total count in descending order
+        with diagnostics.section("groupby: activity_totals", rows=len(cube)):
+            sorted_activities = activity_totals(cube)
         
-        if activity_totals:
-            # Sort activities by total count in descending order
-            sorted_activities = sorted(activity_totals.items(), key=lambda x: x[1], reverse=True)
+        if not sorted_activities.empty:
             
-            # Create activity breakdown chart with consistent styling
             st.subheader("📊 Overall Activity Distribution")
-            fig_activity, ax = plt.subplots(figsize=(12, 6))
-            activities = [item[0] for item in sorted_activities]
-            values = [item[1] for item in sorted_activities]
-            
-            # Use consistent color palette
-            colors = [COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)] for i in range(len(activities))]
-            bars = ax.bar(activities, values, color=colors, edgecolor='white', linewidth=0.5)
-            ax.set_title('Total Activity Breakdown (All Weeks)', fontsize=12, fontweight='bold')
-            ax.set_ylabel('Total Count', fontsize=10)
-            ax.set_xlabel('Activity Type', fontsize=10)
-            plt.xticks(rotation=45, ha='right')
-            ax.grid(axis='y', alpha=0.3, linestyle='--')
-            ax.set_facecolor(COLOR_BACKGROUND)
-            
-            # Add value labels
-            for bar, value in zip(bars, values):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                        f'{int(value)}', ha='center', va='bottom')
-            
-            plt.tight_layout()
-            st.pyplot(fig_activity)
+            st.image(diagnostics.cached('chart: activity_distribution', render_chart_image, 'activity_distribution',
+                                        sorted_activities),
+                     use_container_width=True)
 
             # Create stacked bar chart by country for top activities
             st.subheader("📊 Activity Breakdown by Country (Stacked)")
             
             # Get top N activities (e.g., top 10 to avoid overcrowding)
             top_n_activities = min(10, len(sorted_activities))
-            top_activities = [item[0] for item in sorted_activities[:top_n_activities]]
-            
-            # Map clean names back to original column names
-            original_col_mapping = {}
-            for col in view_columns:
-                clean_name = col.replace('Counts', '').replace('view', '').replace('create', '')
-                if clean_name in top_activities:
-                    original_col_mapping[clean_name] = col
+            top_activities = sorted_activities.index[:top_n_activities].tolist()
             
-            # Aggregate by country for each activity
-            country_activity_data = {}
-            countries = df['country'].unique()
+            # Aggregate by country for each activity, once for the stacked, grouped and summary views
+            with diagnostics.section("groupby: activity_by_country", rows=len(cube)):
+                activity_by_country_df = activity_by_country(cube, top_activities)
             
-            for activity in top_activities:
-                if activity in original_col_mapping:
-                    col_name = original_col_mapping[activity]
-                    country_totals = df.groupby('country')[col_name].sum()
-                    country_activity_data[activity] = country_totals
-            
-            # Create DataFrame for plotting
-            activity_by_country_df = pd.DataFrame(country_activity_data)
-            
-            # Create stacked horizontal bar chart with consistent styling
-            fig_country_activity, ax = plt.subplots(figsize=(14, max(8, len(countries) * 0.5)))
-            
-            # Plot stacked bars
-            activity_by_country_df.plot(
-                kind='barh',
-                stacked=True,
-                ax=ax,
-                colormap='tab20',
-                width=0.7,
-                edgecolor='white',
-                linewidth=0.5
-            )
-            
-            ax.set_xlabel('Total Activity Count', fontsize=10)
-            ax.set_ylabel('Country', fontsize=10)
-            ax.set_title(f'Top {top_n_activities} Activities by Country (Stacked)', fontsize=12, fontweight='bold')
-            ax.legend(title='Activity Type', bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=8)
-            ax.grid(axis='x', alpha=0.3, linestyle='--')
-            ax.set_facecolor(COLOR_BACKGROUND)
-            
-            plt.tight_layout()
-            st.pyplot(fig_country_activity)
+            st.image(diagnostics.cached('chart: activity_by_country_stacked', render_chart_image,
+                                        'activity_by_country_stacked', activity_by_country_df),
+                     use_container_width=True)
             
             # Also create a grouped bar chart for comparison
             st.subheader("📊 Activity Comparison by Country (Grouped)")
             
             # Select top 5 activities for better readability in grouped chart
-            top_5_activities = [item[0] for item in sorted_activities[:5]]
-            top_5_data = {}
-            
-            for activity in top_5_activities:
-                if activity in original_col_mapping:
-                    col_name = original_col_mapping[activity]
-                    country_totals = df.groupby('country')[col_name].sum()
-                    top_5_data[activity] = country_totals
+            top_5_activities = top_activities[:5]
+            top_5_df = activity_by_country_df[top_5_activities]
             
-            top_5_df = pd.DataFrame(top_5_data)
-            
-            # Create grouped bar chart with consistent styling
-            fig_grouped, ax = plt.subplots(figsize=(14, max(6, len(countries) * 0.4)))
-            
-            top_5_df.plot(
-                kind='barh',
-                ax=ax,
-                color=[COLORS_QUALITATIVE[i % len(COLORS_QUALITATIVE)] for i in range(len(top_5_activities))],
-                width=0.7,
-                edgecolor='white',
-                linewidth=0.5
-            )
-            
-            ax.set_xlabel('Total Activity Count', fontsize=10)
-            ax.set_ylabel('Country', fontsize=10)
-            ax.set_title('Top 5 Activities by Country (Grouped Comparison)', fontsize=12, fontweight='bold')
-            ax.legend(title='Activity Type', bbox_to_anchor=(1.05, 1), loc='upper left')
-            ax.grid(axis='x', alpha=0.3, linestyle='--')
-            ax.set_facecolor(COLOR_BACKGROUND)
-            
-            plt.tight_layout()
-            st.pyplot(fig_grouped)
+            st.image(diagnostics.cached('chart: activity_by_country_grouped', render_chart_image,
+                                        'activity_by_country_grouped', top_5_df),
+                     use_container_width=True)
             
             # Create a summary table
             st.subheader("📋 Activity Summary by Country")
             
             # Calculate total activities per country across all activity types
-            summary_data = []
-            for country in countries:
-                country_df = df[df['country'] == country]
-                country_row = {'Country': country}
-                
-                for activity in top_activities:
-                    if activity in original_col_mapping:
-                        col_name = original_col_mapping[activity]
-                        country_row[activity] = int(country_df[col_name].sum())
-                
-                country_row['Total Activities'] = sum([v for k, v in country_row.items() if k != 'Country'])
-                summary_data.append(country_row)
-            
-            summary_df = pd.DataFrame(summary_data)
-            summary_df = summary_df.sort_values('Total Activities', ascending=False)
+            summary_df = activity_summary_table(activity_by_country_df)
             
-            st.dataframe(summary_df, use_container_width=True, hide_index=True)
+            with diagnostics.section("dataframe: activity summary by country"):
+                st.dataframe(summary_df, use_container_width=True, hide_index=True)
 
     except Exception as e:
         st.error(f"Error reading the CSV file: {str(e)}")
@@ -662,3 +401,5 @@ else:
     st.write("- **salesRepEmail**: User's email address")
     st.write("- **dailyPointAwarded_days**: Daily points awarded")
     st.write("- **Various view counts**: Additional activity metrics (viewHomeCounts, createEvents, etc.)")
+
+diagnostics.render()
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import tempfile
+
+import pyarrow as pa
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+ENTRY_SUFFIX = ".arrow"
+
+
+def default_cache_dir():
+    """Return the cache directory, which the PL_TOOLKIT_CACHE_DIR environment variable overrides."""
+    return os.environ.get("PL_TOOLKIT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pl-toolkit"))
+
+
+def content_hash(source):
+    """Return the SHA-256 hex digest of a file given as a path, bytes or binary file object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    if hasattr(source, "read"):
+        position = source.tell()
+        source.seek(0)
+        digest = hashlib.file_digest(source, "sha256").hexdigest()
+        source.seek(position)
+        return digest
+    with open(source, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def cache_key(digest, namespace, version):
+    """Build the entry key for a parse result of ``namespace`` at parser ``version``."""
+    return f"{namespace}-v{version}-{digest}"
+
+
+def has_table(key, cache_dir=None):
+    """Return whether an entry for ``key`` is cached, without reading it."""
+    return os.path.exists(os.path.join(cache_dir or default_cache_dir(), key + ENTRY_SUFFIX))
+
+
+def read_table(key, cache_dir=None):
+    """Return the cached Arrow table for ``key``, or None on a miss.
+
+    A hit refreshes the entry's modification time, which is what eviction orders by.
+    """
+    path = os.path.join(cache_dir or default_cache_dir(), key + ENTRY_SUFFIX)
+    try:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        os.utime(path)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return table
+
+
+def write_table(key, table, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Store ``table`` as an Arrow IPC file under ``key`` and evict to stay within ``max_bytes``.
+
+    With ``max_bytes=None`` nothing is evicted, for callers writing many entries that call evict once after.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary file first so concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, os.path.join(cache_dir, key + ENTRY_SUFFIX))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if max_bytes is not None:
+        evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Delete the least recently used entries until the cache fits in ``max_bytes``."""
+    entries = []
+    for entry in os.scandir(cache_dir or default_cache_dir()):
+        if entry.name.endswith(ENTRY_SUFFIX):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # already evicted by another process
+        total -= size
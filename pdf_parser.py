@@ -1,17 +1,182 @@
+import argparse
 import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
 
+import pyarrow as pa
 import PyPDF2
 
+from parse_cache import cache_key, content_hash, evict, has_table, read_table, write_table
 
-def parse_pdf(pdf_path):
-    # Open the PDF file
+# Bump whenever the extracted text changes, so stale cache entries are no longer read
+EXTRACTOR_VERSION = 1
+
+# Documents with fewer selected pages are extracted in-process; a pool would cost more than it saves
+PARALLEL_MIN_PAGES = 16
+
+# Page ranges handed out per worker, so uneven pages still balance across the pool
+CHUNKS_PER_WORKER = 4
+
+
+def parse_page_ranges(spec, page_count):
+    """Turn a page selection like "1-3,7,10-" (1-based, inclusive) into sorted 0-based page indices.
+
+    An open-ended range ("10-") runs to the last page; None or "" selects every page.
+    """
+    if not spec:
+        return list(range(page_count))
+    pages = set()
+    for part in str(spec).split(','):
+        start, sep, end = part.strip().partition('-')
+        try:
+            first = int(start)
+            last = (int(end) if end.strip() else page_count) if sep else first
+        except ValueError:
+            raise ValueError(f"Invalid page range '{part.strip()}' in '{spec}'") from None
+        if not 1 <= first <= last <= page_count:
+            raise ValueError(f"Page range '{part.strip()}' is outside pages 1-{page_count}")
+        pages.update(range(first - 1, last))
+    return sorted(pages)
+
+
+def page_count(pdf_path):
+    """Number of pages of a PDF document."""
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def iter_pdf_pages(pdf_path, pages=None):
+    """Yield the text of each selected page (see parse_page_ranges) in order, extracting it lazily."""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for index in parse_page_ranges(pages, len(reader.pages)):
+            yield reader.pages[index].extract_text()
+
+
+def _extract_pages(pdf_path, page_indices):
+    # Each worker opens the document itself; PdfReader objects do not cross process boundaries
     with open(pdf_path, 'rb') as file:
         reader = PyPDF2.PdfReader(file)
-        text = ''
-        # Iterate through each page and extract text
-        for page in reader.pages:
-            text += page.extract_text() + "\n"  # Adding a newline for separation between pages
-    return text
+        return [reader.pages[index].extract_text() for index in page_indices]
+
+
+def _chunks(items, count):
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def extract_page_texts(pdf_path, page_indices, max_workers=None):
+    """Return the text of each of the 0-based ``page_indices`` of a PDF document, in that order.
+
+    With at least PARALLEL_MIN_PAGES pages, contiguous page ranges are extracted by a process
+    pool of ``max_workers`` (default: number of CPUs).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(page_indices) < PARALLEL_MIN_PAGES:
+        return _extract_pages(pdf_path, page_indices)
+    ranges = _chunks(page_indices, max_workers * CHUNKS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(ranges))) as executor:
+        return [text for chunk in executor.map(_extract_pages, [pdf_path] * len(ranges), ranges) for text in chunk]
+
+
+def parse_pdf(pdf_path, pages=None, max_workers=None):
+    """Extract the text of a PDF document, one newline-terminated block per page.
+
+    ``pages`` limits extraction to a page selection (see parse_page_ranges). Large documents
+    are extracted in parallel (see extract_page_texts); page texts are assembled in document
+    order with a single join.
+    """
+    texts = extract_page_texts(pdf_path, parse_page_ranges(pages, page_count(pdf_path)), max_workers)
+    # Adding a newline for separation between pages
+    return "".join(text + "\n" for text in texts)
+
+
+def page_cache_key(digest, index):
+    """Cache entry key of the text of the 0-based page ``index`` of the document with content hash ``digest``."""
+    return cache_key(digest, f"pdf-page{index}", EXTRACTOR_VERSION)
+
+
+def _cache_pages(pdf_path, digest, page_indices, cache_dir=None):
+    # Each page is stored as soon as it is extracted, so no page text is held or sent back to the parent
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for index in page_indices:
+            text = pa.array([reader.pages[index].extract_text()], pa.string())
+            write_table(page_cache_key(digest, index), pa.table({"text": text}), cache_dir, max_bytes=None)
+
+
+def cache_page_texts(pdf_path, digest, page_indices, cache_dir=None, max_workers=None):
+    """Extract and cache the text of those of the 0-based ``page_indices`` that are not cached yet.
+
+    Entries are per page, keyed by the document's content hash and EXTRACTOR_VERSION, so a page
+    selection only extracts its own pages, and re-running over the same files skips extraction
+    whatever their path or modification time. As in extract_page_texts, at least
+    PARALLEL_MIN_PAGES missing pages are extracted by a process pool. Returns the number of
+    pages extracted.
+    """
+    missing = [index for index in page_indices if not has_table(page_cache_key(digest, index), cache_dir)]
+    if not missing:
+        return 0
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(missing) < PARALLEL_MIN_PAGES:
+        _cache_pages(pdf_path, digest, missing, cache_dir)
+    else:
+        ranges = _chunks(missing, max_workers * CHUNKS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(ranges))) as executor:
+            list(executor.map(_cache_pages, [pdf_path] * len(ranges), [digest] * len(ranges), ranges,
+                              [cache_dir] * len(ranges)))
+    evict(cache_dir)
+    return len(missing)
+
+
+def iter_cached_page_texts(pdf_path, digest, page_indices, cache_dir=None):
+    """Yield the text of each of the 0-based ``page_indices`` from the cache, one page entry at a time.
+
+    A page evicted since it was cached is extracted again.
+    """
+    for index in page_indices:
+        table = read_table(page_cache_key(digest, index), cache_dir)
+        if table is None:
+            yield from _extract_pages(pdf_path, [index])
+            continue
+        for batch in table.to_batches():
+            yield from batch.column(0).to_pylist()
+
+
+def iter_lines(chunks):
+    """Split a stream of text chunks into lines, exactly like ``"".join(chunks).strip().split('\n')``.
+
+    Only the unfinished last line and any trailing whitespace are held back between chunks.
+    """
+    pending = ''
+    for chunk in chunks:
+        if not pending:
+            # Nothing but whitespace so far, which the document's leading strip drops
+            chunk = chunk.lstrip()
+        pending += chunk
+        # Lines before the last newline that is followed by more text are final
+        cut = pending.rfind('\n', 0, len(pending.rstrip()))
+        if cut >= 0:
+            yield from pending[:cut].split('\n')
+            pending = pending[cut + 1:]
+    yield from pending.rstrip().split('\n')
+
+
+def write_csv_rows(lines, csv_path):
+    """Write each line as a CSV row, as it arrives; returns the number of rows written."""
+    count = 0
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        for row in lines:
+            columns = row.split(',')  # Assuming columns are separated by commas
+            writer.writerow(columns)
+            count += 1
+    return count
 
 
 # Function to process the extracted text and convert it into CSV format
@@ -20,23 +185,156 @@ def text_to_csv(text, csv_path):
     # This step highly depends on the structure of your PDF text
     # For demonstration, let's assume each line in the text is a new row for the CSV and
     # columns are separated by commas in the text
+    return write_csv_rows(iter_lines([text]), csv_path)
 
-    rows = text.strip().split('\n')  # Split text into rows by new lines
-    with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file:
-        writer = csv.writer(csv_file)
-        for row in rows:
-            columns = row.split(',')  # Assuming columns are separated by commas
-            writer.writerow(columns)
 
+def pdf_to_csv(pdf_path, csv_path, pages=None):
+    """Stream a PDF document into a CSV file, one row per line of text; returns the number of rows.
+
+    Pages are extracted, split and written one at a time, so memory stays bounded by a page
+    however long the document, and rows reach the file while later pages are still being read.
+    The rows are the same as ``text_to_csv(parse_pdf(pdf_path, pages), csv_path)`` writes.
+    """
+    return write_csv_rows(iter_lines(text + "\n" for text in iter_pdf_pages(pdf_path, pages)), csv_path)
+
+
+@dataclass
+class PdfResult:
+    """Outcome of converting one PDF document to CSV."""
+    pdf_path: str
+    csv_path: str
+    rows: int
+    pages: int
+    seconds: float
+    cached: bool
+
+
+def csv_name(pdf_path):
+    """Name of the CSV file for a PDF document, e.g. 'Lin Family.pdf' -> 'lin_family.csv'."""
+    return Path(pdf_path).stem.lower().replace(" ", "_") + ".csv"
 
-if __name__ == "__main__":
-    # Specify the path to your PDF document and output CSV file
-    pdf_path = 'input/Lin Family.pdf'
-    csv_path = 'output/lin_family.csv'
 
-    # Parse the PDF document
-    text = parse_pdf(pdf_path)
+def batch_output_dirs(pdf_paths, output_dir="output"):
+    """Return the directory each document's CSV is written to in batch mode.
 
-    # Convert the extracted text to CSV
-    text_to_csv(text, csv_path)
-    print(f"Data from '{pdf_path}' has been successfully written to '{csv_path}'")
+    A document's directory relative to the documents' common directory is kept below
+    ``output_dir``, so "archive/2024/report.pdf" and "archive/2025/report.pdf" go to
+    "<output_dir>/2024/report.csv" and "<output_dir>/2025/report.csv". Raises ValueError when
+    two documents would still share a CSV file, e.g. "Lin Family.pdf" and "lin_family.pdf".
+    """
+    paths = [Path(os.path.abspath(pdf_path)) for pdf_path in pdf_paths]
+    parent = os.path.commonpath([path.parent for path in paths]) if paths else ""
+    output_dirs, documents = [], {}
+    for pdf_path, path in zip(pdf_paths, paths):
+        relative_dir = path.parent.relative_to(parent)
+        # Compared case-insensitively, as on the case-insensitive file systems of Windows and macOS
+        key = (relative_dir / csv_name(path)).as_posix().casefold()
+        if key in documents:
+            raise ValueError(f"'{documents[key]}' and '{pdf_path}' would both be written to "
+                             f"{os.path.join(output_dir, relative_dir, csv_name(path))}")
+        documents[key] = pdf_path
+        output_dirs.append(os.path.normpath(os.path.join(output_dir, relative_dir)))
+    return output_dirs
+
+
+def process_pdf(pdf_path, output_dir="output", pages=None, use_cache=True, max_workers=None):
+    """Convert one PDF document to ``<output_dir>/<csv_name>`` and return a timed PdfResult.
+
+    Only the selected ``pages`` are extracted. With the cache, pages missing from it are
+    extracted and cached first (see cache_page_texts), then the CSV is streamed from the cache
+    a page at a time; without it the document is streamed straight to the CSV file (see
+    pdf_to_csv). Either way memory stays bounded by a page.
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(output_dir, csv_name(pdf_path))
+    selected = parse_page_ranges(pages, page_count(pdf_path))
+    if use_cache:
+        digest = content_hash(pdf_path)
+        cached = not cache_page_texts(pdf_path, digest, selected, max_workers=max_workers)
+        texts = iter_cached_page_texts(pdf_path, digest, selected)
+        rows = write_csv_rows(iter_lines(text + "\n" for text in texts), csv_path)
+    else:
+        cached = False
+        rows = pdf_to_csv(pdf_path, csv_path, pages)
+    return PdfResult(str(pdf_path), csv_path, rows, len(selected), time.perf_counter() - start, cached)
+
+
+def find_pdfs(path):
+    """Return the PDF documents a file path, directory or glob pattern refers to."""
+    if os.path.isdir(path):
+        # Glob everything and filter by extension, so "Scan.PDF" is found where globbing is case-sensitive
+        path = os.path.join(path, "*")
+    return sorted(p for p in glob.glob(path) if p.lower().endswith(".pdf") and os.path.isfile(p))
+
+
+def format_result(result):
+    """One line of the timing report for a PdfResult."""
+    source = "cache" if result.cached else "extracted"
+    return (f"{os.path.basename(result.pdf_path)}: {result.rows} rows from {result.pages} pages "
+            f"in {result.seconds:.2f}s ({source})")
+
+
+def process_pdfs(pdf_paths, output_dir="output", pages=None, use_cache=True, max_workers=None):
+    """Convert PDF documents concurrently, one per worker process, printing each one's timing as it finishes.
+
+    Each CSV goes to its document's directory below ``output_dir`` (see batch_output_dirs). Returns
+    the PdfResults in input order; a document that fails is reported and left out.
+    """
+    results = {}
+    output_dirs = batch_output_dirs(pdf_paths, output_dir)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Documents already run in parallel, so each one is extracted within its worker
+        futures = {executor.submit(process_pdf, pdf_path, document_dir, pages, use_cache, 1): pdf_path
+                   for pdf_path, document_dir in zip(pdf_paths, output_dirs)}
+        for future in as_completed(futures):
+            pdf_path = futures[future]
+            try:
+                results[pdf_path] = future.result()
+            except Exception as e:
+                print(f"Failed to process {pdf_path}: {e}", file=sys.stderr)
+                continue
+            print(format_result(results[pdf_path]))
+    return [results[pdf_path] for pdf_path in pdf_paths if pdf_path in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract the text of PDF documents into CSV files')
+    parser.add_argument('file_path', nargs='?', default='input/Lin Family.pdf',
+                        help='Path to the input PDF file, or a directory or glob of files to process in batch')
+    parser.add_argument('--output-dir', type=str, default='output',
+                        help='Directory to write the CSV files to, named after each document')
+    parser.add_argument('--pages', type=str, default=None,
+                        help='Pages to extract, 1-based and inclusive, e.g. "1-3,7,10-" (default: all pages)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Always re-extract the documents instead of reusing cached text')
+    args = parser.parse_args()
+
+    if os.path.isfile(args.file_path):
+        pdf_paths = [args.file_path]
+    else:
+        pdf_paths = find_pdfs(args.file_path)
+        if not pdf_paths:
+            parser.error(f"No PDF files found for '{args.file_path}'")
+
+    start = time.perf_counter()
+    try:
+        if len(pdf_paths) == 1:
+            # A single document spreads its pages over the workers instead
+            results = [process_pdf(pdf_paths[0], args.output_dir, args.pages, args.use_cache, args.workers)]
+            print(format_result(results[0]))
+        else:
+            results = process_pdfs(pdf_paths, args.output_dir, args.pages, args.use_cache, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    cached = sum(result.cached for result in results)
+    print(f"Converted {len(results)} of {len(pdf_paths)} documents ({cached} from cache) "
+          f"in {time.perf_counter() - start:.2f}s")
+    if len(results) < len(pdf_paths):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
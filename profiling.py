@@ -0,0 +1,175 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Seconds between resident set size samples while a stage runs
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or its peak so far where the current one is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes over its lifetime, or 0 if unknown."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+class RssSampler:
+    """Track the peak resident set size while running, by polling it from a daemon thread."""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+@dataclass
+class StageTiming:
+    """Wall time, CPU time and memory of one stage, plus counts (rows, columns, ...) it recorded."""
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rss_before: int = 0
+    peak_rss: int = 0
+    started: float = 0.0  # seconds since the profiler was created
+    counts: dict = field(default_factory=dict)
+
+    @property
+    def peak_rss_delta(self):
+        """How far memory rose above its level at the start of the stage, in bytes."""
+        return max(self.peak_rss - self.rss_before, 0)
+
+    def to_dict(self):
+        return {**asdict(self), 'peak_rss_delta': self.peak_rss_delta}
+
+
+class Profiler:
+    """Record a StageTiming for each ``with profiler.stage(name):`` block, in the order they finish.
+
+    With ``cprofile``, every stage also runs under cProfile and the profile of the slowest one
+    is kept for dump_hottest_profile. Stages must then not nest, and their timings include the
+    profiling overhead.
+    """
+
+    def __init__(self, cprofile=False):
+        self.stages = []
+        self.cprofile = cprofile
+        self.hottest = None  # (StageTiming, cProfile.Profile) of the slowest stage so far
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """Time the block as stage ``name``; the yielded StageTiming's ``counts`` can be filled in by the block."""
+        timing = StageTiming(name, counts=dict(counts))
+        profile = cProfile.Profile() if self.cprofile else None
+        with RssSampler() as sampler:
+            timing.rss_before = current_rss()
+            timing.started = time.perf_counter() - self._origin
+            wall, cpu = time.perf_counter(), time.process_time()
+            if profile:
+                profile.enable()
+            try:
+                yield timing
+            finally:
+                if profile:
+                    profile.disable()
+                timing.wall_seconds = time.perf_counter() - wall
+                timing.cpu_seconds = time.process_time() - cpu
+        timing.peak_rss = sampler.peak
+        self.stages.append(timing)
+        if profile and (self.hottest is None or timing.wall_seconds > self.hottest[0].wall_seconds):
+            self.hottest = (timing, profile)
+
+    def to_dict(self):
+        return [timing.to_dict() for timing in self.stages]
+
+    def to_trace(self, **metadata):
+        """Return the stages in the Trace Event Format read by Perfetto, chrome://tracing and speedscope.
+
+        Each stage is a complete event carrying its CPU time, memory and counts, and the resident
+        set size is a counter track sampled at every stage's start and peak. ``metadata`` and the
+        per-stage summary go under "otherData".
+        """
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'pl-toolkit'}}]
+        for timing in self.stages:
+            start, duration = timing.started * 1e6, timing.wall_seconds * 1e6
+            events.append({
+                'name': timing.name, 'cat': 'stage', 'ph': 'X', 'ts': start, 'dur': duration, 'pid': pid, 'tid': 0,
+                'args': {'cpu_seconds': timing.cpu_seconds, 'peak_rss': timing.peak_rss,
+                         'peak_rss_delta': timing.peak_rss_delta, **timing.counts},
+            })
+            events.append({'name': 'rss_mib', 'ph': 'C', 'ts': start, 'pid': pid,
+                           'args': {'rss': timing.rss_before / 2**20}})
+            events.append({'name': 'rss_mib', 'ph': 'C', 'ts': start + duration, 'pid': pid,
+                           'args': {'rss': timing.peak_rss / 2**20}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {**metadata, 'stages': self.to_dict()}}
+
+    def write_trace(self, path, **metadata):
+        """Write ``to_trace`` as JSON to ``path``."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_trace(**metadata), f, indent=1, default=str)
+        return path
+
+    def dump_hottest_profile(self, path):
+        """Write the cProfile stats of the slowest stage to ``path`` (for pstats or snakeviz); returns its name."""
+        if self.hottest is None:
+            return None
+        timing, profile = self.hottest
+        profile.dump_stats(path)
+        return timing.name
+
+    def summary(self):
+        """The stages as a fixed-width text table."""
+        lines = [f"{'stage':<28} {'wall s':>8} {'cpu s':>8} {'peak MiB':>9} {'+MiB':>7}  counts"]
+        for timing in self.stages:
+            counts = ", ".join(f"{key}={value}" for key, value in timing.counts.items())
+            lines.append(f"{timing.name:<28} {timing.wall_seconds:8.3f} {timing.cpu_seconds:8.3f} "
+                         f"{timing.peak_rss / 2**20:9.1f} {timing.peak_rss_delta / 2**20:7.1f}  {counts}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profiled(profiler, name, **counts):
+    """``profiler.stage(name, **counts)``, or a block that is not measured when ``profiler`` is None."""
+    if profiler is None:
+        yield StageTiming(name, counts=dict(counts))
+    else:
+        with profiler.stage(name, **counts) as timing:
+            yield timing
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def parse_cache_dir(tmp_path, monkeypatch):
+    """Point the on-disk parse cache at a per-test directory."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("PL_TOOLKIT_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one page per entry of ``pages``, each a list of text lines."""
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids) + b"] /Count %d >>" % len(pages),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id, lines in zip(page_ids, pages):
+        ops = [b"BT /F1 12 Tf 14 TL 72 720 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(b"(" + escaped.encode("latin-1") + b") Tj T*")
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1))
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n" % number + objects[number] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offsets[number] for number in sorted(objects))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+    return path
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Return a factory writing minimal text PDFs into the test's directory."""
+    return lambda name, pages: write_pdf(tmp_path / name, pages)
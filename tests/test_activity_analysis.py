@@ -0,0 +1,130 @@
+import pandas as pd
+import pytest
+
+from activity_analysis import (activity_by_country, activity_totals, build_activity_cube, compact_activity_frame,
+                               load_activity_csv, user_totals, weekly_summary)
+
+
+@pytest.fixture
+def activity_df():
+    """Weekly activity rows for three users, with one user reported twice in the same week."""
+    df = pd.DataFrame({
+        'country': ['Malaysia', 'Singapore', 'Malaysia', 'Malaysia', 'Singapore'],
+        'division': ['Endo', 'PI', 'IC', 'Endo', 'PI'],
+        'fullName': ['John Doe', 'Jane Smith', 'Bob Johnson', 'John Doe', 'Jane Smith'],
+        'fromDate': ['20250616', '20250616', '20250623', '20250623', '20250616'],
+        'toDate': ['20250622', '20250622', '20250629', '20250629', '20250622'],
+        'logins': [12, 5, 8, 0, 1],
+        'createEvents': [1, 0, 0, 2, 0],
+        'viewHomeCounts': [3, 0, 4, 1, 2],
+        'viewReportCounts': [0, 0, 0, 0, 0],
+    })
+    df['fromDate'] = pd.to_datetime(df['fromDate'], format='%Y%m%d')
+    df['toDate'] = pd.to_datetime(df['toDate'], format='%Y%m%d')
+    return df
+
+
+def test_cube_is_one_row_per_user_week(activity_df):
+    cube = build_activity_cube(activity_df)
+
+    assert len(cube) == 4
+    jane = cube[cube['fullName'] == 'Jane Smith'].iloc[0]
+    assert (jane['logins'], jane['records'], jane['week_period']) == (6, 2, '2025-06-16 to 2025-06-22')
+
+
+def test_rows_without_a_week_add_activity_but_no_active_week(activity_df):
+    activity_df.loc[4, 'fromDate'] = pd.NaT
+
+    totals = user_totals(build_activity_cube(activity_df)).set_index('fullName')
+
+    assert totals.loc['Jane Smith', 'weeks_active'] == 1
+    assert totals.loc['Jane Smith', 'total_logins'] == 6
+    assert totals.loc['John Doe', 'weeks_active'] == 2
+
+
+def test_views_match_direct_aggregation(activity_df):
+    cube = build_activity_cube(activity_df)
+    activity_df['week_period'] = (activity_df['fromDate'].dt.strftime('%Y-%m-%d') + ' to '
+                                  + activity_df['toDate'].dt.strftime('%Y-%m-%d'))
+
+    expected_users = activity_df.groupby(['fullName', 'country', 'division']).agg(
+        {'logins': 'sum', 'week_period': 'count', 'createEvents': 'sum'}).reset_index()
+    expected_users.columns = ['fullName', 'country', 'division', 'total_logins', 'weeks_active', 'total_createEvents']
+    pd.testing.assert_frame_equal(user_totals(cube), expected_users)
+
+    expected_weeks = activity_df.groupby(['country', 'fromDate', 'week_period']).agg(
+        {'logins': 'sum', 'fullName': 'nunique', 'createEvents': 'sum'}).reset_index()
+    expected_weeks.columns = ['country', 'fromDate', 'week_period', 'total_logins', 'active_users',
+                              'total_createEvents']
+    expected_weeks['week_period'] = expected_weeks['week_period'].astype('category')
+    pd.testing.assert_frame_equal(weekly_summary(cube, by='country'), expected_weeks)
+
+    assert activity_totals(cube).to_dict() == {'Home': 10, 'Events': 3}
+    assert activity_by_country(cube, ['Home']).to_dict() == {'Home': {'Malaysia': 8, 'Singapore': 2}}
+
+
+def test_compact_frame_aggregates_like_the_original(activity_df):
+    compact = compact_activity_frame(activity_df)
+
+    assert compact['fullName'].cat.categories.tolist() == ['Bob Johnson', 'Jane Smith', 'John Doe']
+    assert compact['week_period'].cat.codes.tolist() == [0, 0, 1, 1, 0]
+    assert compact['logins'].dtype == 'int8'
+
+    cube, compact_cube = build_activity_cube(activity_df), build_activity_cube(compact)
+    assert compact_cube['country'].dtype == 'category'
+    pd.testing.assert_frame_equal(user_totals(compact_cube), user_totals(cube), check_categorical=False,
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(weekly_summary(compact_cube, by='country'), weekly_summary(cube, by='country'),
+                                  check_categorical=False, check_dtype=False)
+    pd.testing.assert_series_equal(activity_totals(compact_cube), activity_totals(cube))
+
+
+def test_load_activity_csv_reads_typed_dashboard_columns(activity_df, tmp_path):
+    path = tmp_path / 'activity.csv'
+    export = activity_df.assign(fromDate=activity_df['fromDate'].dt.strftime('%Y%m%d'),
+                                toDate=activity_df['toDate'].dt.strftime('%Y%m%d'),
+                                dailyPointAwarded_days=1.5)
+    export.to_csv(path, index=False)
+    progress = []
+
+    df = load_activity_csv(path, progress=progress.append, block_size=256)
+
+    assert 'dailyPointAwarded_days' not in df.columns
+    assert df['logins'].dtype == 'int64' and df['fromDate'].dtype == 'datetime64[ns]'
+    pd.testing.assert_frame_equal(df, activity_df, check_dtype=False)
+    assert len(progress) > 2 and progress == sorted(progress) and progress[-1] == 1.0
+
+
+def test_load_activity_csv_leaves_missing_columns_to_the_caller(tmp_path):
+    path = tmp_path / 'activity.csv'
+    path.write_text('country,fullName,logins\nMalaysia,John Doe,3\n')
+
+    df = load_activity_csv(path)
+
+    assert df.columns.tolist() == ['country', 'fullName', 'logins']
+
+
+def test_load_activity_csv_types_counts_from_the_whole_column(tmp_path):
+    path = tmp_path / 'activity.csv'
+    path.write_text('country,fullName,fromDate,toDate,logins,createdAt,reviewerName,viewHomeCounts,createEvents\n'
+                    'Malaysia,John Doe,20250106,20250112,3,2025-01-06,Ann,1,0\n'
+                    'Vietnam,Jane Doe,20250106,20250112,1,2025-01-07,Bob,2.0,\n')
+
+    df = load_activity_csv(path, block_size=160)
+
+    assert 'createdAt' not in df.columns and 'reviewerName' not in df.columns
+    assert df['logins'].dtype == 'int64'
+    assert df['viewHomeCounts'].tolist() == [1.0, 2.0]
+    assert df['createEvents'].iloc[0] == 0 and pd.isna(df['createEvents'].iloc[1])
+
+
+def test_load_activity_csv_reads_blank_dates_as_nat(tmp_path):
+    path = tmp_path / 'activity.csv'
+    path.write_text('country,fullName,fromDate,toDate,logins\n'
+                    'Malaysia,John Doe,20250106,20250112,3\n'
+                    'Vietnam,Jane Doe,,20250112,1\n')
+
+    df = load_activity_csv(path)
+
+    assert df['fromDate'].dtype == 'datetime64[ns]'
+    assert df['fromDate'].iloc[0] == pd.Timestamp('2025-01-06') and pd.isna(df['fromDate'].iloc[1])
@@ -0,0 +1,29 @@
+import pytest
+
+from activity_analysis import REQUIRED_COLUMNS, load_activity_csv
+from benchmarks.activity_benchmark import benchmark_csv
+from benchmarks.activity_data import view_columns, write_activity_csv
+
+
+def test_synthetic_export_loads_with_every_column(tmp_path):
+    path = write_activity_csv(str(tmp_path / "activity.csv"), rows=1000, views=14, weeks=10)
+    df = load_activity_csv(path)
+
+    assert len(df) == 1000
+    assert set(REQUIRED_COLUMNS + view_columns(14)) <= set(df.columns)
+    assert view_columns(14)[-2:] == ["viewPage13Counts", "viewPage14Counts"]
+    assert df.groupby(["fullName", "fromDate"]).size().max() == 1
+    assert df["fromDate"].nunique() == 10
+    assert (df.loc[df["logins"] == 0, view_columns(14)] == 0).all().all()
+
+
+@pytest.mark.slow
+def test_benchmark_times_every_stage(tmp_path):
+    path = write_activity_csv(str(tmp_path / "activity.csv"), rows=2000)
+    run = benchmark_csv(path, 2000)
+
+    names = [stage["name"] for stage in run["stages"]]
+    assert names[:3] == ["ingest", "compact_activity_frame", "build_activity_cube"]
+    assert sum(name.startswith("chart:") for name in names) == 8
+    assert run["stages"][0]["counts"] == {"input_rows": 2000, "output_rows": 2000}
+    assert run["peak_rss"] > 0
@@ -0,0 +1,16 @@
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from activity_charts import render_chart
+
+
+def test_render_chart_returns_image_without_leaking_figures():
+    country_totals = pd.Series({'Vietnam': 3, 'Malaysia': 12})
+
+    png = render_chart('country_totals', country_totals, 'Total Login Count', 'Total Logins by Country')
+    svg = render_chart('country_totals', country_totals, 'Total Login Count', 'Total Logins by Country',
+                       image_format='svg')
+
+    assert png.startswith(b'\x89PNG\r\n\x1a\n')
+    assert b'<svg' in svg
+    assert plt.get_fignums() == []
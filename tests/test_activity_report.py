@@ -0,0 +1,34 @@
+import pytest
+
+from activity_report import generate_reports
+
+
+@pytest.fixture
+def activity_csv(tmp_path):
+    path = tmp_path / 'activity.csv'
+    path.write_text(
+        'country,division,fullName,fromDate,toDate,logins,createEvents,viewHomeCounts\n'
+        'Malaysia,Endo,John Doe,20250616,20250622,12,1,3\n'
+        'Singapore,PI,Jane Smith,20250616,20250622,5,0,0\n'
+        'Malaysia,IC,Bob Johnson,20250623,20250629,8,0,4\n'
+    )
+    return path
+
+
+def test_generate_reports_writes_self_contained_html(activity_csv, tmp_path):
+    paths = generate_reports(activity_csv, tmp_path / 'reports', by_country=True, max_workers=2)
+
+    assert [p.rsplit('/', 1)[-1] for p in map(str, paths)] == [
+        'activity_report.html', 'activity_report_malaysia.html', 'activity_report_singapore.html']
+    report = (tmp_path / 'reports' / 'activity_report.html').read_text()
+    assert report.count('<img src="data:image/png;base64,') == 10
+    assert 'Summary by Country' in report and 'Jane Smith' in report
+    assert 'Jane Smith' not in (tmp_path / 'reports' / 'activity_report_malaysia.html').read_text()
+
+
+def test_generate_reports_rejects_missing_columns(tmp_path):
+    path = tmp_path / 'activity.csv'
+    path.write_text('country,fullName,logins\nMalaysia,John Doe,3\n')
+
+    with pytest.raises(ValueError, match='fromDate'):
+        generate_reports(path, tmp_path / 'reports')
@@ -1,5 +1,12 @@
 import csv
-from csv_converter import csv_to_articles
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+import csv_converter
+from csv_converter import csv_to_archive, csv_to_articles
 
 
 def test_csv_to_articles(tmp_path):
@@ -23,3 +30,102 @@ def test_csv_to_articles(tmp_path):
     content = output_file.read_text()
     expected = "description:\n" + long_text.replace(". ", ".\n") + "\n\n"
     assert expected in content
+
+
+def _write_rows(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "description", "name"])
+        writer.writerows(rows)
+
+
+def test_csv_to_articles_last_row_wins_across_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_converter, "WRITE_BATCH_SIZE", 2)
+    input_csv = tmp_path / "input.csv"
+    _write_rows(input_csv, [[str(i), f"v{i}", f"Name {i % 3}"] for i in range(10)])
+
+    summary = csv_to_articles(str(input_csv), str(tmp_path / "out"), max_workers=4)
+
+    assert summary.written == 10
+    assert sorted(p.name for p in (tmp_path / "out").glob("*.txt")) == ["Name_0.txt", "Name_1.txt", "Name_2.txt"]
+    assert (tmp_path / "out" / "Name_0.txt").read_text() == "id: 9\ndescription: v9\nname: Name 0\n"
+
+
+@pytest.mark.parametrize("archive_name", ["articles.zip", "articles.tar.gz", "articles.jsonl"])
+def test_csv_to_archive_matches_per_file_articles(tmp_path, archive_name):
+    input_csv = tmp_path / "input.csv"
+    _write_rows(input_csv, [["1", "Short", "Test Name"], ["2", "A. " * 40, "Other Name"]])
+    csv_to_articles(str(input_csv), str(tmp_path / "out"))
+    archive_path = tmp_path / archive_name
+
+    assert csv_to_archive(str(input_csv), str(archive_path)) == 2
+
+    if archive_name.endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            articles = {name: archive.read(name).decode() for name in archive.namelist()}
+    elif archive_name.endswith(".tar.gz"):
+        with tarfile.open(archive_path) as archive:
+            articles = {member.name: archive.extractfile(member).read().decode() for member in archive}
+    else:
+        lines = [json.loads(line) for line in archive_path.read_text().splitlines()]
+        articles = {line["filename"]: line["text"] for line in lines}
+    assert articles == {p.name: p.read_text() for p in (tmp_path / "out").glob("*.txt")}
+
+
+def test_incremental_run_only_touches_the_delta(tmp_path, monkeypatch):
+    input_csv = tmp_path / "input.csv"
+    output_dir = tmp_path / "out"
+    _write_rows(input_csv, [["1", "First", "Alice"], ["2", "Second", "Bob"], ["3", "Third", "Carol"]])
+    csv_to_articles(str(input_csv), str(output_dir), incremental=True)
+
+    _write_rows(input_csv, [["1", "First", "Alice"], ["2", "Second, edited", "Bob"], ["4", "Fourth", "Dave"]])
+    written = []
+    write_articles = csv_converter._write_articles
+    monkeypatch.setattr(csv_converter, "_write_articles",
+                        lambda articles, directory: (written.extend(name for name, _ in articles),
+                                                     write_articles(articles, directory)))
+
+    summary = csv_to_articles(str(input_csv), str(output_dir), incremental=True)
+    assert (summary.written, summary.unchanged, summary.removed) == (2, 1, 0)
+    assert sorted(written) == ["Bob.txt", "Dave.txt"]
+    assert "Second, edited" in (output_dir / "Bob.txt").read_text()
+    assert (output_dir / "Carol.txt").exists()
+
+    summary = csv_to_articles(str(input_csv), str(output_dir), incremental=True, delete_removed=True)
+    assert (summary.written, summary.unchanged, summary.removed) == (0, 3, 1)
+    assert sorted(p.name for p in output_dir.glob("*.txt")) == ["Alice.txt", "Bob.txt", "Dave.txt"]
+
+
+def test_manifest_is_only_kept_for_tracked_runs(tmp_path, monkeypatch):
+    input_csv = tmp_path / "input.csv"
+    output_dir = tmp_path / "out"
+    manifest = output_dir / csv_converter.MANIFEST_NAME
+    _write_rows(input_csv, [["1", "First", "Alice"]])
+
+    csv_to_articles(str(input_csv), str(output_dir))
+    assert sorted(p.name for p in output_dir.iterdir()) == ["Alice.txt"]
+
+    csv_to_articles(str(input_csv), str(output_dir), incremental=True)
+    assert manifest.exists()
+
+    # A plain run over tracked articles keeps the manifest in step with what it wrote
+    _write_rows(input_csv, [["1", "Edited", "Alice"]])
+    csv_to_articles(str(input_csv), str(output_dir))
+    _write_rows(input_csv, [["1", "First", "Alice"]])
+    summary = csv_to_articles(str(input_csv), str(output_dir), incremental=True)
+    assert (summary.written, summary.unchanged) == (1, 0)
+    assert "First" in (output_dir / "Alice.txt").read_text()
+
+
+@pytest.mark.parametrize("flag", ["--incremental", "--delete-removed"])
+def test_archive_output_rejects_incremental_flags(tmp_path, monkeypatch, capsys, flag):
+    input_csv = tmp_path / "input.csv"
+    _write_rows(input_csv, [["1", "First", "Alice"]])
+    monkeypatch.setattr("sys.argv", ["csv-converter", str(input_csv), str(tmp_path / "articles.zip"), flag])
+
+    with pytest.raises(SystemExit) as excinfo:
+        csv_converter.main()
+
+    assert excinfo.value.code == 2
+    assert "only apply to files mode" in capsys.readouterr().err
+    assert not (tmp_path / "articles.zip").exists()
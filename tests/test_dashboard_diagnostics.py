@@ -0,0 +1,57 @@
+import functools
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import dashboard_diagnostics
+from dashboard_diagnostics import Diagnostics, counts_cache_misses
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@functools.lru_cache
+@counts_cache_misses
+def double(value):
+    return value * 2
+
+
+def test_sections_and_cache_hits_are_recorded(monkeypatch):
+    diagnostics = Diagnostics(enabled=True)
+    monkeypatch.setattr(dashboard_diagnostics._current, "diagnostics", diagnostics, raising=False)
+    double.cache_clear()
+
+    with diagnostics.section("groupby: totals", rows=3):
+        sum(range(1000))
+    results = [diagnostics.cached(f"chart: {value}", double, value) for value in (1, 2, 1, 1)]
+
+    assert results == [2, 4, 2, 2]
+    assert sorted(diagnostics.sections_frame()["Section"]) == ["chart: 1", "chart: 1", "chart: 1", "chart: 2",
+                                                               "groupby: totals"]
+    assert diagnostics.cache_frame().to_dict("records") == [{"Cache": "double", "Calls": 4, "Hits": 2, "Misses": 2}]
+
+
+def test_disabled_diagnostics_record_nothing(monkeypatch):
+    diagnostics = Diagnostics()
+    monkeypatch.setattr(dashboard_diagnostics._current, "diagnostics", diagnostics, raising=False)
+    double.cache_clear()
+
+    with diagnostics.section("ingest"):
+        pass
+    assert diagnostics.cached("chart", double, 3) == 6
+
+    assert diagnostics.sections_frame().empty
+    assert diagnostics.cache_frame().empty
+
+
+@pytest.mark.parametrize("page", ["homepage.py", "pages/01_time_distribution.py",
+                                  "pages/09_user_activity_dashboard.py"])
+def test_pages_show_the_panel_when_opted_in(page, monkeypatch):
+    monkeypatch.setenv(dashboard_diagnostics.DIAGNOSTICS_ENV, "1")
+    app = AppTest.from_file(str(ROOT / page)).run()
+
+    assert not app.exception
+    assert [header.value for header in app.sidebar.subheader] == ["Diagnostics"]
+
+    app.sidebar.toggle(key="show_diagnostics").set_value(False).run()
+    assert not app.sidebar.subheader
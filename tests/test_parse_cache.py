@@ -0,0 +1,29 @@
+import os
+
+import pyarrow as pa
+
+from parse_cache import cache_key, content_hash, read_table, write_table
+
+
+def test_content_hash_matches_across_sources(tmp_path):
+    path = tmp_path / "workbook.xlsx"
+    path.write_bytes(b"workbook bytes")
+
+    with open(path, "rb") as f:
+        assert content_hash(str(path)) == content_hash(path.read_bytes()) == content_hash(f)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    table = pa.table({"hours": list(range(1000))})
+    keys = [cache_key(str(i), "test", 1) for i in range(3)]
+    for age, key in enumerate(keys):
+        write_table(key, table, tmp_path)
+        os.utime(tmp_path / f"{key}.arrow", (age, age))
+    entry_size = os.path.getsize(tmp_path / f"{keys[0]}.arrow")
+
+    assert read_table(keys[0], tmp_path).equals(table)  # refreshes the oldest entry
+    write_table(cache_key("3", "test", 1), table, tmp_path, max_bytes=3 * entry_size)
+
+    assert read_table(keys[1], tmp_path) is None
+    assert read_table(keys[0], tmp_path) is not None
+    assert read_table(keys[2], tmp_path) is not None
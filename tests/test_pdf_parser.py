@@ -0,0 +1,156 @@
+import itertools
+import os
+
+import pytest
+
+import pdf_parser
+from pdf_parser import (find_pdfs, iter_lines, parse_page_ranges, parse_pdf, pdf_to_csv, process_pdf, process_pdfs,
+                        text_to_csv)
+
+
+@pytest.fixture
+def long_pdf(make_pdf):
+    """A 40-page document whose page i holds the lines "page i,line j"."""
+    return make_pdf("long.pdf", [[f"page {page},line {line}" for line in range(3)] for page in range(1, 41)])
+
+
+def test_parse_page_ranges():
+    assert parse_page_ranges(None, 4) == [0, 1, 2, 3]
+    assert parse_page_ranges("3-4, 1,2-2", 10) == [0, 1, 2, 3]
+    assert parse_page_ranges("9-", 10) == [8, 9]
+    for spec in ("0", "4-2", "11", "a-b"):
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec, 10)
+
+
+def test_parallel_extraction_keeps_page_order(long_pdf, monkeypatch):
+    monkeypatch.setattr(pdf_parser, "PARALLEL_MIN_PAGES", 2)
+
+    sequential = parse_pdf(long_pdf, max_workers=1)
+    parallel = parse_pdf(long_pdf, max_workers=3)
+
+    assert parallel == sequential
+    assert sequential.startswith("page 1,line 0\npage 1,line 1\npage 1,line 2\n\npage 2,line 0\n")
+    assert sequential.count("\n\n") == 40
+
+
+def test_parse_selected_pages(long_pdf):
+    text = parse_pdf(long_pdf, pages="2,39-")
+
+    assert [line for line in text.splitlines() if line.endswith("line 0")] == [
+        "page 2,line 0", "page 39,line 0", "page 40,line 0"]
+
+
+@pytest.mark.parametrize("chunks", [[], ["  \n"], ["\n a,b\n", "\n", "c", "\nd \n\n", "  "], ["x\n\n", "\ny"]])
+def test_iter_lines_matches_whole_text_split(chunks):
+    assert list(iter_lines(chunks)) == "".join(chunks).strip().split("\n")
+
+
+def test_pdf_to_csv_streams_the_same_rows(long_pdf, tmp_path, monkeypatch):
+    text_to_csv(parse_pdf(long_pdf, max_workers=1), tmp_path / "whole.csv")
+    extracted = []
+    iter_pages = pdf_parser.iter_pdf_pages
+
+    def tracking_pages(*args, **kwargs):
+        for text in iter_pages(*args, **kwargs):
+            extracted.append(text)
+            yield text
+
+    monkeypatch.setattr(pdf_parser, "iter_pdf_pages", tracking_pages)
+    # The first row is handed to the writer while only the first page has been extracted
+    first_rows = []
+    write_csv_rows = pdf_parser.write_csv_rows
+
+    def first_row_before_last_page(lines, csv_path):
+        lines = iter(lines)
+        first_rows.append((next(lines), len(extracted)))
+        return write_csv_rows(itertools.chain([first_rows[0][0]], lines), csv_path)
+
+    monkeypatch.setattr(pdf_parser, "write_csv_rows", first_row_before_last_page)
+    count = pdf_to_csv(long_pdf, tmp_path / "streamed.csv")
+
+    assert (tmp_path / "streamed.csv").read_text() == (tmp_path / "whole.csv").read_text()
+    assert count == 40 * 4 - 1
+    assert first_rows == [("page 1,line 0", 1)]
+
+
+def test_process_pdf_reuses_cached_text(long_pdf, tmp_path, parse_cache_dir, monkeypatch):
+    first = process_pdf(long_pdf, tmp_path / "out")
+    assert not first.cached
+    assert len(list(parse_cache_dir.glob("pdf-page*.arrow"))) == 40
+
+    def no_extraction(*args, **kwargs):
+        raise AssertionError("cached document was extracted again")
+
+    monkeypatch.setattr(pdf_parser, "_cache_pages", no_extraction)
+    monkeypatch.setattr(pdf_parser, "_extract_pages", no_extraction)
+    again = process_pdf(long_pdf, tmp_path / "again", pages="2")
+
+    assert again.cached
+    assert (again.rows, again.pages) == (3, 1)
+    assert (tmp_path / "again" / "long.csv").read_text().splitlines()[0] == "page 2,line 0"
+    assert (tmp_path / "out" / "long.csv").read_text() == pdf_to_csv_text(long_pdf, tmp_path)
+
+
+def pdf_to_csv_text(pdf_path, tmp_path):
+    pdf_to_csv(pdf_path, tmp_path / "uncached.csv")
+    return (tmp_path / "uncached.csv").read_text()
+
+
+def test_process_pdf_extracts_only_the_selected_pages_on_a_miss(long_pdf, tmp_path, parse_cache_dir, monkeypatch):
+    extracted = []
+    cache_pages = pdf_parser._cache_pages
+
+    def counting_cache_pages(pdf_path, digest, page_indices, cache_dir=None):
+        extracted.extend(page_indices)
+        return cache_pages(pdf_path, digest, page_indices, cache_dir)
+
+    monkeypatch.setattr(pdf_parser, "_cache_pages", counting_cache_pages)
+    result = process_pdf(long_pdf, tmp_path / "out", pages="1-2", max_workers=1)
+
+    assert extracted == [0, 1] and not result.cached
+    assert (tmp_path / "out" / "long.csv").read_text().splitlines()[-1] == "page 2,line 2"
+
+    # A wider selection only extracts the pages it adds
+    result = process_pdf(long_pdf, tmp_path / "out", pages="2-3", max_workers=1)
+    assert extracted == [0, 1, 2] and not result.cached
+    assert len(list(parse_cache_dir.glob("pdf-page*.arrow"))) == 3
+
+
+def test_process_pdfs_converts_a_directory(make_pdf, tmp_path, capsys):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name in ("B Doc", "a doc"):
+        make_pdf(f"docs/{name}.pdf", [[f"{name},{line}" for line in range(2)]])
+    make_pdf("docs/Scan.PDF", [["scan,0"]])
+    (docs / "notes.txt").write_text("not a pdf")
+
+    results = process_pdfs(find_pdfs(str(docs)), tmp_path / "out", max_workers=2)
+
+    assert [os.path.basename(result.csv_path) for result in results] == ["b_doc.csv", "scan.csv", "a_doc.csv"]
+    assert (tmp_path / "out" / "a_doc.csv").read_text().splitlines() == ["a doc,0", "a doc,1"]
+    assert "a doc.pdf: 2 rows from 1 pages" in capsys.readouterr().out
+
+
+def test_process_pdfs_keeps_documents_with_the_same_stem_apart(make_pdf, tmp_path):
+    for year in ("2024", "2025"):
+        (tmp_path / "archive" / year).mkdir(parents=True)
+        make_pdf(f"archive/{year}/report.pdf", [[f"report,{year}"]])
+
+    results = process_pdfs(find_pdfs(str(tmp_path / "archive" / "*" / "report.pdf")), tmp_path / "out",
+                           max_workers=2)
+
+    assert len(results) == 2
+    for year in ("2024", "2025"):
+        assert (tmp_path / "out" / year / "report.csv").read_text().splitlines() == [f"report,{year}"]
+
+
+def test_process_pdfs_rejects_documents_sharing_a_csv_file(make_pdf, tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name in ("Lin Family", "lin_family"):
+        make_pdf(f"docs/{name}.pdf", [["text"]])
+
+    with pytest.raises(ValueError, match="would both be written to"):
+        process_pdfs(find_pdfs(str(docs)), tmp_path / "out")
+    assert not (tmp_path / "out").exists()
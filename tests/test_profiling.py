@@ -0,0 +1,24 @@
+import time
+
+import numpy as np
+
+from profiling import Profiler, current_rss
+
+
+def test_stage_records_time_memory_and_counts():
+    profiler = Profiler()
+
+    with profiler.stage("allocate", rows=10) as timing:
+        block = np.ones(64 * 2**20 // 8)
+        timing.counts["columns"] = 1
+    with profiler.stage("sleep"):
+        time.sleep(0.05)
+
+    allocate, sleep = profiler.stages
+    assert allocate.counts == {"rows": 10, "columns": 1}
+    assert allocate.peak_rss_delta >= 32 * 2**20
+    assert sleep.wall_seconds >= 0.05 > sleep.cpu_seconds
+    assert sleep.started >= allocate.started + allocate.wall_seconds
+    assert [stage["name"] for stage in profiler.to_dict()] == ["allocate", "sleep"]
+    assert current_rss() > 0
+    del block
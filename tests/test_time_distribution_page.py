@@ -0,0 +1,32 @@
+import runpy
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import dashboard_diagnostics
+from dashboard_diagnostics import Diagnostics
+
+PAGE = Path(__file__).resolve().parent.parent / "pages" / "01_time_distribution.py"
+
+
+@pytest.fixture(scope="module")
+def render_pie_chart_row():
+    # Running the page outside `streamlit run` only defines its functions and renders nothing
+    render = runpy.run_path(str(PAGE))["render_pie_chart_row"]
+    render.clear()
+    return render
+
+
+def test_render_pie_chart_row_returns_png_and_hits_the_cache(render_pie_chart_row, monkeypatch):
+    diagnostics = Diagnostics(enabled=True)
+    monkeypatch.setattr(dashboard_diagnostics._current, "diagnostics", diagnostics, raising=False)
+    row = pd.DataFrame({"Absences [h]": [8, 0], "Operational hours": [152, 160]}, index=["Alice", "Bob"])
+
+    image = diagnostics.cached("chart: pie row 1", render_pie_chart_row, row, 3)
+    again = diagnostics.cached("chart: pie row 1", render_pie_chart_row, row.copy(), 3)
+
+    assert image.startswith(b"\x89PNG\r\n\x1a\n")
+    assert again == image
+    assert diagnostics.cache_frame().to_dict("records") == [
+        {"Cache": "render_pie_chart_row", "Calls": 2, "Hits": 1, "Misses": 1}]
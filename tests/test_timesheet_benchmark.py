@@ -0,0 +1,31 @@
+from datetime import date, datetime
+
+import pytest
+
+from benchmarks.timesheet_benchmark import SCALES, benchmark_scale, find_regressions, load_baseline, scale_name
+from benchmarks.vertec_workbook import day_headers, write_vertec_workbook
+from timesheet_review import extract_date_col_mappings, extract_user_row_mappings, load_timesheet
+
+
+def test_generated_workbook_follows_the_vertec_layout(tmp_path):
+    path = write_vertec_workbook(tmp_path / "vertec.xlsx", users=25, year=2025, month=2)
+    df, _ = load_timesheet(path)
+    user_row_mappings, category_row_indices = extract_user_row_mappings(df)
+
+    assert day_headers(2025, 2)[:3] == ["1, Sa", "2, Su", "3, Mo"]
+    assert df.iloc[2, 15:].dropna().tolist() == day_headers(2025, 2) + ["Total"]
+    assert len(user_row_mappings) == 25
+    assert all(len(categories) == 3 for categories in category_row_indices.values())
+    # Early March selects every workday of February: Mon 3rd to Fri 28th, day columns from Col P
+    workdays = [date(2025, 2, day) for day in range(1, 29) if date(2025, 2, day).weekday() < 5]
+    assert len(workdays) == 20
+    assert extract_date_col_mappings(df, today=datetime(2025, 3, 3)) == {
+        day.strftime("%a, %b-%d"): 14 + day.day for day in workdays}
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("users,year,month", SCALES, ids=[scale_name(*scale) for scale in SCALES])
+def test_timesheet_stages_within_baseline(users, year, month, tmp_path):
+    timings = benchmark_scale(users, year, month, tmp_path)
+
+    assert not find_regressions(scale_name(users, year, month), timings, load_baseline())
@@ -0,0 +1,206 @@
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+import timesheet_history
+import timesheet_review
+from benchmarks.vertec_workbook import write_vertec_workbook
+from parse_cache import content_hash
+from timesheet_history import (append_month, category_totals, connect, imported_months, under_booked_days,
+                               user_days, workbook_month, workday_dates)
+from timesheet_review import load_parsed_timesheet, process_timesheet
+
+TODAY = date(2025, 4, 15)
+
+
+@pytest.fixture
+def history(tmp_path):
+    conn = connect(str(tmp_path / "history.sqlite"))
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Return a factory writing a synthetic Vertec workbook of one month, named like the Vertec exports."""
+    def write(year, month, users=5, seed=0):
+        return write_vertec_workbook(tmp_path / f"{year}{month:02d}_ZE TimeSheet_OpHours.xlsx", users, year, month,
+                                     seed)
+    return write
+
+
+def append_workbook(conn, path, today=TODAY):
+    year, month = workbook_month(path)
+    return append_month(conn, load_parsed_timesheet(path), year, month, path, content_hash(path), today=today)
+
+
+def test_connect_creates_the_schema_once_and_upgrades_older_databases(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "history.sqlite")
+    version = timesheet_history.SCHEMA_VERSION
+    connect(db_path).close()
+    conn = connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone() == (version,)
+    conn.close()
+
+    monkeypatch.setattr(timesheet_history, "SCHEMA_VERSION", version + 1)
+    monkeypatch.setitem(timesheet_history.MIGRATIONS, version, ("ALTER TABLE workbooks ADD COLUMN note TEXT",))
+    conn = connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone() == (version + 1,)
+    assert "note" in [column[1] for column in conn.execute("PRAGMA table_info(workbooks)")]
+    conn.close()
+
+
+def test_connect_refuses_databases_it_cannot_upgrade(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "history.sqlite")
+    version = timesheet_history.SCHEMA_VERSION
+    connect(db_path).close()
+    monkeypatch.setattr(timesheet_history, "SCHEMA_VERSION", version + 1)
+    with pytest.raises(ValueError, match="cannot be upgraded"):
+        connect(db_path)
+
+    monkeypatch.setattr(timesheet_history, "SCHEMA_VERSION", version)
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA user_version={version + 2}")
+    conn.close()
+    with pytest.raises(ValueError, match="newer"):
+        connect(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone() == (version + 2,)
+    conn.close()
+
+
+def test_version_1_hours_are_attributed_to_their_workbook(tmp_path):
+    db_path = str(tmp_path / "history.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE workbooks (content_hash TEXT PRIMARY KEY, month TEXT NOT NULL, source TEXT NOT NULL,
+                                users INTEGER NOT NULL, days INTEGER NOT NULL, imported_at TEXT NOT NULL);
+        CREATE TABLE daily_hours (user TEXT NOT NULL, day TEXT NOT NULL, month TEXT NOT NULL,
+                                  target INTEGER NOT NULL, actual INTEGER NOT NULL, delta INTEGER NOT NULL,
+                                  submitted INTEGER NOT NULL, PRIMARY KEY (user, day)) WITHOUT ROWID;
+        CREATE TABLE category_hours (user TEXT NOT NULL, month TEXT NOT NULL, category TEXT NOT NULL,
+                                     hours REAL NOT NULL, PRIMARY KEY (user, month, category)) WITHOUT ROWID;
+        INSERT INTO workbooks VALUES ('a', '2025-03', '/in/old.xlsx', 1, 1, '2025-04-01T00:00:00'),
+                                     ('b', '2025-03', '/in/new.xlsx', 1, 1, '2025-04-02T00:00:00');
+        INSERT INTO daily_hours VALUES ('Alice', '2025-03-03', '2025-03', 8, 6, 2, 1);
+        INSERT INTO category_hours VALUES ('Alice', '2025-03', 'Operational hours', 6);
+        PRAGMA user_version=1;
+    """)
+    conn.close()
+
+    conn = connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone() == (timesheet_history.SCHEMA_VERSION,)
+        assert conn.execute("SELECT source FROM daily_hours").fetchall() == [("/in/new.xlsx",)]
+        assert conn.execute("SELECT source FROM category_hours").fetchall() == [("/in/new.xlsx",)]
+    finally:
+        conn.close()
+
+
+def test_workbook_month_from_file_name_or_today():
+    assert workbook_month("input/202502_ZE TimeSheet_OpHours.xlsx") == (2025, 2)
+    assert workbook_month("timesheet.xlsx", today=datetime(2025, 3, 4)) == (2025, 2)
+    assert workbook_month("timesheet.xlsx", today=datetime(2025, 3, 20)) == (2025, 3)
+
+
+def test_workday_dates_skip_weekends_and_days_not_yet_booked():
+    headers = ["14, Fr", "15, Sa", "16, Su", "17, Mo", "18, Tu"]
+    assert workday_dates(headers, 2025, 3, today=date(2025, 3, 18)) == {"2025-03-14": 15, "2025-03-17": 18}
+
+
+def test_append_month_stores_the_pipeline_matrix_once(history, workbook):
+    path = workbook(2025, 3)
+    parsed = load_parsed_timesheet(path)
+    matrix = parsed.timesheet_matrix(workday_dates(parsed.day_headers, 2025, 3, TODAY))
+
+    assert append_workbook(history, path) == 5 * 21
+    assert append_workbook(history, path) == 0
+
+    assert history.execute("SELECT COUNT(*) FROM daily_hours").fetchone() == (5 * 21,)
+    assert imported_months(history)[["month", "workbooks", "users", "days"]].values.tolist() == [["2025-03", 1, 5, 21]]
+    days = user_days(history, matrix.users[0])
+    assert days["day"].tolist() == matrix.days
+    assert days["delta"].tolist() == matrix.delta[0].tolist()
+    assert days["submitted"].eq(bool(matrix.submitted[0])).all()
+
+
+def test_under_booked_days_over_the_last_months(history, workbook):
+    path = workbook(2025, 3)
+    append_workbook(history, path)
+    parsed = load_parsed_timesheet(path)
+    delta = parsed.timesheet_matrix(workday_dates(parsed.day_headers, 2025, 3, TODAY)).to_frame().drop(
+        columns="Submitted?")
+    expected = delta.where(delta > 0)
+
+    result = under_booked_days(history, months=12, today=TODAY).set_index("user")
+    assert result["under_booked_days"].to_dict() == expected.count(axis=1)[lambda days: days > 0].to_dict()
+    assert result["missing_hours"].to_dict() == expected.sum(axis=1)[lambda hours: hours > 0].astype(int).to_dict()
+    assert result["under_booked_days"].is_monotonic_decreasing
+
+    user = result.index[0]
+    assert under_booked_days(history, user=user, today=TODAY)["user"].tolist() == [user]
+    # March 2025 falls outside the last month seen from April 2025
+    assert under_booked_days(history, months=1, today=TODAY).empty
+
+
+def test_months_accumulate_and_category_totals_pivot_by_month(history, workbook):
+    for month in (1, 2):
+        append_workbook(history, workbook(2025, month, users=3, seed=month))
+
+    assert imported_months(history)["month"].tolist() == ["2025-01", "2025-02"]
+    totals = category_totals(history, months=12, today=TODAY)
+    assert list(totals.columns) == ["2025-01", "2025-02"]
+    assert totals.index.get_level_values("user").nunique() == 3
+    assert category_totals(history, months=2, today=TODAY).empty
+
+
+def test_changed_export_of_a_month_replaces_its_hours(history, workbook):
+    append_workbook(history, workbook(2025, 3, seed=1))
+    path = workbook(2025, 3, seed=2)
+    append_workbook(history, path)
+
+    parsed = load_parsed_timesheet(path)
+    matrix = parsed.timesheet_matrix(workday_dates(parsed.day_headers, 2025, 3, TODAY))
+    assert history.execute("SELECT COUNT(*) FROM daily_hours").fetchone() == (5 * 21,)
+    assert user_days(history, matrix.users[0])["actual"].tolist() == matrix.actual[0].tolist()
+    assert imported_months(history)["workbooks"].tolist() == [2]
+
+
+def test_changed_export_of_a_month_drops_users_it_no_longer_has(history, workbook):
+    append_workbook(history, workbook(2025, 3, users=5))
+    # Hours of the month from another team's workbook
+    with history:
+        history.execute("INSERT INTO daily_hours VALUES ('Zoe Other', '2025-03-03', '2025-03', 8, 0, 8, 1, "
+                        "'/exports/other_team.xlsx')")
+    append_workbook(history, workbook(2025, 3, users=4))
+
+    dropped = load_parsed_timesheet(workbook(2025, 3, users=5)).matrix.users[4]
+    assert user_days(history, dropped).empty
+    assert dropped not in category_totals(history, today=TODAY).index.get_level_values("user")
+    assert dropped not in under_booked_days(history, today=TODAY)["user"].tolist()
+    assert history.execute("SELECT COUNT(DISTINCT user) FROM daily_hours").fetchone() == (5,)
+    assert user_days(history, "Zoe Other")["delta"].tolist() == [8]
+
+
+def test_process_timesheet_appends_to_history(workbook, tmp_path):
+    db_path = str(tmp_path / "history.sqlite")
+    path = workbook(2025, 2)
+    process_timesheet(path, tmp_path / "output", verbose=False, history_db=db_path)
+    process_timesheet(path, tmp_path / "output", verbose=False, history_db=db_path)
+
+    conn = connect(db_path)
+    try:
+        assert imported_months(conn)[["month", "workbooks", "days"]].values.tolist() == [["2025-02", 1, 20]]
+    finally:
+        conn.close()
+
+
+def test_process_timesheet_hashes_the_workbook_once(workbook, tmp_path, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(timesheet_review, "content_hash", lambda file: hashed.append(file) or content_hash(file))
+    path = workbook(2025, 2)
+
+    process_timesheet(path, tmp_path / "output", verbose=False, history_db=str(tmp_path / "history.sqlite"))
+
+    assert hashed == [path]
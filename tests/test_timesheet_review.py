@@ -0,0 +1,252 @@
+import json
+import pstats
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import timesheet_review
+from timesheet_review import (OUTPUT_FORMATS, SUMMARY_CATEGORIES, build_timesheet_matrix,
+                              extract_user_row_mappings, find_timesheets, load_parsed_timesheet, load_timesheet,
+                              process_timesheet, process_timesheets, read_frame, read_timesheet_entries_by_users,
+                              summarise_time_distribution, write_frame)
+
+# Sheet columns (1-based) of the Vertec layout
+COL_NAME, COL_SUBMITTED, COL_CATEGORY, COL_FIRST_DAY = 1, 3, 12, 16
+DAY_HEADERS = ["3, Mo", "4, Tu", "5, We"]
+
+
+@pytest.fixture
+def timesheet_path(tmp_path):
+    """Write a small Sheet2 workbook in the Vertec layout with two users."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet2"
+    ws.cell(row=1, column=COL_NAME, value="Vertec Timesheet")
+    for offset, header in enumerate(DAY_HEADERS):
+        ws.cell(row=4, column=COL_FIRST_DAY + offset, value=header)
+    ws.cell(row=5, column=COL_NAME, value="User")
+    ws.cell(row=5, column=5, value="Role")  # outside the columns the pipeline reads
+    ws.cell(row=5, column=COL_FIRST_DAY + len(DAY_HEADERS), value="Total")
+
+    users = [
+        ("Alice", 1, [8, 8, 8], [8, 6, 8], {"Absences [h]": [0, 2, 0], "Operational hours": [8, 4, 8]}),
+        ("Bob", 0, [8, 8, 8], [9, 8, 0], {"Operational hours": [9, 8, 0]}),
+    ]
+    row = 6
+    for name, submitted, target, actual, categories in users:
+        ws.cell(row=row, column=COL_NAME, value=name)
+        ws.cell(row=row, column=COL_SUBMITTED, value=submitted)
+        for offset, (target_hours, actual_hours) in enumerate(zip(target, actual)):
+            ws.cell(row=row + 2, column=COL_FIRST_DAY + offset, value=target_hours)
+            ws.cell(row=row + 3, column=COL_FIRST_DAY + offset, value=actual_hours)
+        row += 4
+        for category, hours in categories.items():
+            ws.cell(row=row, column=COL_CATEGORY, value=category)
+            for offset, value in enumerate(hours):
+                ws.cell(row=row, column=COL_FIRST_DAY + offset, value=value)
+            row += 1
+
+    path = tmp_path / "timesheet.xlsx"
+    wb.save(path)
+    return path
+
+
+@pytest.fixture
+def date_col_mappings():
+    return {"Mon, Mar-03": 15, "Tue, Mar-04": 16, "Wed, Mar-05": 17}
+
+
+def test_load_timesheet_views(timesheet_path):
+    df, raw = load_timesheet(timesheet_path)
+
+    assert len(raw) == len(df) + 1
+    assert df.iloc[2, 15:].dropna().tolist() == DAY_HEADERS
+    assert raw.iloc[3, 15:].dropna().tolist() == DAY_HEADERS
+
+
+def test_load_timesheet_keeps_only_the_columns_it_reads(timesheet_path):
+    _, raw = load_timesheet(timesheet_path)
+    full = pd.read_excel(timesheet_path, sheet_name="Sheet2", header=None)
+
+    assert raw.shape[1] == COL_FIRST_DAY - 1 + len(DAY_HEADERS)
+    assert raw.iloc[:, 4].isna().all()
+    for col in [0, 2, 11] + list(range(15, raw.shape[1])):
+        pd.testing.assert_series_equal(raw[col], full[col], check_dtype=False)
+
+
+def test_pipeline_from_single_parse(timesheet_path, date_col_mappings):
+    df, raw = load_timesheet(timesheet_path)
+
+    user_rows, category_row_indices = extract_user_row_mappings(df)
+    assert user_rows == {"Alice": 4, "Bob": 10}
+    assert category_row_indices == {
+        "Alice": {"Absences [h]": 8, "Operational hours": 9},
+        "Bob": {"Operational hours": 14},
+    }
+
+    entries = read_timesheet_entries_by_users(df, user_rows, date_col_mappings)
+    assert entries.loc["Alice", list(date_col_mappings)].tolist() == [0, 2, 0]
+    assert entries.loc["Bob", list(date_col_mappings)].tolist() == [-1, 0, 8]
+    assert entries["Submitted?"].tolist() == [True, False]
+
+    summary = summarise_time_distribution(raw, category_row_indices, date_col_mappings)
+    assert summary.loc["Alice", "Absences [h]"] == 2
+    assert summary.loc["Alice", "Operational hours"] == 20
+    assert summary.loc["Bob", "Operational hours"] == 17
+    assert summary.loc["Bob", "Networking and administration, personal development"] == 0
+
+
+def test_timesheet_matrix_planes(timesheet_path, date_col_mappings):
+    df, _ = load_timesheet(timesheet_path)
+    user_rows, _ = extract_user_row_mappings(df)
+
+    matrix = build_timesheet_matrix(df, user_rows, date_col_mappings)
+
+    assert matrix.users == ["Alice", "Bob"]
+    assert matrix.target.dtype == np.int64
+    np.testing.assert_array_equal(matrix.actual, [[8, 6, 8], [9, 8, 0]])
+    np.testing.assert_array_equal(matrix.delta, matrix.target - matrix.actual)
+    np.testing.assert_array_equal(matrix.submitted, [True, False])
+
+
+def test_numeric_text_counts_for_target_and_actual_but_not_for_categories(timesheet_path, date_col_mappings):
+    wb = load_workbook(timesheet_path)
+    ws = wb["Sheet2"]
+    ws.cell(row=9, column=COL_FIRST_DAY + 1, value="6")  # Alice's actual hours on the second day
+    ws.cell(row=11, column=COL_FIRST_DAY, value="8")  # Alice's operational hours on the first day
+    wb.save(timesheet_path)
+    df, raw = load_timesheet(timesheet_path)
+    user_rows, category_row_indices = extract_user_row_mappings(df)
+
+    matrix = build_timesheet_matrix(df, user_rows, date_col_mappings)
+    summary = summarise_time_distribution(raw, category_row_indices, date_col_mappings)
+
+    np.testing.assert_array_equal(matrix.actual[0], [8, 6, 8])
+    assert summary.loc["Alice", "Operational hours"] == 12
+
+
+def test_summary_includes_extra_categories(timesheet_path, date_col_mappings):
+    df, raw = load_timesheet(timesheet_path)
+    categories = SUMMARY_CATEGORIES + ["Training"]
+    _, category_row_indices = extract_user_row_mappings(df, categories)
+    category_row_indices["Bob"]["Training"] = category_row_indices["Bob"].pop("Operational hours")
+
+    summary = summarise_time_distribution(raw, category_row_indices, date_col_mappings, categories)
+
+    assert summary.columns.tolist() == categories
+    assert summary.loc["Bob"].tolist() == [0, 0, 0, 17]
+    assert summary.loc["Alice", "Training"] == 0
+
+
+def test_process_timesheets_writes_per_file_and_rollup(timesheet_path, tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for month in ("202502", "202503"):
+        (input_dir / f"{month}_team.xlsx").write_bytes(timesheet_path.read_bytes())
+    (input_dir / "~$202503_team.xlsx").write_bytes(b"")
+    output_dir = tmp_path / "output"
+
+    file_paths = find_timesheets(str(input_dir))
+    entries, _ = process_timesheets(file_paths, str(output_dir), max_workers=2)
+
+    assert [Path(p).name for p in file_paths] == ["202502_team.xlsx", "202503_team.xlsx"]
+    assert sorted(entries) == ["202502_team", "202503_team"]
+    assert (output_dir / "202502_team" / "timesheet_entries.csv").exists()
+    assert (output_dir / "202503_team" / "time_distribution.csv").exists()
+    rollup = pd.read_csv(output_dir / "time_distribution.csv", index_col=[0, 1])
+    assert rollup.index.tolist() == [(month, user) for month in sorted(entries) for user in ("Alice", "Bob")]
+
+
+def test_process_timesheets_keeps_workbooks_with_the_same_stem_apart(timesheet_path, tmp_path):
+    input_dir = tmp_path / "exports"
+    for team in ("north", "south"):
+        (input_dir / team).mkdir(parents=True)
+        (input_dir / team / "team.xlsx").write_bytes(timesheet_path.read_bytes())
+    (input_dir / "north" / "team.xlsm").write_bytes(timesheet_path.read_bytes())
+    output_dir = tmp_path / "output"
+
+    file_paths = sorted(str(p) for p in input_dir.glob("*/team.xls*"))
+    entries, _ = process_timesheets(file_paths, str(output_dir), max_workers=2)
+
+    assert sorted(entries) == ["north/team.xlsm", "north/team.xlsx", "south/team"]
+    assert (output_dir / "north" / "team.xlsm" / "timesheet_entries.csv").exists()
+    assert (output_dir / "south" / "team" / "timesheet_entries.csv").exists()
+    rollup = pd.read_csv(output_dir / "timesheet_entries.csv", index_col=[0, 1])
+    assert len(rollup) == 3 * 2
+
+
+def test_batch_cli_exits_with_an_error_when_a_workbook_fails(timesheet_path, tmp_path, monkeypatch, capsys):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "202502_team.xlsx").write_bytes(timesheet_path.read_bytes())
+    (input_dir / "202503_team.xlsx").write_bytes(b"not a workbook")
+    monkeypatch.setattr("sys.argv", ["timesheet-review", str(input_dir), "--output-dir", str(tmp_path / "output"),
+                                     "--workers", "1"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        timesheet_review.main()
+
+    assert excinfo.value.code == 1
+    captured = capsys.readouterr()
+    assert "Failed to process 202503_team" in captured.err
+    assert "Processed 1 of 2 workbooks" in captured.out
+
+
+def test_parsed_timesheet_is_served_from_cache(timesheet_path, date_col_mappings, parse_cache_dir, monkeypatch):
+    parsed = load_parsed_timesheet(timesheet_path)
+    assert len(list(parse_cache_dir.glob("timesheet-*.arrow"))) == 1
+
+    def fail_to_load(*args, **kwargs):
+        raise AssertionError("workbook was re-parsed")
+
+    monkeypatch.setattr(timesheet_review, "load_timesheet", fail_to_load)
+    cached = load_parsed_timesheet(timesheet_path)
+
+    assert cached.user_row_mappings == parsed.user_row_mappings
+    assert cached.category_row_indices == parsed.category_row_indices
+    pd.testing.assert_frame_equal(cached.timesheet_matrix(date_col_mappings).to_frame(),
+                                  parsed.timesheet_matrix(date_col_mappings).to_frame())
+    pd.testing.assert_frame_equal(cached.time_distribution(date_col_mappings),
+                                  parsed.time_distribution(date_col_mappings))
+    assert cached.time_distribution(date_col_mappings).loc["Bob", "Operational hours"] == 17
+
+
+def test_roster_scan_keeps_last_block_of_a_repeated_name():
+    rows = [["User", None], ["Alice", None], [None, "Absences [h]"], ["  ", "Operational hours"],
+            ["Bob", None], [None, "Travel"], ["Alice", None], [None, "Operational hours"]]
+    df = pd.DataFrame([[name] + [None] * 10 + [category] for name, category in rows])
+
+    user_rows, category_row_indices = extract_user_row_mappings(df)
+
+    assert user_rows == {"Alice": 6, "Bob": 4}
+    assert category_row_indices == {"Alice": {"Operational hours": 7}, "Bob": {}}
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet", "arrow"])
+def test_output_formats_round_trip(timesheet_path, date_col_mappings, tmp_path, output_format):
+    parsed = load_parsed_timesheet(timesheet_path)
+    entries = parsed.timesheet_matrix(date_col_mappings).to_frame()
+
+    path = write_frame(entries, str(tmp_path / "timesheet_entries"), output_format)
+    restored = read_frame(path)
+
+    assert path.endswith(OUTPUT_FORMATS[output_format])
+    pd.testing.assert_frame_equal(restored, entries, check_dtype=output_format != "csv")
+
+
+def test_profile_writes_stage_trace_and_hottest_cprofile(timesheet_path, tmp_path):
+    output_dir = tmp_path / "out"
+    process_timesheet(timesheet_path, str(output_dir), verbose=False, profile=True, cprofile=True)
+
+    trace = json.loads((output_dir / timesheet_review.PROFILE_TRACE).read_text())
+    stages = {event["name"]: event for event in trace["traceEvents"] if event["ph"] == "X"}
+    assert list(stages)[:4] == ["content_hash", "read_cache", "load_timesheet", "extract_user_row_mappings"]
+    assert stages["read_cache"]["args"]["hit"] is False
+    assert stages["load_timesheet"]["args"]["columns"] == COL_FIRST_DAY - 1 + len(DAY_HEADERS)
+    assert stages["extract_user_row_mappings"]["args"]["users"] == 2
+    assert all(event["args"]["peak_rss"] > 0 and event["dur"] >= 0 for event in stages.values())
+    assert trace["otherData"]["workbook"] == str(timesheet_path)
+    assert pstats.Stats(str(output_dir / timesheet_review.PROFILE_STATS)).total_calls > 0
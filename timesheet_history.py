@@ -0,0 +1,303 @@
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+# Path of the history database, which the PL_TOOLKIT_HISTORY_DB environment variable overrides
+HISTORY_DB_ENV = "PL_TOOLKIT_HISTORY_DB"
+
+# Bump with every schema change, adding the statements that upgrade the previous version to MIGRATIONS;
+# stored as the database's user_version
+SCHEMA_VERSION = 2
+
+# Statements upgrading a database from each older version (the key) to the next one
+MIGRATIONS = {
+    # Hours remember the workbook they came from, so a newer export of it replaces them; existing
+    # hours are attributed to the last workbook imported for their month
+    1: (
+        "ALTER TABLE daily_hours ADD COLUMN source TEXT NOT NULL DEFAULT ''",
+        "ALTER TABLE category_hours ADD COLUMN source TEXT NOT NULL DEFAULT ''",
+        "UPDATE daily_hours SET source = (SELECT source FROM workbooks WHERE workbooks.month = daily_hours.month "
+        "ORDER BY imported_at DESC LIMIT 1) WHERE EXISTS (SELECT 1 FROM workbooks WHERE month = daily_hours.month)",
+        "UPDATE category_hours SET source = (SELECT source FROM workbooks WHERE workbooks.month = category_hours.month "
+        "ORDER BY imported_at DESC LIMIT 1) WHERE EXISTS (SELECT 1 FROM workbooks WHERE month = category_hours.month)",
+    ),
+}
+
+# Statements creating the current schema in a new database
+SCHEMA = (
+    """CREATE TABLE workbooks (
+        content_hash TEXT PRIMARY KEY,
+        month TEXT NOT NULL,
+        source TEXT NOT NULL,
+        users INTEGER NOT NULL,
+        days INTEGER NOT NULL,
+        imported_at TEXT NOT NULL
+    )""",
+    """CREATE TABLE daily_hours (
+        user TEXT NOT NULL,
+        day TEXT NOT NULL,
+        month TEXT NOT NULL,
+        target INTEGER NOT NULL,
+        actual INTEGER NOT NULL,
+        delta INTEGER NOT NULL,
+        submitted INTEGER NOT NULL,
+        source TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (user, day)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX daily_hours_day ON daily_hours (day)",
+    # Under-booked days are a small share of all days, and this index alone answers the under-booking queries
+    "CREATE INDEX daily_hours_under_booked ON daily_hours (user, day, delta) WHERE delta > 0",
+    """CREATE TABLE category_hours (
+        user TEXT NOT NULL,
+        month TEXT NOT NULL,
+        category TEXT NOT NULL,
+        hours REAL NOT NULL,
+        source TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (user, month, category)
+    ) WITHOUT ROWID""",
+)
+
+
+def default_history_db():
+    """Return the history database path, which the PL_TOOLKIT_HISTORY_DB environment variable overrides."""
+    return os.environ.get(HISTORY_DB_ENV, os.path.join(os.path.expanduser("~"), ".local", "share", "pl-toolkit",
+                                                       "timesheet_history.sqlite"))
+
+
+def connect(db_path=None):
+    """Open the history database, creating its schema in a new database and upgrading an older one.
+
+    Raises ValueError for a database written by a newer version of the toolkit, or one too old
+    to upgrade.
+    """
+    db_path = db_path or default_history_db()
+    if db_path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    # Batch runs append from several processes; writers wait for each other instead of failing
+    conn = sqlite3.connect(db_path, timeout=60)
+    try:
+        if db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+        _prepare_schema(conn)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _prepare_schema(conn):
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return
+    # BEGIN IMMEDIATE takes the write lock up front, so concurrent openers create or upgrade the schema once
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0 and not conn.execute("SELECT 1 FROM sqlite_master").fetchone():
+            for statement in SCHEMA:
+                conn.execute(statement)
+        elif version > SCHEMA_VERSION:
+            raise ValueError(f"Timesheet history schema version {version} is newer than this toolkit's "
+                             f"{SCHEMA_VERSION}; upgrade pl-toolkit")
+        else:
+            for step in range(version, SCHEMA_VERSION):
+                if step not in MIGRATIONS:
+                    raise ValueError(f"Timesheet history schema version {version} cannot be upgraded to "
+                                     f"{SCHEMA_VERSION}")
+                for statement in MIGRATIONS[step]:
+                    conn.execute(statement)
+        if version != SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def workbook_month(file_path, today=None):
+    """Return the (year, month) a workbook covers.
+
+    Vertec exports are named like "202502_ZE TimeSheet_OpHours.xlsx"; without that prefix the
+    month is the one select_workdays reports on: the previous month in the first five days of
+    a month, the current month after.
+    """
+    match = re.match(r"(20\d\d)(0[1-9]|1[0-2])", os.path.basename(str(getattr(file_path, "name", file_path))))
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    today = today or datetime.now()
+    if today.day <= 5:
+        today = today.replace(day=1) - timedelta(days=1)
+    return today.year, today.month
+
+
+def workday_dates(day_headers, year, month, today=None):
+    """Map the ISO date of each workday among the day headers (e.g. "3, Mo") to its sheet column.
+
+    Weekends are left out, and so are days from ``today`` (default: the current date) on,
+    which cannot have been booked yet.
+    """
+    today = today or date.today()
+    workdays = {}
+    for idx, header in enumerate(day_headers):
+        try:
+            day_str, weekday = header.split(", ")
+            day = date(year, month, int(day_str))
+        except ValueError:
+            continue
+        if weekday not in ["Sa", "Su"] and day < today:
+            workdays[day.isoformat()] = idx + 15
+    return workdays
+
+
+def source_name(source):
+    """The name a workbook (path or file object) is stored under: its absolute path."""
+    return os.path.abspath(str(getattr(source, "name", source)))
+
+
+def append_month(conn, parsed, year, month, source, digest, today=None):
+    """Store the workdays and category totals of a ParsedTimesheet as month ``year``-``month``.
+
+    Appending is idempotent: a workbook whose ``digest`` (content hash) was stored before is
+    skipped. A changed export of a month from the same ``source`` replaces everything stored
+    from that source for the month, so users or days it no longer has are dropped; other
+    workbooks of the month keep their hours. Returns the number of (user, day) rows written.
+    """
+    month_key = f"{year:04d}-{month:02d}"
+    source = source_name(source)
+    with conn:
+        if conn.execute("SELECT 1 FROM workbooks WHERE content_hash = ? AND month = ?",
+                        (digest, month_key)).fetchone():
+            return 0
+
+        # Bounded by day rather than by month, so the delete is served by the index on day
+        next_month = date(year + month // 12, month % 12 + 1, 1).isoformat()
+        conn.execute("DELETE FROM daily_hours WHERE day >= ? AND day < ? AND source = ?",
+                     (f"{month_key}-01", next_month, source))
+        conn.execute("DELETE FROM category_hours WHERE month = ? AND source = ?", (month_key, source))
+
+        workdays = workday_dates(parsed.day_headers, year, month, today)
+        matrix = parsed.timesheet_matrix(workdays)
+        rows = [
+            (user, day, month_key, int(target), int(actual), int(target - actual), int(submitted), source)
+            for user, targets, actuals, submitted in zip(matrix.users, matrix.target, matrix.actual, matrix.submitted)
+            for day, target, actual in zip(matrix.days, targets, actuals)
+        ]
+        conn.executemany(
+            "INSERT INTO daily_hours (user, day, month, target, actual, delta, submitted, source) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (user, day) DO UPDATE SET month = excluded.month, target = excluded.target, "
+            "actual = excluded.actual, delta = excluded.delta, submitted = excluded.submitted, "
+            "source = excluded.source",
+            rows,
+        )
+
+        distribution = parsed.time_distribution(workdays)
+        conn.executemany(
+            "INSERT INTO category_hours (user, month, category, hours, source) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (user, month, category) DO UPDATE SET hours = excluded.hours, source = excluded.source",
+            [(user, month_key, category, float(hours), source)
+             for (user, category), hours in distribution.stack().items()],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO workbooks (content_hash, month, source, users, days, imported_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (digest, month_key, source, len(matrix.users), len(workdays),
+             datetime.now().isoformat(timespec="seconds")),
+        )
+    return len(rows)
+
+
+def months_ago(months, today=None):
+    """ISO date of the first day of the month ``months - 1`` months before ``today``'s, so ``months`` months in all."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return date(index // 12, index % 12 + 1, 1).isoformat()
+
+
+def under_booked_days(conn, months=12, user=None, today=None):
+    """Workdays each user booked fewer hours than their target over the last ``months`` months.
+
+    One row per user with under-booked days, most first: the number of days, the missing hours
+    and the first and last such day.
+    """
+    query = ("SELECT user, COUNT(*) AS under_booked_days, SUM(delta) AS missing_hours, "
+             "MIN(day) AS first_day, MAX(day) AS last_day "
+             "FROM daily_hours WHERE delta > 0 AND day >= ?")
+    params = [months_ago(months, today)]
+    if user:
+        query += " AND user = ?"
+        params.append(user)
+    query += " GROUP BY user ORDER BY under_booked_days DESC, user"
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def user_days(conn, user, since=None, until=None):
+    """The stored workdays of one user, oldest first, optionally between ISO dates ``since`` and ``until``."""
+    query = "SELECT day, target, actual, delta, submitted FROM daily_hours WHERE user = ? AND day >= ? AND day <= ?"
+    frame = pd.read_sql_query(query + " ORDER BY day", conn, params=[user, since or "", until or "9999"])
+    frame["submitted"] = frame["submitted"].astype(bool)
+    return frame
+
+
+def category_totals(conn, months=12, user=None, today=None):
+    """Hours per user and category over the last ``months`` months, one column per month."""
+    query = "SELECT user, category, month, hours FROM category_hours WHERE month >= ?"
+    params = [months_ago(months, today)[:7]]
+    if user:
+        query += " AND user = ?"
+        params.append(user)
+    frame = pd.read_sql_query(query, conn, params=params)
+    return frame.pivot_table(index=["user", "category"], columns="month", values="hours", aggfunc="sum",
+                             fill_value=0)
+
+
+def imported_months(conn):
+    """Each stored month with its number of workbooks, users and days."""
+    return pd.read_sql_query(
+        "SELECT month, COUNT(*) AS workbooks, MAX(users) AS users, MAX(days) AS days, MAX(imported_at) AS last_import "
+        "FROM workbooks GROUP BY month ORDER BY month", conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the timesheet history that timesheet-review --history builds')
+    parser.add_argument('--db', type=str, default=None,
+                        help=f'Path of the history database (default: ${HISTORY_DB_ENV} or {default_history_db()})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    under_booked = commands.add_parser('under-booked', help='Under-booked workdays per user')
+    under_booked.add_argument('--months', type=int, default=12, help='Number of months back (default: 12)')
+    under_booked.add_argument('--user', type=str, default=None, help='Only this user')
+    user = commands.add_parser('user', help="One user's stored workdays")
+    user.add_argument('name', help='Full name as in the workbook')
+    user.add_argument('--since', type=str, default=None, help='First day, as YYYY-MM-DD')
+    user.add_argument('--until', type=str, default=None, help='Last day, as YYYY-MM-DD')
+    categories = commands.add_parser('categories', help='Hours per user, category and month')
+    categories.add_argument('--months', type=int, default=12, help='Number of months back (default: 12)')
+    categories.add_argument('--user', type=str, default=None, help='Only this user')
+    commands.add_parser('months', help='Months stored so far')
+    args = parser.parse_args()
+
+    db_path = args.db or default_history_db()
+    if not os.path.exists(db_path):
+        print(f"No timesheet history at {db_path}; run timesheet-review with --history first", file=sys.stderr)
+        sys.exit(1)
+    conn = connect(db_path)
+    try:
+        if args.command == 'under-booked':
+            result = under_booked_days(conn, args.months, args.user)
+        elif args.command == 'user':
+            result = user_days(conn, args.name, args.since, args.until)
+        elif args.command == 'categories':
+            result = category_totals(conn, args.months, args.user)
+        else:
+            result = imported_months(conn)
+    finally:
+        conn.close()
+    print(result.to_string(index=args.command == 'categories') if not result.empty else "No matching history")
+
+
+if __name__ == "__main__":
+    main()
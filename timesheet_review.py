@@ -1,48 +1,237 @@
 import argparse
+import glob
+import json
+import os
 import pprint
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from operator import itemgetter
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from openpyxl import load_workbook
+from pyarrow import feather
 
+from parse_cache import cache_key, content_hash, read_table, write_table
+from profiling import Profiler, profiled
+from timesheet_history import append_month, connect, default_history_db, workbook_month
 
-def extract_user_row_mappings(df):
-    """Extract team members and their corresponding row indices from the timesheet."""
-    user_row_index = df[df.iloc[:, 0] == 'User'].index
-    summary_categories = ["Absences [h]", "Networking and administration, personal development", "Operational hours"]
+# Bump whenever the parse output changes, so stale cache entries are no longer read
+PARSER_VERSION = 1
+# 0-based sheet columns the pipeline reads: Col A, Col C, Col L and the first day, Col P
+NAME_COL, SUBMITTED_COL, CATEGORY_COL, FIRST_DAY_COL = 0, 2, 11, 15
+# File extension of each output format the CLI can write
+OUTPUT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+SUMMARY_CATEGORIES = ["Absences [h]", "Networking and administration, personal development", "Operational hours"]
+# Files --profile writes next to a workbook's outputs: the stage trace and the slowest stage's cProfile stats
+PROFILE_TRACE = "timesheet_profile.json"
+PROFILE_STATS = "timesheet_profile.prof"
+
+
+@dataclass
+class TimesheetMatrix:
+    """Target and actual hours as integer arrays of users (rows) by workdays (columns)."""
+    users: list
+    days: list
+    columns: np.ndarray  # sheet column index of each day
+    target: np.ndarray
+    actual: np.ndarray
+    submitted: np.ndarray
+
+    @property
+    def delta(self):
+        """Target minus actual hours; positive where a day is under-booked."""
+        return self.target - self.actual
+
+    def to_frame(self):
+        """Return the delta plane as a DataFrame with the "Submitted?" flag appended."""
+        frame = pd.DataFrame(self.delta, index=self.users, columns=self.days)
+        frame["Submitted?"] = self.submitted
+        return frame
+
+    def select(self, date_col_mappings):
+        """Return the sub-matrix of the given workdays, labelled with their date keys."""
+        positions = pd.Index(self.columns).get_indexer(list(date_col_mappings.values()))
+        return TimesheetMatrix(
+            users=self.users,
+            days=list(date_col_mappings),
+            columns=self.columns[positions],
+            target=self.target[:, positions],
+            actual=self.actual[:, positions],
+            submitted=self.submitted,
+        )
+
+
+@dataclass
+class ParsedTimesheet:
+    """What the pipeline extracts from a workbook, covering all of its day columns.
+
+    Workdays depend on the current date, so they are selected from ``day_headers`` when
+    the entries and time distribution are requested rather than at parse time.
+    """
+    user_row_mappings: dict
+    category_row_indices: dict
+    day_headers: list
+    matrix: TimesheetMatrix  # every day column, labelled by its header
+    category_hours: pd.DataFrame  # (user, category) rows by sheet column index
+
+    def date_col_mappings(self):
+        """Return the valid workdays, as extract_date_col_mappings does."""
+        return select_workdays(self.day_headers)
+
+    def timesheet_matrix(self, date_col_mappings):
+        """Return the timesheet matrix of the given workdays."""
+        return self.matrix.select(date_col_mappings)
+
+    def time_distribution(self, date_col_mappings, summary_categories=SUMMARY_CATEGORIES):
+        """Return the per-user category totals over the given workdays."""
+        return total_category_hours(self.category_hours[list(date_col_mappings.values())],
+                                    list(self.category_row_indices), summary_categories)
+
+    def to_arrow(self):
+        """Convert to an Arrow table of hour planes, with the mappings in its schema metadata."""
+        day_columns = [str(col) for col in self.matrix.columns]
+        users = self.matrix.users
+        planes = pd.concat([
+            pd.DataFrame({"user": users, "plane": "target", "category": None}),
+            pd.DataFrame({"user": users, "plane": "actual", "category": None}),
+            self.category_hours.index.to_frame(index=False).assign(plane="category"),
+        ], ignore_index=True)[["user", "plane", "category"]]
+        hours = np.vstack([self.matrix.target, self.matrix.actual, self.category_hours.to_numpy()])
+        planes = pd.concat([planes, pd.DataFrame(hours, columns=day_columns, dtype=np.float64)], axis=1)
+
+        metadata = {
+            "user_row_mappings": {user: int(row) for user, row in self.user_row_mappings.items()},
+            "category_row_indices": {user: {category: int(row) for category, row in categories.items()}
+                                     for user, categories in self.category_row_indices.items()},
+            "day_headers": self.day_headers,
+            "submitted": self.matrix.submitted.tolist(),
+        }
+        table = pa.Table.from_pandas(planes, preserve_index=False)
+        return table.replace_schema_metadata({b"timesheet": json.dumps(metadata)})
+
+    @classmethod
+    def from_arrow(cls, table):
+        """Rebuild a ParsedTimesheet from a table produced by ``to_arrow``."""
+        metadata = json.loads(table.schema.metadata[b"timesheet"])
+        planes = table.to_pandas()
+        day_columns = planes.columns[3:]
+        hours = planes[day_columns].to_numpy(np.float64)
+        columns = np.array([int(col) for col in day_columns], dtype=np.intp)
+        is_category = (planes["plane"] == "category").to_numpy()
+
+        matrix = TimesheetMatrix(
+            users=list(metadata["user_row_mappings"]),
+            days=metadata["day_headers"],
+            columns=columns,
+            target=hours[(planes["plane"] == "target").to_numpy()].astype(np.int64),
+            actual=hours[(planes["plane"] == "actual").to_numpy()].astype(np.int64),
+            submitted=np.array(metadata["submitted"], dtype=bool),
+        )
+        category_hours = pd.DataFrame(
+            hours[is_category],
+            index=pd.MultiIndex.from_frame(planes.loc[is_category, ["user", "category"]]),
+            columns=columns,
+        )
+        return cls(metadata["user_row_mappings"], metadata["category_row_indices"], metadata["day_headers"],
+                   matrix, category_hours)
+
+
+def load_timesheet(file_path, sheet_name="Sheet2"):
+    """Read the timesheet sheet once and return its header-offset and raw views.
+
+    The header-offset view lines up with ``pd.read_excel(..., skiprows=0)`` (the first
+    sheet row is taken as the header) and is what the extract functions index into. The
+    raw view keeps every sheet row, as ``load_workbook(data_only=True)`` does, and is
+    what ``summarise_time_distribution`` expects. Both hold the cached cell values of
+    formulas and share the memory of a single parse.
+
+    The sheet is streamed in read-only mode and only the columns the pipeline reads are
+    kept: names (Col A), the submitted flag (Col C), categories (Col L) and the day band
+    from Col P to the last day header. Every other column is left blank in the views, so
+    column positions still match the sheet and memory stays flat on wide or long sheets.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        worksheet = workbook[sheet_name]
+        # The day headers are on sheet row 4 (row 2 of the header-offset view)
+        day_headers = next(worksheet.iter_rows(min_row=4, max_row=4, min_col=FIRST_DAY_COL + 1,
+                                               values_only=True), ())
+        day_count = max((idx + 1 for idx, value in enumerate(day_headers) if value is not None), default=0)
+        kept_cols = [NAME_COL, SUBMITTED_COL, CATEGORY_COL] + list(range(FIRST_DAY_COL, FIRST_DAY_COL + day_count))
+        max_col = kept_cols[-1] + 1
+
+        pick = itemgetter(*kept_cols)
+        rows = [pick(row) for row in worksheet.iter_rows(min_col=1, max_col=max_col, values_only=True)]
+    finally:
+        workbook.close()
+
+    block = np.array(rows, dtype=object).reshape(len(rows), len(kept_cols))
+    block[pd.isna(block)] = np.nan
+    raw = pd.DataFrame(dict(zip(kept_cols, block.T))).reindex(columns=range(max_col))
+    df = raw.iloc[1:]
+    df.index = pd.RangeIndex(len(df))  # relabel without copying the sliced data
+    return df, raw
+
+
+def extract_user_row_mappings(df, summary_categories=SUMMARY_CATEGORIES):
+    """Extract team members and their corresponding row indices from the timesheet.
+
+    Rows after the "User" marker with a name in Col A start a user's block; the rows
+    below it whose Col L holds one of ``summary_categories`` are that user's category
+    rows. Both are found with column-wide masks, and a forward fill of the user row
+    positions assigns each category row to its owner.
+    """
+    user_row_index = df[df.iloc[:, NAME_COL] == 'User'].index
 
     if not user_row_index.empty:
-        # Extract names from the next rows until an empty row is encountered
         start_index = user_row_index[0] + 1
-        user_rows = {}
-        category_row_indices = {}  # Store category row indices for each user
-        cur_name = None
-
-        for row_idx in range(start_index, len(df)):
-            name = str(df.iloc[row_idx, 0]).strip()
-            if name and name.lower() != 'nan' and not pd.isna(name):
-                cur_name = name
-                user_rows[name] = row_idx
-                category_row_indices[name] = {}
-            else:
-                # Identify category row indices
-                category = str(df.iloc[row_idx, 11]).strip()  # Col L
-                if category in summary_categories:
-                    category_row_indices[cur_name][category] = row_idx
+        positions = np.arange(start_index, len(df))
+        name_cells = df.iloc[start_index:, NAME_COL]
+        names = name_cells.astype(str).str.strip()
+        is_user = (name_cells.notna() & (names != "") & (names.str.lower() != "nan")).to_numpy()
+        names = names.to_numpy()
+        owner_rows = pd.Series(np.where(is_user, positions, np.nan)).ffill().to_numpy()
+        categories = df.iloc[start_index:, CATEGORY_COL].astype(str).str.strip().to_numpy()
+        is_category = ~is_user & np.isin(categories, list(summary_categories)) & ~np.isnan(owner_rows)
 
-                continue
+        # A repeated name keeps its last row, as does everything keyed on it
+        user_rows = dict(zip(names[is_user].tolist(), positions[is_user].tolist()))
+        category_row_indices = {name: {} for name in user_rows}  # Store category row indices for each user
+        owners = {row_idx: name for name, row_idx in user_rows.items()}
+        for owner_row, category, row_idx in zip(owner_rows[is_category].astype(int).tolist(),
+                                                categories[is_category].tolist(), positions[is_category].tolist()):
+            if owner_row in owners:
+                category_row_indices[owners[owner_row]][category] = row_idx
 
         return user_rows, category_row_indices
 
     return {}, {}
 
 
-def extract_date_col_mappings(df):
+def extract_day_headers(df):
+    """Extract the day header labels (e.g. "3, Mo") of the timesheet."""
+    return df.iloc[2, 15:].dropna().astype(str).tolist()  # Start at Col P (index 15) and go to Col AT (index 45)
+
+
+def extract_date_col_mappings(df, today=None):
     """Extract valid workdays from the timesheet, excluding weekends and limiting to last working Friday."""
-    columns = df.iloc[2, 15:].dropna().astype(str).tolist()  # Start at Col P (index 15) and go to Col AT (index 45)
+    return select_workdays(extract_day_headers(df), today)
+
+
+def select_workdays(day_headers, today=None):
+    """Map the valid workdays among the day headers to their column indices.
+
+    Days are taken relative to ``today``, which defaults to the current date.
+    """
     valid_days = {}
 
-    today = datetime.now()
+    today = today or datetime.now()
     previous_month = False
     if today.day <= 5:
         # Take last day of previous month if today is the first week of the month
@@ -50,7 +239,7 @@ def extract_date_col_mappings(df):
         last_day = today.replace(day=1) - timedelta(days=1)
         today = last_day
 
-    for idx, col in enumerate(columns):  # Track column index
+    for idx, col in enumerate(day_headers):  # Track column index
         try:
             day_str, weekday = col.split(", ")  # Extract numeric day and weekday
             day = int(day_str)  # Convert day to integer
@@ -64,67 +253,341 @@ def extract_date_col_mappings(df):
     return valid_days
 
 
+# Tells text cells apart in an object array without a Python-level loop over the cells
+_is_text = np.frompyfunc(lambda cell: isinstance(cell, str), 1, 1)
+
+
+def _to_numbers(block):
+    """Convert a block of sheet cells to floats, with blanks and text as NaN.
+
+    Only cells holding numbers count: text is NaN even when it reads as a number (e.g. "8"),
+    as the per-cell category sums always treated it.
+    """
+    values = np.asarray(pd.to_numeric(block.ravel(), errors="coerce"), dtype=np.float64)
+    if block.dtype == object and values.size:
+        values[_is_text(block.ravel()).astype(bool)] = np.nan
+    return values.reshape(block.shape)
+
+
+def _to_hours(block):
+    """Convert a block of sheet cells to whole hours, treating blanks and non-numeric text as 0.
+
+    Numeric text (e.g. "8") counts, as ``int(cell)`` did for target and actual hours.
+    """
+    values = np.asarray(pd.to_numeric(block.ravel(), errors="coerce"), dtype=np.float64).reshape(block.shape)
+    return np.trunc(np.nan_to_num(values)).astype(np.int64)
+
+
+def build_timesheet_matrix(df, user_row_mappings, date_col_mappings):
+    """Gather target and actual hours of every user on every valid workday.
+
+    Target hours sit two rows below a user's row and actual hours three rows below, so
+    each plane is a single fancy-indexed gather over the workday columns.
+    """
+    rows = np.fromiter(user_row_mappings.values(), dtype=np.intp, count=len(user_row_mappings))
+    columns = np.fromiter(date_col_mappings.values(), dtype=np.intp, count=len(date_col_mappings))
+    day_block = df.iloc[:, columns].to_numpy()
+
+    return TimesheetMatrix(
+        users=list(user_row_mappings),
+        days=list(date_col_mappings),
+        columns=columns,
+        target=_to_hours(day_block[rows + 2]),
+        actual=_to_hours(day_block[rows + 3]),
+        submitted=df.iloc[rows, 2].to_numpy() == 1,
+    )
+
+
 def read_timesheet_entries_by_users(df, user_row_mappings, date_col_mappings):
     """Read timesheet entries for each user by valid workdays."""
-    timesheet_data = pd.DataFrame(index=user_row_mappings.keys(), columns=date_col_mappings.keys())
+    return build_timesheet_matrix(df, user_row_mappings, date_col_mappings).to_frame()
+
+
+def gather_category_hours(df, category_row_indices, date_col_mappings):
+    """Gather the hours on each user's category rows, one row per (user, category) and column per day.
+
+    All category rows are taken over the workday columns as one block and coerced to
+    numbers, with text and blanks as NaN.
+    """
+    pairs = [(user, category, row_idx) for user, categories in category_row_indices.items()
+             for category, row_idx in categories.items()]
+    users, row_categories, row_indices = (list(values) for values in zip(*pairs)) if pairs else ([], [], [])
+    rows = np.asarray(row_indices, dtype=np.intp) + 1
+    columns = np.fromiter(date_col_mappings.values(), dtype=np.intp, count=len(date_col_mappings))
+
+    return pd.DataFrame(
+        _to_numbers(df.iloc[:, columns].to_numpy()[rows]),
+        index=pd.MultiIndex.from_arrays([users, row_categories], names=["user", "category"]),
+        columns=columns,
+    )
+
 
-    for user, row_idx in user_row_mappings.items():
-        for day_str, col_idx in date_col_mappings.items():
-            target_hours = df.iloc[row_idx + 2, col_idx]
-            target_hours = int(target_hours) if pd.notna(target_hours) else 0
-            actual_hours = df.iloc[row_idx + 3, col_idx]
-            actual_hours = int(actual_hours) if pd.notna(actual_hours) else 0
-            timesheet_data.at[user, day_str] = target_hours - actual_hours
-        timesheet_data.at[user, "Submitted?"] = df.iloc[row_idx, 2] == 1
+def total_category_hours(category_hours, users, summary_categories=SUMMARY_CATEGORIES):
+    """Sum gathered category hours into a users x categories frame in a single reduction.
 
-    return timesheet_data
+    Categories found beyond ``summary_categories`` get columns of their own.
+    """
+    totals = np.nansum(category_hours.to_numpy(), axis=1)
+    row_categories = category_hours.index.get_level_values("category")
 
+    categories = list(summary_categories)
+    categories += [category for category in dict.fromkeys(row_categories) if category not in categories]
+    summary = (pd.Series(totals, index=category_hours.index, dtype=np.float64)
+               .unstack(fill_value=0)
+               .reindex(index=users, columns=categories, fill_value=0))
+    summary.index.name = None
+    summary.columns.name = None
+    # Keep whole-hour totals as integers, as the per-cell sum used to produce
+    return summary.apply(lambda col: col.astype(np.int64) if (col % 1 == 0).all() else col)
 
-def summarise_time_distribution(df, category_row_indices, date_col_mappings):
+
+def summarise_time_distribution(df, category_row_indices, date_col_mappings, summary_categories=SUMMARY_CATEGORIES):
     """Summarise the hours each user spent separately on predefined categories."""
-    summary_data = {
-        user: {"Absences [h]": 0, "Networking and administration, personal development": 0, "Operational hours": 0} for
-        user in category_row_indices}
+    category_hours = gather_category_hours(df, category_row_indices, date_col_mappings)
+    return total_category_hours(category_hours, list(category_row_indices), summary_categories)
 
-    for user, categories in category_row_indices.items():
-        for category, row_idx in categories.items():
-            # print(f"User: {user}, Category: {category}->")
-            # for _, col_idx in date_col_mappings.items():
-            #     print(f"[{row_idx+1}:{col_idx}]: {str(df.iloc[row_idx+1, col_idx])}")
 
-            cell_values = df.iloc[row_idx + 1, [col_idx for _, col_idx in date_col_mappings.items()]]
-            total_hours = cell_values[cell_values.apply(lambda x: isinstance(x, (int, float)) and pd.notna(x))].sum()
-            summary_data[user][category] = total_hours
+def extract_timesheet(df, raw, profiler=None):
+    """Extract a ParsedTimesheet from the two views returned by ``load_timesheet``.
 
-    return pd.DataFrame.from_dict(summary_data, orient='index')
+    With a ``profiler`` (see profiling.Profiler), each step is recorded as a stage.
+    """
+    with profiled(profiler, "extract_user_row_mappings", rows=len(df)) as stage:
+        user_row_mappings, category_row_indices = extract_user_row_mappings(df)
+        stage.counts["users"] = len(user_row_mappings)
+    with profiled(profiler, "extract_day_headers") as stage:
+        day_headers = extract_day_headers(df)
+        stage.counts["days"] = len(day_headers)
+    day_columns = dict(zip(day_headers, range(15, 15 + len(day_headers))))
+    with profiled(profiler, "build_timesheet_matrix", users=len(user_row_mappings), days=len(day_columns)):
+        matrix = build_timesheet_matrix(df, user_row_mappings, day_columns)
+    with profiled(profiler, "gather_category_hours", days=len(day_columns)) as stage:
+        category_hours = gather_category_hours(raw, category_row_indices, day_columns)
+        stage.counts["category_rows"] = len(category_hours)
+    return ParsedTimesheet(user_row_mappings, category_row_indices, day_headers, matrix, category_hours)
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Process Vertec timesheet')
-    parser.add_argument('file_path', type=str, help='Path to the input Excel file')
-    file_path = parser.parse_args().file_path
+def _load_and_extract(file, profiler=None):
+    with profiled(profiler, "load_timesheet") as stage:
+        df, raw = load_timesheet(file)
+        stage.counts.update(rows=raw.shape[0], columns=raw.shape[1])
+    return extract_timesheet(df, raw, profiler)
+
+
+def load_parsed_timesheet(file, use_cache=True, cache_dir=None, profiler=None, digest=None):
+    """Parse a workbook (path or binary file object), reusing the on-disk cache when possible.
+
+    Entries are keyed by the workbook's content hash and PARSER_VERSION, so a repeat
+    analysis of the same bytes is served from the cache without opening the workbook.
+    Pass ``digest`` when the content hash is already known, so the file is not hashed again.
+    """
+    if not use_cache:
+        return _load_and_extract(file, profiler)
+
+    if digest is None:
+        with profiled(profiler, "content_hash"):
+            digest = content_hash(file)
+    key = cache_key(digest, "timesheet", PARSER_VERSION)
+    with profiled(profiler, "read_cache") as stage:
+        table = read_table(key, cache_dir)
+        stage.counts["hit"] = table is not None
+        if table is not None:
+            return ParsedTimesheet.from_arrow(table)
+
+    parsed = _load_and_extract(file, profiler)
+    with profiled(profiler, "write_cache"):
+        write_table(key, parsed.to_arrow(), cache_dir)
+    return parsed
+
+
+def write_frame(frame, path_stem, output_format="csv"):
+    """Write a result frame to ``path_stem`` plus the extension of ``output_format``.
+
+    Parquet and Arrow IPC keep the index and the column dtypes (such as the boolean
+    "Submitted?" flag), so the dashboard reads them back without re-parsing text.
+    """
+    path = path_stem + OUTPUT_FORMATS[output_format]
+    if output_format == "parquet":
+        frame.to_parquet(path, index=True)
+    elif output_format == "arrow":
+        feather.write_feather(pa.Table.from_pandas(frame, preserve_index=True), path)
+    else:
+        frame.to_csv(path, index=True)
+    return path
+
+
+def read_frame(file):
+    """Read a frame written by ``write_frame``, picking the format from the file name's extension."""
+    extension = os.path.splitext(str(getattr(file, "name", file)))[1].lower()
+    if extension == ".parquet":
+        return pd.read_parquet(file)
+    if extension in (".arrow", ".feather"):
+        return feather.read_table(file).to_pandas()
+    return pd.read_csv(file, index_col=0)
+
+
+def process_timesheet(file_path, output_dir="output", verbose=True, use_cache=True, output_format="csv",
+                      profile=False, cprofile=False, history_db=None):
+    """Process one Vertec workbook and write its timesheet entries and time distribution.
 
+    With ``history_db``, the workbook's month is also appended to that timesheet history
+    database (see timesheet_history.append_month); appending a workbook twice is a no-op.
+
+    With ``profile``, the wall time, CPU time, peak memory and row/column counts of each stage
+    are written as a trace (see profiling.Profiler.to_trace) to ``<output_dir>/PROFILE_TRACE``;
+    ``cprofile`` also dumps the cProfile stats of the slowest stage to ``PROFILE_STATS`` there.
+    """
+    profiler = Profiler(cprofile=cprofile) if profile or cprofile else None
+    # Hashed once, for both the parse cache and the history
+    digest = None
+    if use_cache or history_db:
+        with profiled(profiler, "content_hash"):
+            digest = content_hash(file_path)
     # Load and process the timesheet
-    df = pd.read_excel(file_path, sheet_name="Sheet2", skiprows=0)
+    parsed = load_parsed_timesheet(file_path, use_cache, profiler=profiler, digest=digest)
 
     pp = pprint.PrettyPrinter(indent=4)
 
     # Extract data
-    user_row_mappings, category_row_indices = extract_user_row_mappings(df)
-    # pp.pprint(user_row_mappings)
-    pp.pprint(category_row_indices)
-    date_col_mappings = extract_date_col_mappings(df)
+    # pp.pprint(parsed.user_row_mappings)
+    if verbose:
+        pp.pprint(parsed.category_row_indices)
+    with profiled(profiler, "select_workdays", days=len(parsed.day_headers)) as stage:
+        date_col_mappings = parsed.date_col_mappings()
+        stage.counts["workdays"] = len(date_col_mappings)
     # print(f"Days to check: {date_col_mappings}")
-    timesheet_entries = read_timesheet_entries_by_users(df, user_row_mappings, date_col_mappings)
-    print(timesheet_entries)
-    # Load workbook with data_only=True to get cell values (not formulas)
-    worksheet = load_workbook(filename=file_path, data_only=True)["Sheet2"]  # Replace with your sheet name
-    dfs = pd.DataFrame(list(worksheet.iter_rows(values_only=True)))
-    summary_data = summarise_time_distribution(dfs, category_row_indices, date_col_mappings)
-    print(summary_data)
-
-    timesheet_entries.to_csv("output/timesheet_entries.csv", index=True)
-    summary_data.to_csv("output/time_distribution.csv", index=True)
+    with profiled(profiler, "timesheet_entries", users=len(parsed.user_row_mappings), days=len(date_col_mappings)):
+        timesheet_matrix = parsed.timesheet_matrix(date_col_mappings)
+        timesheet_entries = timesheet_matrix.to_frame()
+    with profiled(profiler, "time_distribution", category_rows=len(parsed.category_hours)):
+        summary_data = parsed.time_distribution(date_col_mappings)
+    if verbose:
+        print(timesheet_entries)
+        print(summary_data)
+
+    os.makedirs(output_dir, exist_ok=True)
+    with profiled(profiler, "write_outputs", rows=len(timesheet_entries) + len(summary_data), format=output_format):
+        write_frame(timesheet_entries, os.path.join(output_dir, "timesheet_entries"), output_format)
+        write_frame(summary_data, os.path.join(output_dir, "time_distribution"), output_format)
+
+    if history_db:
+        year, month = workbook_month(file_path)
+        with profiled(profiler, "append_history", users=len(parsed.user_row_mappings)) as stage:
+            conn = connect(history_db)
+            try:
+                stage.counts["rows"] = append_month(conn, parsed, year, month, file_path, digest)
+            finally:
+                conn.close()
+        if verbose:
+            print(f"Appended {year:04d}-{month:02d} to the timesheet history at {history_db}")
+
+    if profiler:
+        trace_path = profiler.write_trace(os.path.join(output_dir, PROFILE_TRACE), workbook=str(file_path),
+                                          use_cache=use_cache, output_format=output_format)
+        if verbose:
+            print(profiler.summary())
+            print(f"Profile trace written to {trace_path}")
+        if cprofile:
+            stage_name = profiler.dump_hottest_profile(os.path.join(output_dir, PROFILE_STATS))
+            if verbose:
+                print(f"cProfile stats of the slowest stage ({stage_name}) written to "
+                      f"{os.path.join(output_dir, PROFILE_STATS)}")
+    return timesheet_entries, summary_data
+
+
+def find_timesheets(path):
+    """Return the workbooks a file path, directory or glob pattern refers to."""
+    if os.path.isdir(path):
+        path = os.path.join(path, "*.xlsx")
+    # Skip the lock files Excel leaves next to open workbooks
+    return sorted(p for p in glob.glob(path) if not os.path.basename(p).startswith("~$"))
+
+
+def source_names(file_paths):
+    """Name each workbook by its path relative to the workbooks' common directory, without the extension.
+
+    The extension is kept where two workbooks would share a name otherwise (e.g. "a.xlsx" and "a.xls"),
+    so every workbook gets its own output directory and roll-up key.
+    """
+    paths = [Path(os.path.abspath(file_path)) for file_path in file_paths]
+    if len(set(paths)) < len(paths):
+        raise ValueError("The same workbook is listed more than once")
+    parent = os.path.commonpath([path.parent for path in paths]) if paths else ""
+    relative = [path.relative_to(parent) for path in paths]
+    stems = Counter(path.with_suffix("").as_posix() for path in relative)
+    return [path.with_suffix("").as_posix() if stems[path.with_suffix("").as_posix()] == 1 else path.as_posix()
+            for path in relative]
+
+
+def process_timesheets(file_paths, output_dir="output", max_workers=None, use_cache=True, output_format="csv",
+                       profile=False, cprofile=False, history_db=None):
+    """Process workbooks in parallel, writing per-file outputs and a merged roll-up.
+
+    Each workbook's results go to ``<output_dir>/<workbook name>/`` (see source_names), with its
+    profile when asked for; the roll-up files in ``output_dir`` stack all of them under a leading
+    "Source" index level.
+    """
+    entries, summaries = {}, {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_timesheet, file_path, os.path.join(output_dir, source),
+                            verbose=False, use_cache=use_cache, output_format=output_format, profile=profile,
+                            cprofile=cprofile, history_db=history_db): source
+            for file_path, source in zip(file_paths, source_names(file_paths))
+        }
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                entries[source], summaries[source] = future.result()
+            except Exception as e:
+                print(f"Failed to process {source}: {e}", file=sys.stderr)
+                continue
+            print(f"Processed {source}: {len(entries[source])} users")
+
+    if entries:
+        sources = sorted(entries)
+        write_frame(pd.concat([entries[source] for source in sources], keys=sources, names=["Source", None]),
+                    os.path.join(output_dir, "timesheet_entries"), output_format)
+        write_frame(pd.concat([summaries[source] for source in sources], keys=sources, names=["Source", None]),
+                    os.path.join(output_dir, "time_distribution"), output_format)
+    return entries, summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process Vertec timesheet')
+    parser.add_argument('file_path', type=str,
+                        help='Path to the input Excel file, or a directory or glob of files to process in batch')
+    parser.add_argument('--output-dir', type=str, default='output', help='Directory to write the output files to')
+    parser.add_argument('--format', dest='output_format', choices=sorted(OUTPUT_FORMATS), default='csv',
+                        help='File format of the outputs: csv (default), parquet or arrow (Arrow IPC)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes in batch mode (default: number of CPUs)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Always re-parse the workbooks instead of reusing cached results')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Record wall time, CPU time and peak memory per pipeline stage to {PROFILE_TRACE} '
+                             'in the output directory (a Trace Event file for Perfetto or chrome://tracing)')
+    parser.add_argument('--cprofile', action='store_true',
+                        help=f'Also dump cProfile stats of the slowest stage to {PROFILE_STATS} (implies --profile)')
+    parser.add_argument('--history', nargs='?', const='', default=None, metavar='DB',
+                        help='Also append each workbook\'s month to the timesheet history database DB '
+                             f'(default: {default_history_db()}), which timesheet-history queries')
+    args = parser.parse_args()
+    history_db = (args.history or default_history_db()) if args.history is not None else None
+
+    if os.path.isfile(args.file_path):
+        process_timesheet(args.file_path, args.output_dir, use_cache=args.use_cache, output_format=args.output_format,
+                          profile=args.profile, cprofile=args.cprofile, history_db=history_db)
+        return
+
+    file_paths = find_timesheets(args.file_path)
+    if not file_paths:
+        parser.error(f"No Excel files found for '{args.file_path}'")
+    entries, _ = process_timesheets(file_paths, args.output_dir, args.workers, args.use_cache, args.output_format,
+                                    args.profile, args.cprofile, history_db)
+    print(f"Processed {len(entries)} of {len(file_paths)} workbooks")
+    if len(entries) < len(file_paths):
+        sys.exit(1)
 
 
 if __name__ == "__main__":